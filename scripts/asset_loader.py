@@ -0,0 +1,98 @@
+"""
+Parallel asset loader.
+======================
+Image files are decoded, cut into tiles and scaled on a thread pool.
+Only convert()/convert_alpha(), which need the display, run on the main
+thread as each asset finishes, so a progress screen can be drawn
+between them.
+"""
+
+import os
+import time
+import pygame
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from support import cut_graphics, folder_image_paths
+
+
+class AssetLoader:
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2))
+        self.jobs = []  # (name, kind, paths, options)
+        self.timings = {}  # name -> (decode ms, convert ms)
+        self.wall_ms = 0.0
+
+    def add_image(self, name, path, alpha=True, scale=None):
+        """A single image, optionally scaled to `scale` (width, height)."""
+        self.jobs.append((name, 'image', [path], {'alpha': alpha, 'scale': scale}))
+
+    def add_tileset(self, name, path):
+        """A tileset cut into tile_size tiles."""
+        self.jobs.append((name, 'tileset', [path], {}))
+
+    def add_folder(self, name, path, scale=None):
+        """Every .png in a folder, in import_folder order, optionally scaled to `scale`."""
+        paths = folder_image_paths(path) if os.path.exists(path) else []
+        self.jobs.append((name, 'folder', paths, {'scale': scale}))
+
+    def _decode(self, kind, paths, options):
+        """Worker thread: decode, cut and scale image files without touching the display."""
+        start = time.perf_counter()
+        surfaces = [pygame.image.load(path) for path in paths if os.path.exists(path)]
+        if kind == 'tileset':
+            surfaces = cut_graphics(surfaces[0]) if surfaces else []
+        elif options.get('scale'):
+            surfaces = [pygame.transform.scale(surface, options['scale']) for surface in surfaces]
+        return surfaces, (time.perf_counter() - start) * 1000
+
+    def _finish(self, kind, surfaces, options):
+        """Main thread: convert the prepared surfaces to the display format."""
+        if kind in ('folder', 'tileset'):
+            frames = [surface.convert_alpha() for surface in surfaces]
+            return frames if frames or kind == 'folder' else None
+        if not surfaces:
+            return None
+        return surfaces[0].convert_alpha() if options['alpha'] else surfaces[0].convert()
+
+    def load(self, on_progress=None):
+        """
+        Load every queued asset and return a dict of name -> result.
+
+        on_progress(loaded, total, name) is called on the main thread after
+        each asset so a loading screen can be drawn.
+        """
+        results = {}
+        total = len(self.jobs)
+        start = time.perf_counter()
+        if on_progress:
+            on_progress(0, total, '')
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='asset-decode') as executor:
+            futures = {executor.submit(self._decode, kind, paths, options): (name, kind, options)
+                       for name, kind, paths, options in self.jobs}
+            for loaded, future in enumerate(as_completed(futures), start=1):
+                name, kind, options = futures[future]
+                try:
+                    surfaces, decode_ms = future.result()
+                    convert_start = time.perf_counter()
+                    results[name] = self._finish(kind, surfaces, options)
+                    self.timings[name] = (decode_ms, (time.perf_counter() - convert_start) * 1000)
+                except Exception as e:
+                    print(f"Error loading asset {name}: {e}")
+                    results[name] = [] if kind == 'folder' else None
+                if on_progress:
+                    on_progress(loaded, total, name)
+
+        self.wall_ms = (time.perf_counter() - start) * 1000
+        self.jobs = []
+        return results
+
+    def report(self):
+        """Print per-asset decode and convert times."""
+        print(f"\nAsset load times ({self.max_workers} decode threads)")
+        print("-" * 52)
+        print(f"{'asset':<22}{'decode':>10}{'convert':>10}{'total':>10}")
+        for name, (decode_ms, convert_ms) in sorted(self.timings.items(), key=lambda item: -sum(item[1])):
+            print(f"{name:<22}{decode_ms:>8.1f}ms{convert_ms:>8.1f}ms{decode_ms + convert_ms:>8.1f}ms")
+        serial_ms = sum(decode_ms + convert_ms for decode_ms, convert_ms in self.timings.values())
+        print("-" * 52)
+        print(f"wall time {self.wall_ms:.1f} ms (sum of per-asset times {serial_ms:.1f} ms)")
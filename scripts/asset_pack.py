@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Baked Asset Pack
+================
+Offline bake step that cuts tilesets, scales frames and stores every game
+image as raw pixel buffers in one packed file, plus a runtime loader that
+memory-maps the pack and builds surfaces straight from those buffers.
+Startup then skips PNG decoding and per-tile blits.
+
+File layout:
+    magic (4 bytes) | index length (uint32 LE) | JSON index | pixel data
+
+Usage:
+    python asset_pack.py bake
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import pygame
+from settings import screen_width, screen_height, player_sprite_size, EXPLOSION_SIZE
+from support import cut_graphics, folder_image_paths
+
+PACK_PATH = '../cache/assets.pack'
+PACK_MAGIC = b'EPK1'
+PIXEL_ALIGNMENT = 16
+
+SKY_PATHS = {
+    'joy': '../graphics/decoration/sky/sky_joy.png',
+    'fear': '../graphics/decoration/sky/sky_fear.png',
+    'anger': '../graphics/decoration/sky/sky_anger.png',
+    'neutral': '../graphics/decoration/sky/sky_neutral.png'
+}
+
+# (name, kind, path, options) for every baked asset
+GAME_ASSETS = [
+    ('terrain', 'tileset', '../graphics/terrain/terrain_tiles.png', {}),
+    ('grass', 'tileset', '../graphics/decoration/grass/grass.png', {}),
+    ('coins', 'tileset', '../graphics/coins/coin_tiles.png', {}),
+    ('coin_gold', 'folder', '../graphics/coins/gold', {}),
+    ('coin_silver', 'folder', '../graphics/coins/silver', {}),
+    ('palm_small', 'folder', '../graphics/terrain/palm_small', {}),
+    ('palm_large', 'folder', '../graphics/terrain/palm_large', {}),
+    ('palm_bg', 'folder', '../graphics/terrain/palm_bg', {}),
+    ('player_idle', 'folder', '../graphics/character/idle', {}),
+    ('goal', 'image', '../graphics/character/hat.png', {}),
+    ('enemy_run', 'folder', '../graphics/enemy/run', {}),
+    ('explosion', 'folder', '../graphics/enemy/explosion', {'scale': EXPLOSION_SIZE}),
+] + [
+    (f'dust_{kind}', 'folder', f'../graphics/character/dust_particles/{kind}', {})
+    for kind in ('jump', 'land', 'run')
+] + [
+    (f'player/{animation}', 'player_folder', f'../graphics/character/{animation}', {'scale': player_sprite_size})
+    for animation in ('idle', 'run', 'jump', 'fall')
+] + [
+    (f'sky_{emotion}', 'image', path, {'alpha': False, 'scale': (screen_width, screen_height)})
+    for emotion, path in SKY_PATHS.items()
+]
+
+
+def player_folder_paths(path):
+    """Paths in the order import_player_folder loads them."""
+    paths = []
+    for _, __, image_files in os.walk(path):
+        for image in image_files:
+            paths.append(path + '/' + image)
+    return paths
+
+
+def source_paths(kind, path):
+    if kind == 'folder':
+        return folder_image_paths(path) if os.path.exists(path) else []
+    if kind == 'player_folder':
+        return player_folder_paths(path) if os.path.exists(path) else []
+    return [path] if os.path.exists(path) else []
+
+
+def source_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def bake_asset(kind, path, options):
+    """Decode and prepare one asset exactly as the runtime loaders would."""
+    surfaces = [pygame.image.load(source) for source in source_paths(kind, path)]
+    if kind == 'tileset':
+        return cut_graphics(surfaces[0].convert_alpha()) if surfaces else None
+    if kind in ('folder', 'player_folder'):
+        frames = [surface.convert_alpha() for surface in surfaces]
+        if options.get('scale'):
+            frames = [pygame.transform.scale(frame, options['scale']) for frame in frames]
+        return frames
+    if not surfaces:
+        return None
+    image = surfaces[0].convert_alpha() if options.get('alpha', True) else surfaces[0].convert()
+    if options.get('scale'):
+        image = pygame.transform.scale(image, options['scale'])
+    return image
+
+
+def bake(output_path=PACK_PATH):
+    """Write every GAME_ASSETS entry into one pack file."""
+    if not pygame.display.get_surface():
+        # convert()/convert_alpha() need a display mode, a tiny hidden one will do
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+
+    index = {'assets': {}, 'sources': {}}
+    blobs = []
+    offset = 0
+
+    for name, kind, path, options in GAME_ASSETS:
+        result = bake_asset(kind, path, options)
+        for source in source_paths(kind, path):
+            index['sources'][source] = source_stamp(source)
+        if result is None:
+            index['assets'][name] = None
+            continue
+
+        frames = result if isinstance(result, list) else [result]
+        entries = []
+        for frame in frames:
+            pixel_format = 'RGBA' if frame.get_flags() & pygame.SRCALPHA or frame.get_alpha() is not None else 'RGB'
+            data = pygame.image.tobytes(frame, pixel_format)
+            padding = -offset % PIXEL_ALIGNMENT
+            blobs.append(b'\0' * padding + data)
+            offset += padding
+            entries.append([offset, frame.get_width(), frame.get_height(), pixel_format])
+            offset += len(data)
+        index['assets'][name] = {'list': isinstance(result, list), 'frames': entries}
+        print(f"Baked {name}: {len(frames)} frame(s)")
+
+    index_bytes = json.dumps(index).encode('utf-8')
+    # Pad the index with spaces so pixel data starts aligned
+    index_bytes += b' ' * (-(8 + len(index_bytes)) % PIXEL_ALIGNMENT)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    temp_path = output_path + '.part'
+    with open(temp_path, 'wb') as pack_file:
+        pack_file.write(PACK_MAGIC + struct.pack('<I', len(index_bytes)) + index_bytes)
+        for blob in blobs:
+            pack_file.write(blob)
+    os.replace(temp_path, output_path)
+    print(f"Asset pack written to {output_path} ({os.path.getsize(output_path) / 1024 / 1024:.1f} MB)")
+
+
+class AssetPack:
+    """Memory-mapped baked assets. Surfaces are built from the mapped pixel buffers."""
+
+    def __init__(self, path=PACK_PATH):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:4] != PACK_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an asset pack")
+        index_length = struct.unpack_from('<I', self.data, 4)[0]
+        self.index = json.loads(bytes(self.data[8:8 + index_length]))
+        self.data_start = 8 + index_length
+
+    def is_fresh(self):
+        """Check that no source image changed since the pack was baked."""
+        for source, stamp in self.index['sources'].items():
+            if not os.path.exists(source) or source_stamp(source) != stamp:
+                return False
+        baked = {name for name, _, _, _ in GAME_ASSETS}
+        return baked <= set(self.index['assets'])
+
+    def has(self, name):
+        return name in self.index['assets']
+
+    def get(self, name):
+        """Surface, list of Surfaces or None, in the same shape the loaders return."""
+        entry = self.index['assets'][name]
+        if entry is None:
+            return None
+        buffer = memoryview(self.data)
+        frames = []
+        for offset, width, height, pixel_format in entry['frames']:
+            start = self.data_start + offset
+            size = width * height * len(pixel_format)
+            surface = pygame.image.frombuffer(buffer[start:start + size], (width, height), pixel_format)
+            # Copies into the display's pixel format, detaching from the mapping
+            frames.append(surface.convert_alpha() if pixel_format == 'RGBA' else surface.convert())
+        return frames if entry['list'] else frames[0]
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+asset_pack = None
+asset_pack_checked = False
+
+
+def get_asset_pack():
+    """The baked asset pack, or None if it is missing or older than the source images."""
+    global asset_pack, asset_pack_checked
+    if not asset_pack_checked:
+        asset_pack_checked = True
+        if os.path.exists(PACK_PATH):
+            try:
+                pack = AssetPack(PACK_PATH)
+                if pack.is_fresh():
+                    asset_pack = pack
+                    print(f"Using baked asset pack {PACK_PATH}")
+                else:
+                    pack.close()
+                    print("Asset pack is stale, run 'python asset_pack.py bake' to rebuild it")
+            except Exception as e:
+                print(f"Error opening asset pack: {e}")
+    return asset_pack
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != 'bake':
+        print("Usage: python asset_pack.py bake")
+        sys.exit(1)
+    pygame.init()
+    bake()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,225 @@
 import pygame
 import os
-from typing import Dict, Optional
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from settings import MIXER_SETTINGS
+
+# Channels per category. Music and narration come first so set_reserved()
+# keeps pygame's automatic channel picking away from them.
+CHANNEL_POOLS = {
+    'music': 1,
+    'narration': 1,
+    'sfx': 14
+}
+
+
+def init_mixer():
+    """Open the audio device once, with the game's mixer settings."""
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(**MIXER_SETTINGS)
+
+
+class VoiceManager:
+    """
+    Hands out mixer channels from per-category pools.
+    
+    Volume is set on the channel for each play, so overlapping triggers of
+    the same Sound never change each other's volume. When a pool is full the
+    lowest-priority (then oldest) voice is stolen, and repeated triggers of
+    the same sound are rate limited.
+    """
+    
+    def __init__(self, pools=CHANNEL_POOLS):
+        total = sum(pools.values())
+        if pygame.mixer.get_num_channels() < total:
+            pygame.mixer.set_num_channels(total)
+        
+        self.channels = [pygame.mixer.Channel(i) for i in range(total)]
+        self.pools: Dict[str, List[int]] = {}
+        next_id = 0
+        for category, count in pools.items():
+            self.pools[category] = list(range(next_id, next_id + count))
+            next_id += count
+        pygame.mixer.set_reserved(next_id)
+        
+        self.category_volumes = {category: 1.0 for category in pools}
+        # channel id -> (priority, start time, sound name) of the voice playing there
+        self.voices = {}
+        self.last_played = {}
+        self.dropped = 0
+    
+    def channel(self, category):
+        """The first channel of a pool, for single-voice categories like music."""
+        return self.channels[self.pools[category][0]]
+    
+    def active_count(self, name, category='sfx'):
+        count = 0
+        for channel_id in self.pools[category]:
+            voice = self.voices.get(channel_id)
+            if voice and voice[2] == name and self.channels[channel_id].get_busy():
+                count += 1
+        return count
+    
+    def play(self, sound, name, category='sfx', volume=1.0, priority=0,
+             min_interval=0.0, max_instances=None):
+        """Play sound on a channel from the category pool. Returns the channel or None."""
+        now = time.monotonic()
+        if min_interval and now - self.last_played.get(name, float('-inf')) < min_interval:
+            self.dropped += 1
+            return None
+        if max_instances is not None and self.active_count(name, category) >= max_instances:
+            self.dropped += 1
+            return None
+        
+        channel_id = self.find_channel(category, priority)
+        if channel_id is None:
+            self.dropped += 1
+            return None
+        
+        channel = self.channels[channel_id]
+        channel.play(sound)
+        channel.set_volume(volume * self.category_volumes[category])
+        self.voices[channel_id] = (priority, now, name)
+        self.last_played[name] = now
+        return channel
+    
+    def find_channel(self, category, priority):
+        """Id of a free channel, or of the weakest voice that priority is allowed to steal."""
+        victim = None
+        victim_voice = None
+        for channel_id in self.pools[category]:
+            if not self.channels[channel_id].get_busy():
+                return channel_id
+            voice = self.voices.get(channel_id, (float('-inf'), 0.0, None))
+            if victim_voice is None or voice[:2] < victim_voice[:2]:
+                victim, victim_voice = channel_id, voice
+        
+        if victim is not None and victim_voice[0] <= priority:
+            self.channels[victim].stop()
+            return victim
+        return None
+    
+    def set_category_volume(self, category, volume):
+        self.category_volumes[category] = volume
+    
+    def stop(self, category):
+        for channel_id in self.pools[category]:
+            self.channels[channel_id].stop()
+
+
+
+class BackgroundMusic:
+    """
+    Background music with two playback modes.
+    
+    'preload' decodes tracks once and keeps them as Sounds, evicting the least
+    recently played ones to stay under memory_budget bytes. 'stream' plays
+    from disk through pygame.mixer.music with no full decode. 'auto' preloads
+    tracks that fit in stream_threshold bytes and streams longer ones.
+    """
+    
+    def __init__(self, track_paths, mode='auto', memory_budget=48 * 1024 * 1024,
+                 stream_threshold=16 * 1024 * 1024, channel=None):
+        self.track_paths = track_paths
+        self.mode = mode
+        self.memory_budget = memory_budget
+        self.stream_threshold = stream_threshold
+        self.channel = channel or pygame.mixer.Channel(0)
+        self.cache: "OrderedDict[str, pygame.mixer.Sound]" = OrderedDict()
+        self.cache_sizes: Dict[str, int] = {}
+        self.cached_bytes = 0
+        self.volume = 1.0
+        self.streaming = False
+    
+    def decoded_size(self, sound):
+        """Bytes a decoded Sound occupies in the mixer's sample format."""
+        frequency, size, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency) * channels * (abs(size) // 8)
+    
+    def estimated_size(self, path):
+        """Rough decoded size before loading, from the file on disk."""
+        return os.path.getsize(path)
+    
+    def should_stream(self, path):
+        if self.mode == 'stream':
+            return True
+        if self.mode == 'preload':
+            return False
+        return self.estimated_size(path) > min(self.stream_threshold, self.memory_budget)
+    
+    def preload(self, names=None):
+        """Decode tracks ahead of time, as far as the memory budget allows."""
+        for name in names or self.track_paths:
+            path = self.track_paths.get(name)
+            if not path or not os.path.exists(path) or self.should_stream(path):
+                continue
+            if name not in self.cache and self.cached_bytes + self.estimated_size(path) > self.memory_budget:
+                print(f"Skipping BGM preload for {name}: over memory budget")
+                continue
+            self.get_sound(name)
+    
+    def get_sound(self, name):
+        """Cached Sound for a track, decoding it on first use."""
+        if name in self.cache:
+            self.cache.move_to_end(name)
+            return self.cache[name]
+        
+        sound = pygame.mixer.Sound(self.track_paths[name])
+        size = self.decoded_size(sound)
+        self.cache[name] = sound
+        self.cache_sizes[name] = size
+        self.cached_bytes += size
+        self.evict(keep=name)
+        return sound
+    
+    def evict(self, keep=None):
+        while self.cached_bytes > self.memory_budget and len(self.cache) > 1:
+            name = next(iter(self.cache))
+            if name == keep:
+                break
+            self.cache.pop(name)
+            self.cached_bytes -= self.cache_sizes.pop(name)
+            print(f"Evicted {name} background music from memory")
+    
+    def play(self, name):
+        """Loop a track, from memory if cached or streamed from disk. Returns success."""
+        path = self.track_paths.get(name)
+        if not path or not os.path.exists(path):
+            return False
+        
+        if name not in self.cache and self.should_stream(path):
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.set_volume(self.volume)
+            pygame.mixer.music.play(loops=-1)
+            self.streaming = True
+        else:
+            self.channel.play(self.get_sound(name), loops=-1)
+            self.channel.set_volume(self.volume)
+            self.streaming = False
+        return True
+    
+    def stop(self):
+        self.channel.stop()
+        if self.streaming:
+            pygame.mixer.music.stop()
+            self.streaming = False
+    
+    def set_volume(self, volume):
+        self.volume = volume
+        self.channel.set_volume(volume)
+        pygame.mixer.music.set_volume(volume)
+    
+    def clear(self):
+        self.stop()
+        self.cache.clear()
+        self.cache_sizes.clear()
+        self.cached_bytes = 0
 
 
 class AudioManager:
     def __init__(self):
-        if not pygame.mixer.get_init():
-            pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
+        init_mixer()
         
         self.sounds: Dict[str, pygame.mixer.Sound] = {}
         self.sound_enabled = True
@@ -14,12 +227,21 @@ class AudioManager:
         self.volume = 0.7 
         self.music_volume = 0.2 
         self.current_bgm = None  
-        self.bgm_channel = None  
-        self.current_bgm_sound = None  
+        
+        # Per-effect playback rules: lower priority voices get stolen first,
+        # min_interval/max_instances rate limit rapid repeats
+        self.sound_settings = {
+            'jump': {'volume': 0.6, 'priority': 2, 'min_interval': 0.05, 'max_instances': 2},
+            'coin': {'volume': 0.8, 'priority': 1, 'min_interval': 0.03, 'max_instances': 4},
+            'stomp': {'volume': 0.7, 'priority': 3, 'min_interval': 0.05, 'max_instances': 3},
+            'game_over': {'volume': 1.0, 'priority': 10},
+            'game_win': {'volume': 1.0, 'priority': 10}
+        }
         
         self.sound_paths = {
             'jump': '../audio/sfx/jump.wav',
             'coin': '../audio/sfx/coin.wav', 
+            'stomp': '../audio/sfx/hit.wav',
             'game_over': '../audio/sfx/die.wav',
             'game_win': '../audio/sfx/win.wav'
         }
@@ -31,15 +253,20 @@ class AudioManager:
             'neutral': '../audio/bgm/bgm_neutral.wav'
         }
         
+        self.voices = VoiceManager()
         self.load_sounds()
+        
+        self.bgm = BackgroundMusic(self.bgm_paths, channel=self.voices.channel('music'))
+        self.bgm.set_volume(self.music_volume)
+        self.bgm.preload()
         print("Audio Manager initialized")
     
     def load_sounds(self):
         for sound_name, sound_path in self.sound_paths.items():
             try:
                 if os.path.exists(sound_path):
+                    # Volume is applied per play on the channel
                     sound = pygame.mixer.Sound(sound_path)
-                    sound.set_volume(self.volume)
                     self.sounds[sound_name] = sound
                     print(f"Loaded {sound_name} sound from {sound_path}")
                 else: print("Sound dooes not exist")
@@ -56,15 +283,16 @@ class AudioManager:
         
         if sound_name in self.sounds:
             try:
-                sound = self.sounds[sound_name]
-                if volume_override is not None:
-                    # Temporarily change volume for this play
-                    original_volume = sound.get_volume()
-                    sound.set_volume(volume_override * self.volume)
-                    sound.play()
-                    sound.set_volume(original_volume)
-                else:
-                    sound.play()
+                settings = self.sound_settings.get(sound_name, {})
+                volume = volume_override if volume_override is not None else settings.get('volume', 1.0)
+                self.voices.play(
+                    self.sounds[sound_name],
+                    sound_name,
+                    volume=volume * self.volume,
+                    priority=settings.get('priority', 0),
+                    min_interval=settings.get('min_interval', 0.0),
+                    max_instances=settings.get('max_instances')
+                )
             except Exception as e:
                 print(f"Error playing {sound_name}: {e}")
         else:
@@ -77,20 +305,16 @@ class AudioManager:
         
         emotion = emotion.lower()
         self.stop_background_music()
-        bgm_path = self.bgm_paths.get(emotion, self.bgm_paths['neutral'])
+        if emotion not in self.bgm_paths:
+            emotion = 'neutral'
     
         try:
-            if os.path.exists(bgm_path):
-                bgm_sound = pygame.mixer.Sound(bgm_path)
-                self.bgm_channel = pygame.mixer.Channel(0)
-                self.bgm_channel.play(bgm_sound, loops=-1) 
-                self.bgm_channel.set_volume(self.music_volume)
-                
+            if self.bgm.play(emotion):
                 self.current_bgm = emotion
-                self.current_bgm_sound = bgm_sound
-                print(f"Playing {emotion.upper()} background music: {bgm_path}")
+                mode = "streaming" if self.bgm.streaming else "from memory"
+                print(f"Playing {emotion.upper()} background music ({mode})")
             else:
-                print(f"Background music file not found: {bgm_path}")
+                print(f"Background music file not found: {self.bgm_paths[emotion]}")
         except Exception as e:
             print(f"Error playing background music for {emotion}: {e}")
     
@@ -98,24 +322,18 @@ class AudioManager:
     def stop_background_music(self):
         """Stop the currently playing background music."""
         try:
-            if hasattr(self, 'bgm_channel') and self.bgm_channel:
-                self.bgm_channel.stop()
-            pygame.mixer.music.stop()
+            self.bgm.stop()
             
             if self.current_bgm:
                 print(f"Stopped {self.current_bgm.upper()} background music")
                 self.current_bgm = None
-                if hasattr(self, 'current_bgm_sound'):
-                    self.current_bgm_sound = None
         except Exception as e:
             print(f"Error stopping background music: {e}")
     
     def set_music_volume(self, volume: float):
         """Set background music volume (0.0 to 1.0)."""
         self.music_volume = max(0.0, min(1.0, volume))
-        pygame.mixer.music.set_volume(self.music_volume)
-        if hasattr(self, 'bgm_channel') and self.bgm_channel:
-            self.bgm_channel.set_volume(self.music_volume)
+        self.bgm.set_volume(self.music_volume)
             
         print(f"Music volume set to {self.music_volume:.1f}")
     
@@ -134,27 +352,29 @@ class AudioManager:
     
     def play_jump(self):
         """Play jump sound effect."""
-        self.play_sound('jump', volume_override=0.6)
+        self.play_sound('jump')
     
     def play_coin_collect(self):
         """Play coin collection sound effect."""
-        self.play_sound('coin', volume_override=0.8)
+        self.play_sound('coin')
+    
+    def play_stomp(self):
+        """Play enemy stomp sound effect."""
+        self.play_sound('stomp')
     
     def play_game_over(self):
         """Play game over sound effect and stop background music."""
         self.stop_background_music() 
-        self.play_sound('game_over', volume_override=1.0)
+        self.play_sound('game_over')
     
     def play_game_win(self):
         """Play game win sound effect and stop background music."""
         self.stop_background_music() 
-        self.play_sound('game_win', volume_override=1.0)
+        self.play_sound('game_win')
     
     def set_volume(self, volume: float):
         """Set global volume (0.0 to 1.0)."""
         self.volume = max(0.0, min(1.0, volume))
-        for sound in self.sounds.values():
-            sound.set_volume(self.volume)
         print(f"Audio volume set to {self.volume:.1f}")
     
     def toggle_sound(self):
@@ -169,20 +389,25 @@ class AudioManager:
         return self.sound_enabled
     
     def stop_all_sounds(self):
-        """Stop all currently playing sounds."""
-        pygame.mixer.stop()
+        """Stop all currently playing sound effects."""
+        self.voices.stop('sfx')
     
     def cleanup(self):
         """Clean up audio resources."""
         self.stop_background_music()
         self.stop_all_sounds()
         self.sounds.clear()
+        self.bgm.clear()
         print("Audio Manager cleaned up")
 
-# Unity like singleton to easily play sounds from any script
-audio_manager = AudioManager()
+# Unity like singleton to easily play sounds from any script,
+# created on first use so importing this module stays cheap
+audio_manager: Optional[AudioManager] = None
 
 
 def get_audio_manager() -> AudioManager:
     """Get the global audio manager instance."""
+    global audio_manager
+    if audio_manager is None:
+        audio_manager = AudioManager()
     return audio_manager
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Batch Experience Processor
+==========================
+Pre-classify and pre-narrate JSONL dumps of user experiences in bulk.
+Input is streamed line by line, requests run with bounded concurrency,
+rate limits shrink the concurrency and back off, and results are appended
+to an output JSONL that doubles as the resume checkpoint. Resuming keeps
+only the successful records and retries the rest, so the output ends with
+exactly one line per experience.
+
+Usage:
+    python batch_experiences.py input.jsonl output.jsonl [--workers 8]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from llm_backends import is_rate_limit_error
+from ml_agents import EmotionBrain
+from profiling import percentile
+
+TEXT_FIELDS = ('user_input', 'text', 'experience', 'body')
+ID_FIELDS = ('id', 'request_id')
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that halves on rate limits and creeps back up on success.
+
+    Workers call acquire()/release() around each request. After a rate limit
+    every worker also waits out a shared, jittered backoff window.
+    """
+
+    def __init__(self, max_concurrency, base_backoff=1.0, max_backoff=60.0):
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.backoff = 0.0
+        self.resume_at = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+            delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        with self.condition:
+            self.limit = min(self.max_concurrency, self.limit + 1.0 / max(1.0, self.limit))
+            self.backoff = 0.0
+            self.condition.notify_all()
+
+    def on_rate_limit(self):
+        """Shrink concurrency and return how long the caller should wait."""
+        with self.condition:
+            self.limit = max(1.0, self.limit / 2)
+            self.backoff = min(self.max_backoff, max(self.base_backoff, self.backoff * 2))
+            delay = self.backoff * random.uniform(0.5, 1.0)
+            self.resume_at = max(self.resume_at, time.monotonic() + delay)
+            return delay
+
+
+class BatchExperienceProcessor:
+    def __init__(self, brain, max_concurrency=8, max_retries=5, model="gpt-3.5-turbo"):
+        self.brain = brain
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.limiter = AdaptiveLimiter(max_concurrency)
+        self.latencies = []
+        self.processed = 0
+        self.failed = 0
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def read_records(self, input_path, done_ids):
+        """Stream (record_id, text) pairs from the input, skipping finished ones."""
+        with open(input_path, 'r', encoding='utf-8') as input_file:
+            for line_number, line in enumerate(input_file, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"Skipping line {line_number}: {e}")
+                    continue
+
+                record_id = next((str(record[f]) for f in ID_FIELDS if f in record), str(line_number))
+                if record_id in done_ids:
+                    continue
+                text = next((record[f] for f in TEXT_FIELDS if record.get(f)), None)
+                if not text:
+                    print(f"Skipping record {record_id}: no experience text")
+                    continue
+                yield record_id, text
+
+    def load_checkpoint(self, output_path):
+        """
+        Ids already processed successfully by a previous run.
+
+        Failed ids are retried, so their error lines (and any partially
+        written last line) are dropped by rewriting the file with only the
+        ok records first; the output then holds one line per id.
+        """
+        done_ids = set()
+        if not os.path.exists(output_path):
+            return done_ids
+        kept = []
+        stale = 0
+        with open(output_path, 'r', encoding='utf-8') as output_file:
+            for line in output_file:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    stale += 1  # Partially written last line from an interrupted run
+                    continue
+                if result.get('status') == 'ok' and result['id'] not in done_ids:
+                    done_ids.add(result['id'])
+                    kept.append(line if line.endswith('\n') else line + '\n')
+                else:
+                    stale += 1
+        if stale:
+            temp_path = output_path + '.part'
+            with open(temp_path, 'w', encoding='utf-8') as temp_file:
+                temp_file.writelines(kept)
+            os.replace(temp_path, output_path)
+            print(f"Dropped {stale} failed or incomplete records from {output_path}, retrying them")
+        return done_ids
+
+    def process_one(self, record_id, text):
+        """Run one experience through the brain, retrying on rate limits."""
+        attempts = 0
+        while True:
+            self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                result = self.brain.process_user_input(text, self.model, strict=True)
+            except Exception as e:
+                self.limiter.release()
+                attempts += 1
+                if attempts > self.max_retries:
+                    return {'id': record_id, 'status': 'error', 'error': str(e)}, None
+                with self.lock:
+                    self.retries += 1
+                if is_rate_limit_error(e):
+                    delay = self.limiter.on_rate_limit()
+                    print(f"Rate limited on {record_id}, backing off {delay:.1f}s "
+                          f"(concurrency {int(self.limiter.limit)})")
+                    time.sleep(delay)
+                else:
+                    time.sleep(min(self.limiter.max_backoff, self.limiter.base_backoff * 2 ** (attempts - 1)))
+                continue
+
+            latency = time.perf_counter() - started
+            self.limiter.release()
+            self.limiter.on_success()
+            return {
+                'id': record_id,
+                'status': 'ok',
+                'user_input': text,
+                'emotion': result['emotion'],
+                'narrative': result['narrative'],
+                'latency_ms': round(latency * 1000, 1)
+            }, latency
+
+    def run(self, input_path, output_path):
+        """Process the whole input file and return a summary report."""
+        done_ids = self.load_checkpoint(output_path)
+        if done_ids:
+            print(f"Resuming: {len(done_ids)} experiences already processed")
+
+        started = time.perf_counter()
+        records = self.read_records(input_path, done_ids)
+        # Keep a small backlog in flight instead of reading the whole file up front
+        max_pending = self.max_concurrency * 2
+
+        with open(output_path, 'a', encoding='utf-8') as output_file, \
+                ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_pending:
+                    record = next(records, None)
+                    if record is None:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(self.process_one, *record))
+
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result, latency = future.result()
+                    output_file.write(json.dumps(result) + '\n')
+                    output_file.flush()
+                    if latency is None:
+                        self.failed += 1
+                    else:
+                        self.processed += 1
+                        self.latencies.append(latency)
+
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed):
+        latencies = sorted(self.latencies)
+        return {
+            'processed': self.processed,
+            'failed': self.failed,
+            'retries': self.retries,
+            'elapsed_s': round(elapsed, 2),
+            'throughput_per_s': round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50) * 1000, 1),
+                'p95': round(percentile(latencies, 95) * 1000, 1),
+                'p99': round(percentile(latencies, 99) * 1000, 1)
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-classify and pre-narrate a JSONL file of experiences.")
+    parser.add_argument('input', help="JSONL file with one experience per line")
+    parser.add_argument('output', help="JSONL file for results (also used to resume)")
+    parser.add_argument('--workers', type=int, default=8, help="maximum concurrent requests")
+    parser.add_argument('--retries', type=int, default=5, help="retries per experience")
+    parser.add_argument('--model', default="gpt-3.5-turbo")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Input file not found: {args.input}")
+        sys.exit(1)
+
+    processor = BatchExperienceProcessor(EmotionBrain(), args.workers, args.retries, args.model)
+    report = processor.run(args.input, args.output)
+
+    print("\nBatch complete")
+    print("=" * 35)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
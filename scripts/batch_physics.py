@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Batch Player Physics
+====================
+Steps many simulated players at once on one terrain layout, for automated
+playtesting. Every agent's state (position, velocity, ground/ceiling/wall
+contact, death) is a numpy array entry, and each agent can use any of the
+EMOTION_PHYSICS presets.
+
+The kernel reproduces Player.update step for step: input, then the swept
+horizontal move, then gravity and the swept vertical move, then the
+fall-death check. Moves advance in the same MAX_SUBSTEP sub-steps and
+stop against the same nearest solid tile, and fractional vertical moves
+are rounded the way pygame.Rect rounds them. Only the tiles around each
+agent are tested, so a step costs a few array operations however large
+the level is. Coins, the goal and enemies are not simulated.
+
+Usage:
+    python batch_physics.py [--agents 1000] [--steps 3600] [--verify 24]
+"""
+
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import contextlib
+import math
+import random
+import time
+import numpy as np
+import pygame
+from settings import tile_size, player_sprite_size, LEVEL_WIDTH, LEVEL_HEIGHT, SIMULATION_HZ, MAX_SUBSTEP
+from player import EMOTION_PHYSICS
+from solidity import SolidityMap
+from input_replay import KeyState, KEY_BITS
+
+# Order of the preset index stored per agent
+PRESET_NAMES = tuple(EMOTION_PHYSICS)
+
+# Player.die threshold: below the level plus a buffer
+DEATH_Y = LEVEL_HEIGHT * tile_size + 100
+
+
+def layout_from_csv(csv_text):
+    """Layer CSV text, as produced by the level generator, to a 2D list of tile strings."""
+    return [line.split(',') for line in csv_text.strip().splitlines()]
+
+
+def find_spawn(player_layout):
+    """Top-left of the player spawn tile, as EmotionLevelViewer.spawn_player finds it."""
+    for row_idx, row in enumerate(player_layout):
+        for col_idx, cell in enumerate(row):
+            if cell == '27':
+                return col_idx * tile_size, row_idx * tile_size
+    return tile_size, tile_size
+
+
+def round_like_rect(values):
+    """Round to integers the way pygame.Rect does when assigned a float (half away from zero)."""
+    return np.trunc(values + np.copysign(0.5, values)).astype(np.int64)
+
+
+def inputs_from_masks(masks):
+    """(move, jump) arrays from KeyState bitmasks, with Player.input's key priorities."""
+    masks = np.asarray(masks, dtype=np.int64)
+
+    def held(*keys):
+        bits = sum(1 << KEY_BITS[key] for key in keys)
+        return (masks & bits) != 0
+
+    right = held(pygame.K_RIGHT, pygame.K_d)
+    left = held(pygame.K_LEFT, pygame.K_a)
+    move = np.where(right, 1, np.where(left, -1, 0))
+    return move, held(pygame.K_SPACE, pygame.K_w, pygame.K_UP)
+
+
+class BatchPhysics:
+    def __init__(self, terrain_layout, size=player_sprite_size):
+        self.width, self.height = size
+        self.solid = SolidityMap(terrain_layout).to_array()
+        self.solid_flat = np.concatenate(([False], self.solid.ravel()))
+
+        # Tile rows and columns a player rect can overlap
+        self.span_rows = math.ceil(self.height / tile_size) + 1
+        self.span_columns = math.ceil(self.width / tile_size) + 1
+
+        presets = [EMOTION_PHYSICS[name] for name in PRESET_NAMES]
+        self.preset_speed = np.array([preset['speed'] for preset in presets], dtype=np.int64)
+        self.preset_gravity = np.array([preset['gravity'] for preset in presets], dtype=np.float64)
+        self.preset_jump = np.array([preset['jump_speed'] for preset in presets], dtype=np.float64)
+        self.preset_max_fall = np.array([preset['max_fall_speed'] for preset in presets], dtype=np.float64)
+        self.reset(np.zeros((0, 2)), [])
+
+    def reset(self, positions, emotions):
+        """Start one agent per (x, y) top-left position, each with the physics of its emotion."""
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+        count = len(positions)
+        self.count = count
+        self.x = positions[:, 0].copy()
+        self.y = positions[:, 1].copy()
+        self.vx = np.zeros(count, dtype=np.int64)
+        self.vy = np.zeros(count, dtype=np.float64)
+        self.on_ground = np.zeros(count, dtype=bool)
+        self.on_ceiling = np.zeros(count, dtype=bool)
+        self.on_left = np.zeros(count, dtype=bool)
+        self.on_right = np.zeros(count, dtype=bool)
+        self.dead = np.zeros(count, dtype=bool)
+
+        self.preset = np.array([PRESET_NAMES.index(emotion if emotion in EMOTION_PHYSICS else 'neutral')
+                                for emotion in emotions], dtype=np.int64)
+        self.speed = self.preset_speed[self.preset]
+        self.gravity = self.preset_gravity[self.preset]
+        self.jump_speed = self.preset_jump[self.preset]
+        self.max_fall_speed = self.preset_max_fall[self.preset]
+
+    def load(self, x, y, vy, on_ground, emotion):
+        """Start agents from explicit states, all with the physics of one emotion."""
+        count = len(x)
+        self.count = count
+        self.x = np.asarray(x, dtype=np.int64).copy()
+        self.y = np.asarray(y, dtype=np.int64).copy()
+        self.vx = np.zeros(count, dtype=np.int64)
+        self.vy = np.asarray(vy, dtype=np.float64).copy()
+        self.on_ground = np.asarray(on_ground, dtype=bool).copy()
+        self.on_ceiling = np.zeros(count, dtype=bool)
+        self.on_left = np.zeros(count, dtype=bool)
+        self.on_right = np.zeros(count, dtype=bool)
+        self.dead = np.zeros(count, dtype=bool)
+
+        preset = PRESET_NAMES.index(emotion if emotion in EMOTION_PHYSICS else 'neutral')
+        self.preset = np.full(count, preset, dtype=np.int64)
+        self.speed = np.full(count, self.preset_speed[preset])
+        self.gravity = np.full(count, self.preset_gravity[preset])
+        self.jump_speed = np.full(count, self.preset_jump[preset])
+        self.max_fall_speed = np.full(count, self.preset_max_fall[preset])
+
+    def tile_solid(self, rows, columns):
+        """Solidity of tiles at (rows, columns); outside the layout nothing is solid."""
+        rows_count, columns_count = self.solid.shape
+        inside = (rows >= 0) & (rows < rows_count) & (columns >= 0) & (columns < columns_count)
+        # Tiles outside the layout all read the empty cell kept at index 0
+        return self.solid_flat[np.where(inside, rows * columns_count + columns + 1, 0)]
+
+    def step(self, move, jump):
+        """
+        Advance every agent by one simulation step.
+
+        move is -1, 0 or 1 per agent (left, none, right) and jump whether
+        a jump key is held, as Player.input reads them.
+        """
+        alive = ~self.dead
+
+        # Player.input
+        self.vx = np.where(alive, move, self.vx)
+        jumping = alive & jump & self.on_ground
+        self.vy = np.where(jumping, self.jump_speed, self.vy)
+
+        self.horizontal_movement_collision(alive)
+        self.vertical_movement_collision(alive)
+
+        # Player.check_death
+        died = alive & (self.y > DEATH_Y)
+        self.dead |= died
+        self.vx[died] = 0
+        self.vy[died] = 0.0
+
+    def overlapped_solid(self):
+        """
+        Which agents' rects overlap a solid tile, with the first and last
+        row and column among those tiles, as Player.solid_tiles_in finds them.
+        """
+        hit = np.zeros(self.count, dtype=bool)
+        first_rows = np.full(self.count, np.iinfo(np.int64).max)
+        last_rows = np.full(self.count, -1)
+        first_columns = np.full(self.count, np.iinfo(np.int64).max)
+        last_columns = np.full(self.count, -1)
+        top_row = self.y // tile_size
+        left_column = self.x // tile_size
+        for k in range(self.span_rows):
+            row = top_row + k
+            for j in range(self.span_columns):
+                column = left_column + j
+                solid = ((row * tile_size < self.y + self.height) & (column * tile_size < self.x + self.width)
+                         & self.tile_solid(row, column))
+                hit |= solid
+                first_rows = np.where(solid, np.minimum(first_rows, row), first_rows)
+                last_rows = np.where(solid, np.maximum(last_rows, row), last_rows)
+                first_columns = np.where(solid, np.minimum(first_columns, column), first_columns)
+                last_columns = np.where(solid, np.maximum(last_columns, column), last_columns)
+        return hit, first_rows, last_rows, first_columns, last_columns
+
+    def horizontal_movement_collision(self, alive):
+        self.on_left &= ~alive
+        self.on_right &= ~alive
+        remaining = np.where(alive, self.vx * self.speed, 0)
+
+        # Sweep in sub-steps no longer than MAX_SUBSTEP, stopping at the first solid tile
+        moving = remaining != 0
+        while moving.any():
+            step = np.where(moving, np.clip(remaining, -MAX_SUBSTEP, MAX_SUBSTEP), 0)
+            self.x = self.x + step
+            remaining = remaining - step
+            hit, _, _, first_columns, last_columns = self.overlapped_solid()
+            hit &= moving
+            right = hit & (step > 0)
+            self.x = np.where(right, first_columns * tile_size - self.width, self.x)
+            self.on_right |= right
+            left = hit & (step < 0)
+            self.x = np.where(left, (last_columns + 1) * tile_size, self.x)
+            self.on_left |= left
+            moving &= ~hit & (remaining != 0)
+
+    def vertical_movement_collision(self, alive):
+        self.on_ground &= ~alive
+        self.on_ceiling &= ~alive
+
+        # Player.apply_gravity, then the rect rounds the fractional move
+        self.vy = np.where(alive, np.minimum(self.vy + self.gravity, self.max_fall_speed), self.vy)
+        remaining = np.where(alive, round_like_rect(self.y + self.vy) - self.y, 0)
+
+        moving = remaining != 0
+        while moving.any():
+            step = np.where(moving, np.clip(remaining, -MAX_SUBSTEP, MAX_SUBSTEP), 0)
+            self.y = self.y + step
+            remaining = remaining - step
+            hit, first_rows, last_rows, _, _ = self.overlapped_solid()
+            hit &= moving
+            land = hit & (step > 0)
+            self.y = np.where(land, first_rows * tile_size - self.height, self.y)
+            self.on_ground |= land
+            bump = hit & (step < 0)
+            self.y = np.where(bump, (last_rows + 1) * tile_size, self.y)
+            self.on_ceiling |= bump
+            self.vy = np.where(hit, 0.0, self.vy)
+            moving &= ~hit & (remaining != 0)
+
+    def state(self, i):
+        """One agent's state in the same terms as a Player, for comparisons."""
+        return {
+            'x': int(self.x[i]),
+            'y': int(self.y[i]),
+            'vx': int(self.vx[i]),
+            'vy': float(self.vy[i]),
+            'on_ground': bool(self.on_ground[i]),
+            'on_ceiling': bool(self.on_ceiling[i]),
+            'on_left': bool(self.on_left[i]),
+            'on_right': bool(self.on_right[i]),
+            'dead': bool(self.dead[i])
+        }
+
+
+def player_state(player):
+    return {
+        'x': player.rect.x,
+        'y': player.rect.y,
+        'vx': int(player.direction.x),
+        'vy': float(player.direction.y),
+        'on_ground': player.on_ground,
+        'on_ceiling': player.on_ceiling,
+        'on_left': player.on_left,
+        'on_right': player.on_right,
+        'dead': player.is_dead
+    }
+
+
+def random_key_masks(rng, count, steps, hold=20):
+    """Random held-key bitmasks per agent, each held for up to `hold` steps."""
+    masks = np.zeros((steps, count), dtype=np.int64)
+    for agent in range(count):
+        step = 0
+        while step < steps:
+            length = rng.randint(1, hold)
+            masks[step:step + length, agent] = rng.randrange(1 << len(KEY_BITS))
+            step += length
+    return masks
+
+
+def generate_terrain(emotion, width, seed):
+    from level_generator import EnhancedLevelGenerator
+    level = EnhancedLevelGenerator(emotion, width=width, seed=seed).generate_enhanced_level()
+    return layout_from_csv(level['terrain']), find_spawn(layout_from_csv(level['player']))
+
+
+def verify(agents, steps, width, seed):
+    """Step Player objects and the kernel side by side on random input; return the mismatches found."""
+    from player import Player
+
+    rng = random.Random(seed)
+    mismatches = []
+    for emotion in PRESET_NAMES:
+        terrain, spawn = generate_terrain(emotion, width, seed)
+        kernel = BatchPhysics(terrain)
+        # Spread the agents out so they meet walls, ledges and gaps all over the level
+        positions = [(spawn[0] + rng.randrange(0, (width - 4) * tile_size), spawn[1] - rng.randrange(0, 4 * tile_size))
+                     for _ in range(agents)]
+        emotions = [rng.choice(PRESET_NAMES) for _ in range(agents)]
+        kernel.reset(positions, emotions)
+        solidity = SolidityMap(terrain)
+        players = [Player(position, agent_emotion) for position, agent_emotion in zip(positions, emotions)]
+        masks = random_key_masks(rng, agents, steps)
+
+        for step in range(steps):
+            move, jump = inputs_from_masks(masks[step])
+            kernel.step(move, jump)
+            for i, player in enumerate(players):
+                player.update(solidity, KeyState(int(masks[step, i])))
+                expected = player_state(player)
+                if kernel.state(i) != expected:
+                    mismatches.append(f"{emotion} level, agent {i} ({emotions[i]}), step {step}: "
+                                      f"expected {expected}, got {kernel.state(i)}")
+                    # Carry on from the Player's state so one slip is reported once
+                    kernel.x[i], kernel.y[i] = player.rect.x, player.rect.y
+                    kernel.vx[i], kernel.vy[i] = expected['vx'], expected['vy']
+                    kernel.on_ground[i], kernel.dead[i] = expected['on_ground'], expected['dead']
+                    kernel.on_ceiling[i] = expected['on_ceiling']
+                    kernel.on_left[i], kernel.on_right[i] = expected['on_left'], expected['on_right']
+    return mismatches
+
+
+def measure(agents, steps, width, seed):
+    """Agent-steps per second of the kernel on random input."""
+    rng = random.Random(seed)
+    terrain, spawn = generate_terrain('neutral', width, seed)
+    kernel = BatchPhysics(terrain)
+    kernel.reset([spawn] * agents, [rng.choice(PRESET_NAMES) for _ in range(agents)])
+    moves, jumps = inputs_from_masks(random_key_masks(rng, agents, steps))
+
+    start = time.perf_counter()
+    for step in range(steps):
+        kernel.step(moves[step], jumps[step])
+    elapsed = time.perf_counter() - start
+    return agents * steps / elapsed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time the batch player physics kernel.")
+    parser.add_argument('--agents', type=int, default=1000, help="agents stepped together when timing")
+    parser.add_argument('--steps', type=int, default=3600, help="simulation steps when timing")
+    parser.add_argument('--verify', type=int, default=24, metavar='AGENTS',
+                        help="agents per emotion level checked against Player (0 to skip)")
+    parser.add_argument('--width', type=int, default=LEVEL_WIDTH, help="level width in tiles")
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+
+    # Only the display: Player loads its frames with convert_alpha(), which needs
+    # a display mode, and opens the mixer itself through the audio manager if at all
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+
+    if args.verify:
+        with contextlib.redirect_stdout(None):
+            mismatches = verify(args.verify, 600, args.width, args.seed)
+        for mismatch in mismatches[:5]:
+            print(mismatch)
+        checked = args.verify * 600 * len(PRESET_NAMES)
+        print(f"Checked {checked} agent-steps against Player: {len(mismatches)} mismatches")
+
+    with contextlib.redirect_stdout(None):
+        rate, elapsed = measure(args.agents, args.steps, args.width, args.seed)
+    print(f"{args.agents} agents x {args.steps} steps in {elapsed:.2f} s: "
+          f"{rate:,.0f} agent-steps/s, {rate / SIMULATION_HZ:,.0f}x real time")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Headless Frame Benchmark
+========================
+Runs the real viewer/player loop with SDL's dummy video and audio drivers,
+an offline stub EmotionBrain and a silent narrator. Each scenario feeds a
+fixed input script for a fixed number of frames, for every emotion and
+level width, and reports frame-time percentiles and per-subsystem timings
+as JSON.
+
+Runs are seeded and unthrottled (no clock.tick), and warm-up frames are
+discarded, so results from two runs on the same machine can be compared.
+
+Usage:
+    python benchmark.py [--frames 600] [--widths 60 120 240] [--output bench.json]
+"""
+
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import contextlib
+import gc
+import json
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import pygame
+from settings import screen_width, screen_height, tile_size, LEVEL_WIDTH, MIXER_SETTINGS
+from profiling import percentile
+from input_replay import KeyState, KEY_BITS
+
+EMOTION_EXPERIENCES = {
+    'joy': "I got promoted at work today and everyone was happy for me",
+    'fear': "I'm nervous about my job interview tomorrow",
+    'anger': "Traffic was terrible and the bus driver was rude",
+    'neutral': "I had lunch and went for a walk"
+}
+
+# (frames, keys held) segments, repeated until the scenario ends
+INPUT_SCRIPT = [
+    (90, (pygame.K_d,)),
+    (12, (pygame.K_d, pygame.K_SPACE)),
+    (60, (pygame.K_d,)),
+    (30, ()),
+    (40, (pygame.K_a,)),
+    (8, (pygame.K_a, pygame.K_SPACE)),
+    (40, (pygame.K_d, pygame.K_SPACE)),
+]
+
+
+def scripted_keys(frame):
+    """Keys held on a given frame of INPUT_SCRIPT."""
+    frame %= sum(length for length, _ in INPUT_SCRIPT)
+    for length, keys in INPUT_SCRIPT:
+        if frame < length:
+            return KeyState(sum(1 << KEY_BITS[key] for key in keys))
+        frame -= length
+    return KeyState()
+
+
+class SilentNarrator:
+    """Narrator with the EdgeTTSNarrator interface that never synthesizes speech."""
+
+    is_generating = False
+
+    def speak_narrative(self, text, emotion='neutral', priority=None):
+        pass
+
+    def begin_narration(self, emotion='neutral'):
+        pass
+
+    def queue_sentence(self, text, priority=None):
+        pass
+
+    def presynthesize(self, emotion, sentences):
+        pass
+
+    def is_speaking(self):
+        return False
+
+    def stop_speaking(self):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+
+class FrameTimings:
+    """Per-frame accumulated milliseconds for each instrumented subsystem."""
+
+    def __init__(self):
+        self.current = defaultdict(float)
+        self.frames = []
+
+    def wrap(self, name, func):
+        """Return func timed into the current frame under name."""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.current[name] += (time.perf_counter() - start) * 1000
+        return timed
+
+    def end_frame(self, frame_ms):
+        self.current['frame'] = frame_ms
+        self.frames.append(self.current)
+        self.current = defaultdict(float)
+
+    def summary(self):
+        names = sorted({name for frame in self.frames for name in frame})
+        result = {}
+        for name in names:
+            values = sorted(frame.get(name, 0.0) for frame in self.frames)
+            result[name] = {
+                'mean_ms': round(sum(values) / len(values), 3),
+                'p50_ms': round(percentile(values, 50), 3),
+                'p95_ms': round(percentile(values, 95), 3),
+                'p99_ms': round(percentile(values, 99), 3),
+                'max_ms': round(values[-1], 3)
+            }
+        return result
+
+
+def instrument_viewer(viewer, timings):
+    """Time the viewer's subsystems by wrapping its bound methods."""
+    viewer.step = timings.wrap('step', viewer.step)
+    viewer.update_camera = timings.wrap('step.camera', viewer.update_camera)
+    viewer.check_enemy_collisions = timings.wrap('step.enemy_collisions', viewer.check_enemy_collisions)
+    viewer.enemies.update = timings.wrap('step.enemies', viewer.enemies.update)
+    viewer.enemies.draw = timings.wrap('draw.enemies', viewer.enemies.draw)
+    viewer.particles.update = timings.wrap('step.particles', viewer.particles.update)
+    viewer.particles.draw = timings.wrap('draw.particles', viewer.particles.draw)
+    viewer.update = timings.wrap('update', viewer.update)
+    viewer.draw_background = timings.wrap('draw.background', viewer.draw_background)
+    viewer.draw_playing_ui = timings.wrap('draw.hud', viewer.draw_playing_ui)
+    draw_layer = viewer.draw_layer_with_real_sprites
+
+    def draw_layer_timed(surface, layout, layer_type):
+        timings.wrap(f'draw.layer.{layer_type}', draw_layer)(surface, layout, layer_type)
+
+    viewer.draw_layer_with_real_sprites = draw_layer_timed
+
+
+def add_stress_enemies(viewer, count, seed):
+    """Spawn extra enemies on random surface tiles, each patrolling a few tiles."""
+    rng = random.Random(seed)
+    solidity = viewer.solidity
+    surfaces = [(row, col) for row in range(solidity.rows - 1) for col in range(solidity.columns)
+                if solidity.is_surface(row, col)]
+    enemies = viewer.enemies
+    for _ in range(count):
+        row, col = rng.choice(surfaces)
+        x = col * tile_size
+        enemies.spawn(x, (row + 1) * tile_size - enemies.height,
+                      max(0, x - 2 * tile_size), x + 2 * tile_size, rng.choice((-1, 1)))
+
+
+def run_scenario(emotion, level_columns, frames, warmup, seed, screen, levels_dir, extra_enemies=0):
+    """Benchmark one emotion at one level width and return its report."""
+    from level_viewer import EmotionLevelViewer
+    from llm_backends import StubBackend
+    from ml_agents import EmotionBrain
+
+    viewer = EmotionLevelViewer(level_number=0, levels_dir=levels_dir, level_columns=level_columns)
+    viewer._emotion_brain = EmotionBrain(backend=StubBackend(seed=seed))
+    viewer._narrator = SilentNarrator()
+
+    viewer.process_user_experience(EMOTION_EXPERIENCES[emotion], seed=seed)
+    if viewer.narrative_thread is not None:
+        viewer.narrative_thread.join()
+    if extra_enemies:
+        add_stress_enemies(viewer, extra_enemies, seed)
+
+    timings = FrameTimings()
+    instrument_viewer(viewer, timings)
+    player = viewer.player
+    player.update = timings.wrap('step.player', player.update)
+
+    deaths = 0
+    wins = 0
+    gc.collect()
+    try:
+        for frame in range(warmup + frames):
+            keys = scripted_keys(frame)
+            start = time.perf_counter()
+            pygame.event.pump()
+            viewer.step(keys)
+            viewer.update(1000 // 60)
+            draw_start = time.perf_counter()
+            viewer.draw(screen)
+            timings.current['draw'] = (time.perf_counter() - draw_start) * 1000
+            flip_start = time.perf_counter()
+            pygame.display.flip()
+            timings.current['flip'] = (time.perf_counter() - flip_start) * 1000
+            frame_ms = (time.perf_counter() - start) * 1000
+
+            if frame < warmup:
+                timings.current.clear()
+            else:
+                timings.end_frame(frame_ms)
+
+            # Keep the player in play outside the timed region
+            if player.is_dead or player.has_won:
+                deaths += player.is_dead
+                wins += player.has_won
+                player.respawn()
+    finally:
+        viewer.cancel_narrative_stream()
+
+    frame_times = sorted(frame['frame'] for frame in timings.frames)
+    return {
+        'emotion': emotion,
+        'detected_emotion': viewer.emotion,
+        'level_columns': level_columns,
+        'enemies': viewer.enemies.count,
+        'frames': frames,
+        'frame_ms': {
+            'mean': round(sum(frame_times) / len(frame_times), 3),
+            'p50': round(percentile(frame_times, 50), 3),
+            'p95': round(percentile(frame_times, 95), 3),
+            'p99': round(percentile(frame_times, 99), 3),
+            'max': round(frame_times[-1], 3)
+        },
+        'subsystems': timings.summary(),
+        'deaths': deaths,
+        'wins': wins
+    }
+
+
+def environment_info(args):
+    from asset_pack import get_asset_pack
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'sdl': '.'.join(str(part) for part in pygame.get_sdl_version()),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'video_driver': pygame.display.get_driver(),
+        'asset_pack': get_asset_pack() is not None,
+        'seed': args.seed,
+        'frames': args.frames,
+        'warmup': args.warmup,
+        'extra_enemies': args.enemies
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game loop headlessly.")
+    parser.add_argument('--frames', type=int, default=600, help="measured frames per scenario")
+    parser.add_argument('--warmup', type=int, default=30, help="frames discarded before measuring")
+    parser.add_argument('--emotions', nargs='+', default=list(EMOTION_EXPERIENCES), choices=list(EMOTION_EXPERIENCES))
+    parser.add_argument('--widths', nargs='+', type=int, default=[LEVEL_WIDTH, LEVEL_WIDTH * 2, LEVEL_WIDTH * 4],
+                        help="level widths in tiles")
+    parser.add_argument('--enemies', type=int, default=0, help="extra enemies spawned to stress the enemy system")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    levels_dir = tempfile.mkdtemp(prefix='benchmark_levels_')
+    scenarios = []
+    try:
+        # The game prints as it runs, keep stdout for the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            pygame.mixer.pre_init(**MIXER_SETTINGS)
+            pygame.init()
+            screen = pygame.display.set_mode((screen_width, screen_height))
+            for level_columns in args.widths:
+                for emotion in args.emotions:
+                    print(f"Benchmarking {emotion} at {level_columns} columns...")
+                    scenarios.append(run_scenario(emotion, level_columns, args.frames, args.warmup,
+                                                  args.seed, screen, levels_dir, args.enemies))
+            info = environment_info(args)
+    finally:
+        shutil.rmtree(levels_dir, ignore_errors=True)
+        pygame.quit()
+
+    report = {'environment': info, 'scenarios': scenarios}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
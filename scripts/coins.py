@@ -0,0 +1,64 @@
+"""
+Coin Store
+==========
+The coins of a level kept as a set of remaining (row, col) cells, so a
+pickup check only looks at the cells the player's rect passed over and
+the remaining and collected counts are always at hand.
+
+The store keeps the level's initial coin cells, so a restart can put
+every coin back without reading the coins CSV again. The coins layout
+used for drawing is updated in place as coins are collected and reset.
+"""
+
+from settings import tile_size
+
+COIN_TILE = '16'
+
+
+class CoinStore:
+    def __init__(self, coins_layout):
+        self.layout = coins_layout
+        self.initial = frozenset((row_idx, col_idx)
+                                 for row_idx, row in enumerate(coins_layout)
+                                 for col_idx, cell in enumerate(row)
+                                 if cell == COIN_TILE)
+        self.reset()
+
+    def reset(self):
+        """Put every coin of the level back."""
+        for row, col in self.initial:
+            self.layout[row][col] = COIN_TILE
+        self.remaining = set(self.initial)
+        self.collected = 0
+
+    @property
+    def total(self):
+        return len(self.initial)
+
+    @property
+    def remaining_count(self):
+        return len(self.remaining)
+
+    def collect_rect(self, rect):
+        """Collect every remaining coin in a cell the rect overlaps. Returns how many."""
+        count = 0
+        for row in range(rect.top // tile_size, (rect.bottom - 1) // tile_size + 1):
+            for col in range(rect.left // tile_size, (rect.right - 1) // tile_size + 1):
+                if (row, col) in self.remaining:
+                    self.remaining.discard((row, col))
+                    self.layout[row][col] = '0'
+                    count += 1
+        self.collected += count
+        return count
+
+    def collect_swept(self, start_rect, end_rect):
+        """
+        Collect coins anywhere the rect passed moving from start_rect to end_rect this step.
+
+        The player moves horizontally and then vertically, so the rect sweeps
+        two legs that meet at (end x, start y); the corner the bounding box of
+        the whole move would add is never touched.
+        """
+        corner = start_rect.copy()
+        corner.x = end_rect.x
+        return self.collect_rect(start_rect.union(corner)) + self.collect_rect(corner.union(end_rect))
@@ -0,0 +1,209 @@
+"""
+Enemy System
+============
+Enemies spawned from the level's enemies layer patrol their platform
+between the tiles of the constraints layer.
+
+All enemy state lives in parallel numpy arrays (struct of arrays) rather
+than one object per enemy, and each simulation step updates every enemy
+with a handful of whole-array operations into preallocated buffers.
+Drawing culls to the camera view and blits the visible enemies in one
+batch, so thousands of enemies cost little more than a few.
+"""
+
+import numpy as np
+import pygame
+from settings import tile_size, screen_width, screen_height
+
+ENEMY_TILE = '29'
+CONSTRAINT_TILE = '30'
+
+# Patrol speed in pixels per simulation step
+EMOTION_ENEMY_SPEED = {
+    'joy': 1.5,
+    'fear': 2.5,
+    'anger': 4.0,
+    'neutral': 2.0
+}
+
+
+class EnemySystem:
+    def __init__(self, run_frames, explosion_frames=None, emotion='neutral', capacity=64):
+        # The enemy art faces left, moving right uses the flipped frames
+        self.frames_left = run_frames
+        self.frames_right = [pygame.transform.flip(frame, True, False) for frame in run_frames]
+        self.explosion_frames = explosion_frames or []
+        self.width, self.height = run_frames[0].get_size() if run_frames else (tile_size, tile_size)
+        self.speed = EMOTION_ENEMY_SPEED.get(emotion, EMOTION_ENEMY_SPEED['neutral'])
+        self.animation_speed = 0.15
+        self.explosion_speed = 0.3
+
+        self.count = 0
+        self.allocate(capacity)
+
+        # Small fixed pool of explosion effects
+        self.explosion_x = np.zeros(16, dtype=np.float32)
+        self.explosion_y = np.zeros(16, dtype=np.float32)
+        self.explosion_frame = np.zeros(16, dtype=np.float32)
+        self.explosion_active = np.zeros(16, dtype=bool)
+
+    def allocate(self, capacity):
+        """(Re)size every per-enemy array, keeping the existing enemies."""
+        def grow(array, dtype):
+            resized = np.zeros(capacity, dtype=dtype)
+            if array is not None:
+                resized[:self.count] = array[:self.count]
+            return resized
+
+        self.capacity = capacity
+        self.x = grow(getattr(self, 'x', None), np.float32)
+        self.y = grow(getattr(self, 'y', None), np.float32)
+        self.vx = grow(getattr(self, 'vx', None), np.float32)
+        self.frame = grow(getattr(self, 'frame', None), np.float32)
+        self.min_x = grow(getattr(self, 'min_x', None), np.float32)
+        self.max_x = grow(getattr(self, 'max_x', None), np.float32)
+        self.alive = grow(getattr(self, 'alive', None), bool)
+        # Scratch buffers so update() does not allocate
+        self.turn = np.zeros(capacity, dtype=bool)
+        self.scratch = np.zeros(capacity, dtype=bool)
+
+    def clear(self):
+        self.count = 0
+        self.explosion_active[:] = False
+
+    def spawn(self, x, y, min_x, max_x, direction=-1):
+        """Add one enemy patrolling between min_x and max_x (left edge positions)."""
+        if self.count == self.capacity:
+            self.allocate(self.capacity * 2)
+        i = self.count
+        self.x[i] = min(max(x, min_x), max_x)
+        self.y[i] = y
+        self.vx[i] = direction * self.speed if max_x > min_x else 0.0
+        self.frame[i] = 0.0
+        self.min_x[i] = min_x
+        self.max_x[i] = max_x
+        self.alive[i] = True
+        self.count += 1
+
+    def load_layouts(self, enemies_layout, constraints_layout):
+        """Spawn an enemy on every enemy tile, bounded by the nearest constraints in its row."""
+        self.clear()
+        for row_idx, row in enumerate(enemies_layout):
+            constraint_row = constraints_layout[row_idx] if row_idx < len(constraints_layout) else []
+            for col_idx, cell in enumerate(row):
+                if cell != ENEMY_TILE:
+                    continue
+                left = col_idx - 1
+                while left >= 0 and (left >= len(constraint_row) or constraint_row[left] != CONSTRAINT_TILE):
+                    left -= 1
+                right = col_idx + 1
+                while right < len(row) and (right >= len(constraint_row) or constraint_row[right] != CONSTRAINT_TILE):
+                    right += 1
+
+                x = col_idx * tile_size + (tile_size - self.width) / 2
+                y = (row_idx + 1) * tile_size - self.height
+                self.spawn(x, y, (left + 1) * tile_size, right * tile_size - self.width)
+        print(f"Spawned {self.count} enemies")
+
+    def snapshot(self):
+        """Read-only copies of every enemy's state, for restore()."""
+        state = {'count': self.count}
+        for name in ('x', 'y', 'vx', 'frame', 'min_x', 'max_x', 'alive'):
+            array = getattr(self, name)[:self.count].copy()
+            array.flags.writeable = False
+            state[name] = array
+        return state
+
+    def restore(self, state):
+        """Put every enemy back as it was when snapshot() was taken."""
+        self.clear()
+        if state['count'] > self.capacity:
+            self.allocate(state['count'])
+        self.count = state['count']
+        for name in ('x', 'y', 'vx', 'frame', 'min_x', 'max_x', 'alive'):
+            getattr(self, name)[:self.count] = state[name]
+
+    def update(self):
+        """Advance every enemy by one simulation step."""
+        n = self.count
+        if n == 0:
+            self.update_explosions()
+            return
+        x, vx = self.x[:n], self.vx[:n]
+        min_x, max_x = self.min_x[:n], self.max_x[:n]
+        turn, scratch = self.turn[:n], self.scratch[:n]
+
+        x += vx
+        np.less_equal(x, min_x, out=turn)
+        np.greater_equal(x, max_x, out=scratch)
+        np.logical_or(turn, scratch, out=turn)
+        np.negative(vx, out=vx, where=turn)
+        np.clip(x, min_x, max_x, out=x)
+
+        frame = self.frame[:n]
+        frame += self.animation_speed
+        np.mod(frame, len(self.frames_left) or 1, out=frame)
+
+        self.update_explosions()
+
+    def update_explosions(self):
+        self.explosion_frame[self.explosion_active] += self.explosion_speed
+        self.explosion_active &= self.explosion_frame < len(self.explosion_frames)
+
+    def check_player(self, rect, falling):
+        """
+        Resolve contact with the player's rect.
+
+        Enemies landed on from above while falling are killed. Returns
+        (number of enemies stomped, whether the player was hit).
+        """
+        n = self.count
+        if n == 0:
+            return 0, False
+        x, y = self.x[:n], self.y[:n]
+        touching = (self.alive[:n] & (x < rect.right) & (x + self.width > rect.left)
+                    & (y < rect.bottom) & (y + self.height > rect.top))
+        hits = np.flatnonzero(touching)
+        if len(hits) == 0:
+            return 0, False
+
+        stomped = hits[rect.bottom < y[hits] + self.height / 2] if falling else hits[:0]
+        for i in stomped:
+            self.kill(i)
+        return len(stomped), len(stomped) < len(hits)
+
+    def kill(self, i):
+        self.alive[i] = False
+        self.vx[i] = 0.0
+        free = np.flatnonzero(~self.explosion_active)
+        if len(free) and self.explosion_frames:
+            slot = free[0]
+            size = self.explosion_frames[0].get_size()
+            self.explosion_x[slot] = self.x[i] + self.width / 2 - size[0] / 2
+            self.explosion_y[slot] = self.y[i] + self.height / 2 - size[1] / 2
+            self.explosion_frame[slot] = 0.0
+            self.explosion_active[slot] = True
+
+    def draw(self, surface, view_x, view_y, alpha=1.0):
+        """Blit visible enemies, interpolated alpha of the way through the last step."""
+        n = self.count
+        if n == 0 or not self.frames_left:
+            return
+        # Positions at render time: the current step minus the part not yet reached
+        x = self.x[:n] - self.vx[:n] * (1.0 - alpha) - view_x
+        y = self.y[:n] - view_y
+        visible = np.flatnonzero(self.alive[:n] & (x > -self.width) & (x < screen_width)
+                                 & (y > -self.height) & (y < screen_height))
+        if len(visible):
+            frames = self.frame[visible].astype(np.int32).tolist()
+            facing_right = (self.vx[visible] > 0).tolist()
+            screen_x = x[visible].astype(np.int32).tolist()
+            screen_y = y[visible].astype(np.int32).tolist()
+            left, right = self.frames_left, self.frames_right
+            surface.blits([((right if face else left)[frame], (sx, sy))
+                           for frame, face, sx, sy in zip(frames, facing_right, screen_x, screen_y)],
+                          doreturn=False)
+
+        for slot in np.flatnonzero(self.explosion_active):
+            image = self.explosion_frames[int(self.explosion_frame[slot])]
+            surface.blit(image, (self.explosion_x[slot] - view_x, self.explosion_y[slot] - view_y))
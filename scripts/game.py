@@ -6,44 +6,160 @@ Main game loop and coordination for the emotion-based platformer.
 Integrates ML emotion detection with procedural level generation.
 """
 
-import pygame
-import sys
-from settings import screen_width, screen_height
-from level_viewer import EmotionLevelViewer
+from profiling import get_startup_timer, get_frame_profiler
+
+startup = get_startup_timer()
+with startup.measure("imports"):
+    import argparse
+    import math
+    import pygame
+    import sys
+    import time
+    from settings import (screen_width, screen_height, MIXER_SETTINGS, FPS, LEVEL_WIDTH,
+                          SIMULATION_HZ, MAX_SIMULATION_STEPS)
+    from audio_manager import get_audio_manager
+    from level_viewer import EmotionLevelViewer
+    from input_replay import InputRecorder, InputReplay
+    from quality import QualityGovernor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI Emotion-Based Level Generator")
+    parser.add_argument('--record', metavar='PATH', help="record the first level played to a replay file")
+    parser.add_argument('--replay', metavar='PATH', help="play back a recorded level instead of live input")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="replay speed multiplier, 0 runs as fast as possible")
+    parser.add_argument('--fps', type=int, default=FPS,
+                        help="render frame rate cap, 0 for uncapped (gameplay speed is unaffected)")
+    parser.add_argument('--fixed-quality', action='store_true',
+                        help="always draw at full quality instead of adapting to frame time")
+    return parser.parse_args()
 
 
 def main():
     """Main function with in-game text input."""
-    pygame.init()
-    screen = pygame.display.set_mode((screen_width, screen_height))
-    pygame.display.set_caption("AI Emotion-Based Level Generator")
+    args = parse_args()
+    recorder = InputRecorder(args.record) if args.record else None
+    try:
+        replay = InputReplay(args.replay) if args.replay else None
+    except ValueError as error:
+        print(f"Cannot replay: {error}")
+        sys.exit(1)
+    
+    with startup.measure("pygame init"):
+        # Set mixer settings first so pygame.init opens the audio device only once
+        pygame.mixer.pre_init(**MIXER_SETTINGS)
+        pygame.init()
+    with startup.measure("display"):
+        screen = pygame.display.set_mode((screen_width, screen_height))
+        pygame.display.set_caption("AI Emotion-Based Level Generator")
     clock = pygame.time.Clock()
 
     print("AI Emotion-Based Level Generator")
     print("=" * 35)
     print("Use in-game interface to enter experiences!")
-    viewer = EmotionLevelViewer(level_number=0, levels_dir="generated_levels")
+    with startup.measure("audio"):
+        get_audio_manager()
+    with startup.measure("level viewer"):
+        level_columns = replay.level_columns if replay else LEVEL_WIDTH
+        viewer = EmotionLevelViewer(level_number=0, levels_dir="generated_levels", level_columns=level_columns)
+    if replay:
+        print(f"Replaying {args.replay}: {replay.emotion} level, seed {replay.seed}")
+        viewer.start_replay_level(replay.emotion, replay.seed)
+    
+    # The simulation runs in fixed steps, rendering happens at whatever rate the machine manages
+    speed = args.speed if replay else 1.0
+    fps = args.fps if speed else 0
+    step_ms = 1000 / SIMULATION_HZ
+    max_steps = MAX_SIMULATION_STEPS * max(1, math.ceil(speed))
+    accumulator = 0.0
+    profiler = get_frame_profiler()
+    # Budget the frame work time for the frame rate the player asked for
+    governor = None if args.fixed_quality else QualityGovernor(viewer, 1000 / (args.fps or FPS))
+    first_frame = True
     
     # Game loop
     running = True
     while running:
-        dt = clock.tick(60)
+        dt = clock.tick(fps)
+        frame_start = time.perf_counter()
+        profiler.begin_frame()
         
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
+        with profiler.section('events'):
+            play_events = []  # events handled during gameplay, as recorded and replayed
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
                     running = False
-            viewer.handle_event(event)
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        running = False
+                    elif event.key == pygame.K_F3:
+                        profiler.toggle()
+                    elif event.key == pygame.K_F4:
+                        profiler.dump_csv()
+                if not replay:
+                    if viewer.state == 'playing':
+                        play_events.append(event)
+                    viewer.handle_event(event)
+            
+            if not replay:
+                keys = pygame.key.get_pressed()
+            
+            if recorder:
+                if viewer.state == 'playing' and not recorder.recording and not recorder.finished:
+                    recorder.start(viewer.emotion, viewer.level_seed, viewer.level_columns)
+                elif viewer.state != 'playing' and recorder.recording:
+                    recorder.finish(viewer.player)
+                if recorder.recording:
+                    recorder.record_presses(play_events)
 
-        keys = pygame.key.get_pressed()
-        viewer.update_camera(keys)
-        viewer.update(dt)
-        viewer.draw(screen)
+        with profiler.section('simulation'):
+            # Unthrottled replays advance exactly one step per rendered frame
+            accumulator += dt * speed if speed else step_ms
+            steps = 0
+            while accumulator >= step_ms and steps < max_steps:
+                if replay:
+                    step = replay.next_step()
+                    if step is None:
+                        replay.check_final(viewer.player)
+                        running = False
+                        break
+                    keys, presses = step
+                    for event in presses:
+                        viewer.handle_event(event)
+                elif recorder and recorder.recording:
+                    recorder.record_step(keys)
+                viewer.step(keys)
+                accumulator -= step_ms
+                steps += 1
+            if accumulator >= step_ms:
+                # Too far behind to catch up, slow the game down instead of spiralling
+                accumulator = 0.0
+        
+        with profiler.section('update'):
+            viewer.update(dt)
+        with profiler.section('draw'):
+            viewer.draw(screen, accumulator / step_ms)
+        with profiler.section('overlay'):
+            profiler.draw_overlay(screen)
 
-        pygame.display.flip()
+        with profiler.section('flip'):
+            pygame.display.flip()
+        profiler.end_frame()
+        # Only gameplay frames draw anything the governor can turn down
+        if governor and viewer.state == 'playing':
+            governor.add_frame((time.perf_counter() - frame_start) * 1000)
+        
+        if first_frame:
+            first_frame = False
+            startup.report("First frame drawn")
+            if not replay:
+                viewer.warm_up()
 
+    if recorder:
+        recorder.finish(viewer.player)
+    if governor:
+        governor.report()
     pygame.quit()
     sys.exit()
 
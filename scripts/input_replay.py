@@ -0,0 +1,194 @@
+"""
+Input Recording and Replay
+==========================
+Records the keys held on every simulation step of a level, plus the level's
+emotion, seed and width, so the exact same session can be played back later
+through the same Player/camera code paths.
+
+File layout:
+    magic (4 bytes) | header length (uint32 LE) | JSON header | key runs
+
+Held keys are stored as one bitmask per step, run-length encoded as
+(step count uint16, mask uint8) pairs. Discrete presses that change game
+state (restart, skip narration) are listed in the header by the step they
+were handled before. Recordings from another REPLAY_VERSION are refused.
+"""
+
+import json
+import os
+import struct
+import pygame
+
+REPLAY_MAGIC = b'ERP1'
+# Bumped whenever the simulation rules change (collision, pickups, scoring),
+# since recordings from older rules no longer play back the same
+REPLAY_VERSION = 3
+
+# Keys read from the held-key state by Player.input and update_camera, one bit each
+TRACKED_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN,
+                pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_SPACE)
+KEY_BITS = {key: bit for bit, key in enumerate(TRACKED_KEYS)}
+
+# Key presses handled as events during play
+EVENT_KEYS = (pygame.K_r, pygame.K_s)
+
+RUN = struct.Struct('<HB')
+
+
+class KeyState:
+    """Held keys as a bitmask, indexable like pygame.key.get_pressed()."""
+
+    def __init__(self, mask=0):
+        self.mask = mask
+
+    @classmethod
+    def from_pressed(cls, pressed):
+        mask = 0
+        for key, bit in KEY_BITS.items():
+            if pressed[key]:
+                mask |= 1 << bit
+        return cls(mask)
+
+    def __getitem__(self, key):
+        bit = KEY_BITS.get(key)
+        return bit is not None and bool(self.mask & (1 << bit))
+
+
+def player_snapshot(player):
+    """Player state compared at the end of a replay to detect divergence."""
+    return {
+        'x': player.rect.x,
+        'y': player.rect.y,
+        'score': player.score,
+        'dead': player.is_dead,
+        'won': player.has_won
+    }
+
+
+class InputRecorder:
+    """Records the first level played in a session to a replay file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self.masks = bytearray()
+        self.presses = []  # [step, key]
+        self.finished = False
+
+    @property
+    def recording(self):
+        return self.header is not None and not self.finished
+
+    def start(self, emotion, seed, level_columns):
+        self.header = {
+            'version': REPLAY_VERSION,
+            'emotion': emotion,
+            'seed': seed,
+            'level_columns': level_columns
+        }
+        self.masks = bytearray()
+        self.presses = []
+        print(f"Recording input to {self.path}")
+
+    def record_presses(self, events):
+        """Store state-changing key presses, handled before the next step."""
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key in EVENT_KEYS:
+                self.presses.append([len(self.masks), event.key])
+
+    def record_step(self, keys):
+        """Store the keys held for one simulation step."""
+        self.masks.append(KeyState.from_pressed(keys).mask)
+
+    def finish(self, player=None):
+        """Write the recording. Called when the level ends or the game quits."""
+        if not self.recording:
+            return
+        self.finished = True
+        self.header['steps'] = len(self.masks)
+        self.header['presses'] = self.presses
+        if player is not None:
+            self.header['final'] = player_snapshot(player)
+
+        runs = bytearray()
+        index = 0
+        while index < len(self.masks):
+            mask = self.masks[index]
+            count = 1
+            while (index + count < len(self.masks) and self.masks[index + count] == mask
+                   and count < 0xFFFF):
+                count += 1
+            runs += RUN.pack(count, mask)
+            index += count
+
+        header_bytes = json.dumps(self.header).encode('utf-8')
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'wb') as replay_file:
+            replay_file.write(REPLAY_MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes + runs)
+        print(f"Saved {len(self.masks)} steps of input to {self.path} ({len(runs)} bytes of key data)")
+
+
+class InputReplay:
+    """Plays a recording back one simulation step at a time."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as replay_file:
+            data = replay_file.read()
+        if data[:4] != REPLAY_MAGIC:
+            raise ValueError(f"{path} is not an input recording")
+        header_length = struct.unpack_from('<I', data, 4)[0]
+        self.header = json.loads(data[8:8 + header_length])
+        version = self.header.get('version')
+        if version != REPLAY_VERSION:
+            raise ValueError(f"{path} was recorded with replay version {version}, this game plays version "
+                             f"{REPLAY_VERSION}; the simulation has changed since, so it would not play back the same")
+
+        self.masks = bytearray()
+        for offset in range(8 + header_length, len(data), RUN.size):
+            count, mask = RUN.unpack_from(data, offset)
+            self.masks += bytes([mask]) * count
+
+        self.presses = {}
+        for step, key in self.header.get('presses', []):
+            self.presses.setdefault(step, []).append(key)
+        self.step = 0
+
+    @property
+    def emotion(self):
+        return self.header['emotion']
+
+    @property
+    def seed(self):
+        return self.header['seed']
+
+    @property
+    def level_columns(self):
+        return self.header['level_columns']
+
+    @property
+    def finished(self):
+        return self.step >= len(self.masks)
+
+    def next_step(self):
+        """(KeyState, KEYDOWN events) for the next step, or None at the end."""
+        if self.finished:
+            return None
+        keys = KeyState(self.masks[self.step])
+        events = [pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode='', scancode=0)
+                  for key in self.presses.get(self.step, [])]
+        self.step += 1
+        return keys, events
+
+    def check_final(self, player):
+        """Compare the player's end state with the recording. Returns True if they match."""
+        expected = self.header.get('final')
+        if expected is None:
+            return True
+        actual = player_snapshot(player)
+        if actual == expected:
+            print(f"Replay finished after {self.step} steps, matching the recording")
+            return True
+        print(f"Replay diverged after {self.step} steps: expected {expected}, got {actual}")
+        return False
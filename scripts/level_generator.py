@@ -11,11 +11,15 @@ import os
 import sys
 import pygame
 from typing import List
-from settings import screen_width, screen_height
+from settings import screen_width, screen_height, LEVEL_WIDTH
+from solidity import SolidityMap, is_solid_value
 
 class EnhancedLevelGenerator:
-    def __init__(self, emotion='neutral'):
-        self.width = 60
+    def __init__(self, emotion='neutral', width=LEVEL_WIDTH, seed=None):
+        self.width = width
+        # Same seed, emotion and width always give the same level
+        self.seed = seed
+        self.random = random.Random(seed)
         self.height = 11
         self.emotion = emotion.lower()
         self.first_platform_x = None  # Track first platform position
@@ -48,6 +52,7 @@ class EnhancedLevelGenerator:
             self.bg_tree_chance = 0.33
             self.grass_chance = 0.95
             self.coin_chance = 0.6
+            self.enemy_chance = 0.2
         elif emotion == 'fear':
             self.platform_min_length = 2      # Very small platforms (single blocks)
             self.platform_max_length = 3      # Maximum 2-tile platforms (still very small)
@@ -58,6 +63,7 @@ class EnhancedLevelGenerator:
             self.bg_tree_chance = 0.17
             self.grass_chance = 0.55
             self.coin_chance = 0.3
+            self.enemy_chance = 0.5
         elif emotion == 'anger':
             self.platform_min_length = 1
             self.platform_max_length = 8
@@ -68,6 +74,7 @@ class EnhancedLevelGenerator:
             self.bg_tree_chance = 0.15
             self.grass_chance = 0.45
             self.coin_chance = 0.15
+            self.enemy_chance = 0.7
         else:  # neutral/default
             self.platform_min_length = 4
             self.platform_max_length = 10
@@ -78,18 +85,22 @@ class EnhancedLevelGenerator:
             self.bg_tree_chance = 0.25
             self.grass_chance = 0.85
             self.coin_chance = 0.3
+            self.enemy_chance = 0.35
         self.ground_level = 8
         
     def generate_enhanced_level(self) -> dict:
         print(f"Generating enhanced level for mood: **{self.emotion.upper()}** ...")
         terrain_grid = self._create_empty_grid()
+        # Kept in step with terrain_grid as tiles are placed; every solidity check reads it
+        self.solidity = SolidityMap(terrain_grid)
         self._generate_ground_platforms(terrain_grid)
         self._generate_strategic_floating_platforms(terrain_grid)
-        grass_grid = self._generate_proper_grass(terrain_grid)
-        bg_palms_grid = self._generate_proper_background_trees(terrain_grid)
-        fg_palms_grid = self._generate_proper_foreground_trees(terrain_grid)
-        coins_grid = self._generate_simple_coins(terrain_grid, fg_palms_grid, grass_grid)
-        player_grid = self._generate_player_layer(terrain_grid)  # Pass terrain to find safe spawn
+        grass_grid = self._generate_proper_grass()
+        bg_palms_grid = self._generate_proper_background_trees()
+        fg_palms_grid = self._generate_proper_foreground_trees()
+        coins_grid = self._generate_simple_coins(fg_palms_grid, grass_grid)
+        player_grid = self._generate_player_layer()  # Uses the terrain to find a safe spawn
+        enemies_grid, constraints_grid = self._generate_enemies(player_grid)
         return {
             'terrain': self._grid_to_csv(terrain_grid),
             'coins': self._grid_to_csv(coins_grid),
@@ -98,8 +109,8 @@ class EnhancedLevelGenerator:
             'bg_palms': self._grid_to_csv(bg_palms_grid),
             'grass': self._grid_to_csv(grass_grid),
             'crates': self._generate_empty_layer(),
-            'enemies': self._generate_empty_layer(),
-            'constraints': self._generate_empty_layer()
+            'enemies': self._grid_to_csv(enemies_grid),
+            'constraints': self._grid_to_csv(constraints_grid)
         }
     
     def _create_empty_grid(self) -> List[List[int]]:
@@ -112,7 +123,7 @@ class EnhancedLevelGenerator:
         first_platform_created = False
         
         while x < self.width:
-            platform_length = random.randint(self.platform_min_length, self.platform_max_length)
+            platform_length = self.random.randint(self.platform_min_length, self.platform_max_length)
             platform_length = min(platform_length, self.width - x)
             
             # Always create the first platform at the start for player spawn
@@ -126,7 +137,7 @@ class EnhancedLevelGenerator:
                 x += platform_length
                 
                 if x < self.width - 5:
-                    gap_size = random.randint(self.gap_min_size, self.gap_max_size)
+                    gap_size = self.random.randint(self.gap_min_size, self.gap_max_size)
                     gap_size = min(gap_size, self.width - x - 5)
                     x += gap_size
             else:
@@ -142,59 +153,47 @@ class EnhancedLevelGenerator:
         platform_rows = [4, 5, 6, 7]
         
         for row in platform_rows:
-            x = random.randint(8, 12)
+            x = self.random.randint(8, 12)
             
             while x < self.width - 10:
-                if random.random() < self.floating_platform_chance:
+                if self.random.random() < self.floating_platform_chance:
                     if row <= 5:
-                        platform_size = random.randint(2, 4)
+                        platform_size = self.random.randint(2, 4)
                     else:
-                        platform_size = random.randint(3, 6)
+                        platform_size = self.random.randint(3, 6)
                     
                     if x + platform_size < self.width - 5:
-                        if self._can_place_platform(grid, x, row, platform_size):
+                        if self._can_place_platform(x, row, platform_size):
                             self._create_floating_platform(grid, x, row, platform_size)
                 
-                x += random.randint(6, 12)
+                x += self.random.randint(6, 12)
         
         self._add_challenging_single_blocks(grid)
     
-    def _can_place_platform(self, grid: List[List[int]], x: int, y: int, length: int) -> bool:
+    def _can_place_platform(self, x: int, y: int, length: int) -> bool:
         """Check if we can place a platform without overlapping"""
-        for check_x in range(max(0, x-1), min(self.width, x + length + 1)):
-            for check_y in range(max(0, y-1), min(self.height, y + 2)):
-                if grid[check_y][check_x] != 0:
-                    return False
-        return True
+        return not self.solidity.any_solid(y - 1, x - 1, y + 1, min(self.width - 1, x + length))
     
     def _add_challenging_single_blocks(self, grid: List[List[int]]):
         """Add single floating blocks for advanced platforming"""
-        for _ in range(random.randint(2, 4)):
-            x = random.randint(10, self.width - 10)
-            y = random.randint(4, 6)
+        for _ in range(self.random.randint(2, 4)):
+            x = self.random.randint(10, self.width - 10)
+            y = self.random.randint(4, 6)
             
-            if (self._is_area_clear(grid, x, y, 1, 1) and
-                self._has_nearby_platform(grid, x, y)):
-                grid[y][x] = self.terrain_tiles['single_block']
+            if (self._is_area_clear(x, y, 1, 1) and
+                self._has_nearby_platform(x, y)):
+                self._set_terrain(grid, x, y, self.terrain_tiles['single_block'])
     
-    def _is_area_clear(self, grid: List[List[int]], x: int, y: int, width: int, height: int) -> bool:
+    def _is_area_clear(self, x: int, y: int, width: int, height: int) -> bool:
         """Check if an area is clear of terrain"""
-        for check_y in range(y, min(self.height, y + height)):
-            for check_x in range(x, min(self.width, x + width)):
-                if grid[check_y][check_x] != 0:
-                    return False
-        return True
+        return not self.solidity.any_solid(y, x, y + height - 1, min(self.width - 1, x + width - 1))
     
-    def _has_nearby_platform(self, grid: List[List[int]], x: int, y: int) -> bool:
+    def _has_nearby_platform(self, x: int, y: int) -> bool:
         """Check if there's a platform within jumping distance"""
         search_range = 5
-        for check_x in range(max(0, x - search_range), min(self.width, x + search_range)):
-            for check_y in range(max(0, y - 1), min(self.height, y + 3)):
-                if grid[check_y][check_x] != 0:
-                    return True
-        return False
+        return self.solidity.any_solid(y - 1, x - search_range, y + 2, min(self.width, x + search_range) - 1)
     
-    def _generate_proper_grass(self, terrain_grid: List[List[int]]) -> List[List[int]]:
+    def _generate_proper_grass(self) -> List[List[int]]:
         """
         FIXED: Generate grass decorations properly on top of ALL platform surfaces
         """
@@ -204,17 +203,16 @@ class EnhancedLevelGenerator:
         for row in range(self.height - 1):
             for col in range(self.width):
                 # Check if there's solid terrain below AND air at current position
-                if (terrain_grid[row + 1][col] != 0 and      # Solid terrain below
-                    terrain_grid[row][col] == 0 and          # Air at current position
-                    random.random() < self.grass_chance):    # High probability
+                if (self.solidity.is_surface(row, col) and      # Air on solid terrain
+                    self.random.random() < self.grass_chance):    # High probability
                     
                     # Use different grass tile types for variety
                     grass_types = [19, 20, 21, 22, 23]
-                    grass_grid[row][col] = random.choice(grass_types)
+                    grass_grid[row][col] = self.random.choice(grass_types)
         
         return grass_grid
     
-    def _generate_proper_background_trees(self, terrain_grid: List[List[int]]) -> List[List[int]]:
+    def _generate_proper_background_trees(self) -> List[List[int]]:
         """
         Place bg palms **only** on the ground or on top of platforms, and in small clusters.
         """
@@ -222,9 +220,9 @@ class EnhancedLevelGenerator:
         for col in range(0, self.width, 2):
             for row in range(self.height - 2, 2, -1):  # Scan from bottom up
                 # Place a bg palm if this is air and the tile below is solid (i.e., surface)
-                if terrain_grid[row][col] == 0 and terrain_grid[row + 1][col] != 0:
-                    if random.random() < self.bg_tree_chance:
-                        cluster_size = random.choice([1, 2])  # Cluster of 1 or 2
+                if self.solidity.is_surface(row, col):
+                    if self.random.random() < self.bg_tree_chance:
+                        cluster_size = self.random.choice([1, 2])  # Cluster of 1 or 2
                         for offset in range(cluster_size):
                             c = col + offset
                             if c < self.width and bg_tree_grid[row][c] == 0:
@@ -233,7 +231,7 @@ class EnhancedLevelGenerator:
         return bg_tree_grid
 
     
-    def _generate_proper_foreground_trees(self, terrain_grid: List[List[int]]) -> List[List[int]]:
+    def _generate_proper_foreground_trees(self) -> List[List[int]]:
         """
         FIXED: Generate foreground trees ONLY on solid ground, never floating
         """
@@ -243,9 +241,8 @@ class EnhancedLevelGenerator:
         for row in range(self.height - 1):
             for col in range(self.width):
                 # Only place trees where there's solid ground below
-                if (terrain_grid[row + 1][col] != 0 and      # Solid terrain below
-                    terrain_grid[row][col] == 0 and          # Air at current position
-                    random.random() < self.fg_tree_chance):  # Lower chance for trees
+                if (self.solidity.is_surface(row, col) and      # Air on solid terrain
+                    self.random.random() < self.fg_tree_chance):  # Lower chance for trees
                     
                     # Use small foreground palm trees
                     fg_tree_grid[row][col] = 23  # Small foreground palm
@@ -254,19 +251,16 @@ class EnhancedLevelGenerator:
         for row in range(3, 8):  # Floating platform area
             for col in range(self.width):
                 # Check if this is a floating platform surface
-                if (terrain_grid[row][col] != 0 and          # This IS solid terrain
-                    row > 0 and                              # Not top row
-                    terrain_grid[row - 1][col] == 0 and      # Air above platform
+                if (self.solidity.is_surface(row - 1, col) and  # Air above solid terrain
                     fg_tree_grid[row - 1][col] == 0 and      # No tree already placed
-                    random.random() < 0.2):                  # 20% chance on platforms
+                    self.random.random() < 0.2):                  # 20% chance on platforms
                     
                     # Place tree on top of the platform
                     fg_tree_grid[row - 1][col] = 23  # Small foreground palm
         
         return fg_tree_grid
     
-    def _generate_simple_coins(self, terrain_grid: List[List[int]], 
-                              fg_palms_grid: List[List[int]],
+    def _generate_simple_coins(self, fg_palms_grid: List[List[int]],
                               grass_grid: List[List[int]]) -> List[List[int]]:
         """
         FIXED: Generate simple collectibles (just one type, no cats/dogs)
@@ -277,53 +271,40 @@ class EnhancedLevelGenerator:
         for row in range(self.height - 1):
             for col in range(self.width):
                 # Place coins above solid terrain
-                if (terrain_grid[row + 1][col] != 0 and      # Solid below
-                    terrain_grid[row][col] == 0 and          # Air at this position
+                if (self.solidity.is_surface(row, col) and      # Air on solid terrain
                     fg_palms_grid[row][col] == 0 and         # No foreground tree here
-                    random.random() < self.coin_chance):     # Coin chance
+                    self.random.random() < self.coin_chance):     # Coin chance
                     
                     # FIXED: Just one type of collectible
                     coins_grid[row][col] = 16  # Simple collectible
         
         # Add some challenge coins in mid-air between platforms
-        self._add_challenge_coins(coins_grid, terrain_grid, fg_palms_grid)
+        self._add_challenge_coins(coins_grid, fg_palms_grid)
         
         return coins_grid
     
     def _add_challenge_coins(self, coins_grid: List[List[int]], 
-                           terrain_grid: List[List[int]], 
                            fg_palms_grid: List[List[int]]):
         """Add coins in challenging locations for skilled players"""
         for row in range(2, 6):  # High up in the air
             for col in range(5, self.width - 5):
                 # Add coins in mid-air between platforms (risky to collect)
-                if (terrain_grid[row][col] == 0 and         # Air
+                if (not self.solidity.is_solid(row, col) and  # Air
                     fg_palms_grid[row][col] == 0 and        # No tree
                     coins_grid[row][col] == 0 and           # No coin already
-                    self._is_between_platforms(terrain_grid, col, row) and
-                    random.random() < 0.08):                # 8% chance for challenge coins
+                    self._is_between_platforms(col, row) and
+                    self.random.random() < 0.08):                # 8% chance for challenge coins
                     
                     coins_grid[row][col] = 16  # Simple collectible
     
-    def _is_between_platforms(self, terrain_grid: List[List[int]], x: int, y: int) -> bool:
+    def _is_between_platforms(self, x: int, y: int) -> bool:
         """Check if position is between two platforms"""
-        left_platform = False
-        right_platform = False
-        
-        # Look for platforms to the left and right
-        for check_x in range(max(0, x - 6), x):
-            if terrain_grid[y + 1][check_x] != 0 or terrain_grid[y + 2][check_x] != 0:
-                left_platform = True
-                break
-        
-        for check_x in range(x + 1, min(self.width, x + 6)):
-            if terrain_grid[y + 1][check_x] != 0 or terrain_grid[y + 2][check_x] != 0:
-                right_platform = True
-                break
-        
+        # Look for platforms in the two rows below, to the left and right
+        left_platform = self.solidity.any_solid(y + 1, x - 6, y + 2, x - 1)
+        right_platform = self.solidity.any_solid(y + 1, x + 1, y + 2, min(self.width, x + 6) - 1)
         return left_platform and right_platform
     
-    def _generate_player_layer(self, terrain_grid: List[List[int]]) -> List[List[int]]:
+    def _generate_player_layer(self) -> List[List[int]]:
         """Generate player spawn and goal positions - spawn on first platform"""
         grid = self._create_empty_grid()
         
@@ -332,11 +313,10 @@ class EnhancedLevelGenerator:
         spawn_y = self.ground_level - 1  # One tile above ground level
         
         # Look for the first solid platform starting from the left
-        for col in range(self.width):
-            if terrain_grid[self.ground_level][col] != 0:  # Found solid ground
-                spawn_x = col
-                spawn_y = self.ground_level - 1  # Spawn above the platform
-                break
+        first_solid = self.solidity.first_solid_in_row(self.ground_level)
+        if first_solid is not None:  # Found solid ground
+            spawn_x = first_solid
+            spawn_y = self.ground_level - 1  # Spawn above the platform
         
         # Ensure spawn position is safe (not at the very edge)
         spawn_x = max(1, min(spawn_x, self.width - 2))
@@ -347,58 +327,97 @@ class EnhancedLevelGenerator:
         print(f"Player spawned at position ({spawn_x}, {spawn_y}) on first platform")
         return grid
     
+    def _generate_enemies(self, player_grid: List[List[int]]) -> tuple:
+        """
+        Put enemies on platform surfaces, with constraint tiles just past each end
+        of the surface so they patrol it without walking off.
+        """
+        enemies_grid = self._create_empty_grid()
+        constraints_grid = self._create_empty_grid()
+        
+        spawn_col = next((col for row in player_grid for col, cell in enumerate(row) if cell == 27), 0)
+        
+        for row in range(self.height - 1):
+            col = 0
+            while col < self.width:
+                # Find the next run of walkable surface: air with solid terrain below
+                if not self.solidity.is_surface(row, col):
+                    col += 1
+                    continue
+                start = col
+                while col < self.width and self.solidity.is_surface(row, col):
+                    col += 1
+                end = col - 1
+                
+                # Skip short ledges and keep the spawn area safe
+                if end - start < 2 or start - 4 <= spawn_col <= end + 4:
+                    continue
+                if self.random.random() < self.enemy_chance:
+                    enemies_grid[row][self.random.randint(start, end)] = 29  # Enemy
+                    if start > 0:
+                        constraints_grid[row][start - 1] = 30  # Patrol constraint
+                    if end < self.width - 1:
+                        constraints_grid[row][end + 1] = 30
+        
+        return enemies_grid, constraints_grid
+    
+    def _set_terrain(self, grid: List[List[int]], x: int, y: int, tile: int):
+        """Place a terrain tile, keeping the solidity map in step with the grid"""
+        grid[y][x] = tile
+        self.solidity.set_solid(y, x, is_solid_value(tile))
+    
     def _create_platform(self, grid: List[List[int]], start_x: int, start_y: int, length: int):
         """Create a platform with proper tile types"""
         if length < 1:
             return
             
         if length == 1:
-            grid[start_y][start_x] = self.terrain_tiles['single_block']
+            self._set_terrain(grid, start_x, start_y, self.terrain_tiles['single_block'])
         elif length == 2:
-            grid[start_y][start_x] = self.terrain_tiles['platform_top_left']
-            grid[start_y][start_x + 1] = self.terrain_tiles['platform_top_right']
+            self._set_terrain(grid, start_x, start_y, self.terrain_tiles['platform_top_left'])
+            self._set_terrain(grid, start_x + 1, start_y, self.terrain_tiles['platform_top_right'])
         else:
-            grid[start_y][start_x] = self.terrain_tiles['platform_top_left']
+            self._set_terrain(grid, start_x, start_y, self.terrain_tiles['platform_top_left'])
             for i in range(1, length - 1):
-                grid[start_y][start_x + i] = self.terrain_tiles['platform_top_mid']
-            grid[start_y][start_x + length - 1] = self.terrain_tiles['platform_top_right']
+                self._set_terrain(grid, start_x + i, start_y, self.terrain_tiles['platform_top_mid'])
+            self._set_terrain(grid, start_x + length - 1, start_y, self.terrain_tiles['platform_top_right'])
         
         # Fill below with ground
         for y in range(start_y + 1, self.height):
             if length == 1:
                 if y == self.height - 1:
-                    grid[y][start_x] = self.terrain_tiles['pillar_bottom']
+                    self._set_terrain(grid, start_x, y, self.terrain_tiles['pillar_bottom'])
                 else:
-                    grid[y][start_x] = self.terrain_tiles['pillar_mid']
+                    self._set_terrain(grid, start_x, y, self.terrain_tiles['pillar_mid'])
             elif length == 2:
-                grid[y][start_x] = self.terrain_tiles['platform_left']
-                grid[y][start_x + 1] = self.terrain_tiles['platform_right']
+                self._set_terrain(grid, start_x, y, self.terrain_tiles['platform_left'])
+                self._set_terrain(grid, start_x + 1, y, self.terrain_tiles['platform_right'])
             else:
-                grid[y][start_x] = self.terrain_tiles['platform_left']
+                self._set_terrain(grid, start_x, y, self.terrain_tiles['platform_left'])
                 for i in range(1, length - 1):
-                    grid[y][start_x + i] = self.terrain_tiles['ground_fill']
-                grid[y][start_x + length - 1] = self.terrain_tiles['platform_right']
+                    self._set_terrain(grid, start_x + i, y, self.terrain_tiles['ground_fill'])
+                self._set_terrain(grid, start_x + length - 1, y, self.terrain_tiles['platform_right'])
     
     def _create_single_column(self, grid: List[List[int]], x: int, start_y: int):
         """Create a single column of terrain"""
         for y in range(start_y, self.height):
             if y == start_y:
-                grid[y][x] = self.terrain_tiles['platform_top_mid']
+                self._set_terrain(grid, x, y, self.terrain_tiles['platform_top_mid'])
             else:
-                grid[y][x] = self.terrain_tiles['ground_fill']
+                self._set_terrain(grid, x, y, self.terrain_tiles['ground_fill'])
     
     def _create_floating_platform(self, grid: List[List[int]], start_x: int, y: int, length: int):
         """Create a floating platform"""
         if length == 1:
-            grid[y][start_x] = self.terrain_tiles['single_block']
+            self._set_terrain(grid, start_x, y, self.terrain_tiles['single_block'])
         elif length == 2:
-            grid[y][start_x] = self.terrain_tiles['floating_left']
-            grid[y][start_x + 1] = self.terrain_tiles['floating_right']
+            self._set_terrain(grid, start_x, y, self.terrain_tiles['floating_left'])
+            self._set_terrain(grid, start_x + 1, y, self.terrain_tiles['floating_right'])
         else:
-            grid[y][start_x] = self.terrain_tiles['floating_left']
+            self._set_terrain(grid, start_x, y, self.terrain_tiles['floating_left'])
             for i in range(1, length - 1):
-                grid[y][start_x + i] = self.terrain_tiles['floating_mid']
-            grid[y][start_x + length - 1] = self.terrain_tiles['floating_right']
+                self._set_terrain(grid, start_x + i, y, self.terrain_tiles['floating_mid'])
+            self._set_terrain(grid, start_x + length - 1, y, self.terrain_tiles['floating_right'])
     
     def _grid_to_csv(self, grid: List[List[int]]) -> str:
         """Convert grid to CSV string"""
@@ -412,16 +431,20 @@ class EnhancedLevelGenerator:
         grid = self._create_empty_grid()
         return self._grid_to_csv(grid)
     
+    SKY_FILES = {
+        'joy': '../graphics/decoration/sky/sky_joy.png',
+        'fear': '../graphics/decoration/sky/sky_fear.png', 
+        'anger': '../graphics/decoration/sky/sky_anger.png',
+        'neutral': '../graphics/decoration/sky/sky_neutral.png'
+    }
+    
+    def get_sky_path(self):
+        """Path of the emotion-specific sky background."""
+        return self.SKY_FILES.get(self.emotion, self.SKY_FILES['neutral'])
+    
     def load_emotion_sky(self):
         """Load emotion-specific sky background."""
-        sky_files = {
-            'joy': '../graphics/decoration/sky/sky_joy.png',
-            'fear': '../graphics/decoration/sky/sky_fear.png', 
-            'anger': '../graphics/decoration/sky/sky_anger.png',
-            'neutral': '../graphics/decoration/sky/sky_neutral.png'
-        }
-        
-        sky_path = sky_files.get(self.emotion, sky_files['neutral'])
+        sky_path = self.get_sky_path()
         
         if os.path.exists(sky_path):
             sky_surface = pygame.image.load(sky_path).convert()
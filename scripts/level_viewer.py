@@ -8,23 +8,61 @@ Now includes coin collection, scoring, and win conditions.
 
 import pygame
 import os
+import random
+import threading
 from level_generator import EnhancedLevelGenerator
-from support import importCsvLayout, import_cut_graphics, import_folder
-from settings import tile_size, screen_width, screen_height, LEVEL_WIDTH, LEVEL_HEIGHT
+from support import importCsvLayout, center_in_tile
+from asset_loader import AssetLoader
+from asset_pack import get_asset_pack
+from settings import (tile_size, screen_width, screen_height, LEVEL_WIDTH, LEVEL_HEIGHT, EXPLOSION_SIZE,
+                      TILE_ANIMATION_FPS, COINS_NEEDED)
+from coins import CoinStore
+from enemies import EnemySystem
+from particles import ParticleSystem, PARTICLE_KINDS
 from player import Player
-from ml_agents import EmotionBrain
-from tts import EdgeTTSNarrator
+from solidity import SolidityMap
+from prompts import FALLBACK_NARRATIVES
 from ui_components import TextInputBox
 from audio_manager import get_audio_manager
+from profiling import get_startup_timer, get_frame_profiler
+
+class LevelSnapshot:
+    """
+    Initial state of a loaded level, taken once in load_level.
+    
+    Everything a restart needs is kept here or in the subsystems' own
+    immutable initial state (the coins in CoinStore.initial), so restarting
+    never reads the level files.
+    """
+    
+    def __init__(self, viewer):
+        self.player_spawn = tuple(viewer.player.spawn_position)
+        self.enemies = viewer.enemies.snapshot()
 
 class EmotionLevelViewer:
-    def __init__(self, level_number=0, levels_dir="generated_levels"):
+    def __init__(self, level_number=0, levels_dir="generated_levels", level_columns=LEVEL_WIDTH):
         self.level_number = level_number
         self.levels_dir = levels_dir
         self.emotion = 'neutral'
         self.narrative = "Welcome! Enter your experience above to begin your emotional journey."
         self.camera_x = 0
         self.camera_y = 0
+        # Camera before the last simulation step, drawing interpolates towards camera_x/y
+        self.previous_camera_x = 0
+        self.previous_camera_y = 0
+        self.view_x = 0
+        self.view_y = 0
+        # Bumped whenever a narrative stream should be abandoned
+        self.narrative_stream_id = 0
+        self.narrative_thread = None
+        self.level_seed = None
+        # Shared clock for every animated tile, in milliseconds of real time
+        self.animation_clock = 0
+        self.tile_animation_fps = TILE_ANIMATION_FPS
+        # Optional drawing, turned off by the QualityGovernor when frames run long
+        self.show_bg_palms = True
+        self.show_grass = True
+        self.show_captions = True
         
         # Game states
         self.state = 'input' 
@@ -36,45 +74,142 @@ class EmotionLevelViewer:
             prompt_text="Describe what happened in your day:"
         )
         
-        self.level_width = LEVEL_WIDTH * tile_size
+        self.level_columns = level_columns
+        self.level_width = level_columns * tile_size
         self.level_height = LEVEL_HEIGHT * tile_size
         
-        self.emotion_brain = EmotionBrain()
-        self.narrator = EdgeTTSNarrator()
+        # The AI and TTS subsystems are created on first use (or by warm_up)
+        self._emotion_brain = None
+        self._narrator = None
+        self.subsystem_lock = threading.Lock()
+        self.warm_up_thread = None
         
-        self.load_real_assets()
+        startup = get_startup_timer()
+        with startup.measure("assets"):
+            self.load_real_assets()
+        self.particles = ParticleSystem(self.assets['dust'])
         
-        self.generate_emotion_level()
+        with startup.measure("level generation"):
+            self.generate_emotion_level()
         
         print("Emotion Level Viewer initialized")
     
-    def process_user_experience(self, user_text):
-        """Process user's real-life experience and generate level."""
-        print(f"Processing user experience: '{user_text}'")
-        result = self.emotion_brain.process_user_input(user_text)
+    @property
+    def emotion_brain(self):
+        """Emotion brain, imported and created on first use."""
+        if self._emotion_brain is None:
+            with self.subsystem_lock:
+                if self._emotion_brain is None:
+                    with get_startup_timer().measure("emotion brain"):
+                        from ml_agents import EmotionBrain
+                        self._emotion_brain = EmotionBrain()
+        return self._emotion_brain
+    
+    @property
+    def narrator(self):
+        """TTS narrator, imported and created on first use."""
+        if self._narrator is None:
+            with self.subsystem_lock:
+                if self._narrator is None:
+                    with get_startup_timer().measure("narrator"):
+                        from tts import EdgeTTSNarrator
+                        self._narrator = EdgeTTSNarrator()
+        return self._narrator
+    
+    def is_narrating(self):
+        """Check narration without creating the narrator."""
+        return self._narrator is not None and self._narrator.is_speaking()
+    
+    def warm_up(self):
+        """Create the AI and TTS subsystems in the background once the first frame is up."""
+        if self.warm_up_thread is not None:
+            return
         
-        self.emotion = result['emotion']
-        self.narrative = result['narrative']
+        def run():
+            self.emotion_brain
+            self.presynthesize_fallback_narratives()
+            get_startup_timer().report("Background warm-up finished")
         
+        self.warm_up_thread = threading.Thread(target=run, name='warm-up', daemon=True)
+        self.warm_up_thread.start()
+    
+    def presynthesize_fallback_narratives(self):
+        """Warm the TTS cache with the fixed fallback narratives for every emotion voice."""
+        from ml_agents import split_sentences
+        for emotion, narrative in FALLBACK_NARRATIVES.items():
+            self.narrator.presynthesize(emotion, split_sentences(narrative))
+    
+    def process_user_experience(self, user_text, seed=None):
+        """Process user's real-life experience and generate level."""
+        print(f"Processing user experience: '{user_text}'")
+        self.emotion = self.emotion_brain.extract_emotion(user_text)
         print(f"Detected emotion: {self.emotion}")
-        print(f"Generated narrative: {self.narrative}")
         
-        print("Starting narrative generation...")
-        self.narrator.speak_narrative(self.narrative, self.emotion)
-        
-        self.generate_emotion_level()
+        self.generate_emotion_level(seed)
         
         audio = get_audio_manager()
         audio.play_background_music(self.emotion)
 
         self.state = 'playing'
         
-        return result
+        print("Starting narrative generation...")
+        self.start_narrative_stream(user_text)
+        
+        return {
+            'emotion': self.emotion,
+            'user_input': user_text,
+            'background_theme': self.emotion
+        }
     
-    def generate_emotion_level(self):
+    def start_narrative_stream(self, user_text):
+        """Stream the narrative in the background into the HUD caption and TTS."""
+        self.narrative_stream_id += 1
+        stream_id = self.narrative_stream_id
+        emotion = self.emotion
+        self.narrative = ""
+        self.narrator.begin_narration(emotion)
+        
+        def on_text(partial_narrative):
+            if stream_id == self.narrative_stream_id:
+                self.narrative = partial_narrative
+        
+        def on_sentence(sentence):
+            if stream_id == self.narrative_stream_id:
+                self.narrator.queue_sentence(sentence)
+        
+        def run():
+            narrative = self.emotion_brain.stream_narrative(
+                user_text, emotion, on_text=on_text, on_sentence=on_sentence
+            )
+            if stream_id == self.narrative_stream_id:
+                self.narrative = narrative
+        
+        self.narrative_thread = threading.Thread(target=run, daemon=True)
+        self.narrative_thread.start()
+    
+    def cancel_narrative_stream(self):
+        """Stop updating the caption and TTS from an in-flight narrative stream."""
+        self.narrative_stream_id += 1
+        # Also between sentences, when nothing plays but the next one may be synthesizing
+        if self._narrator is not None:
+            self._narrator.stop_speaking()
+    
+    def start_replay_level(self, emotion, seed):
+        """Rebuild a recorded level and start playing it without the AI or narration."""
+        self.cancel_narrative_stream()
+        self.emotion = emotion
+        self.generate_emotion_level(seed)
+        self.narrative = FALLBACK_NARRATIVES.get(emotion, "")
+        get_audio_manager().play_background_music(self.emotion)
+        self.state = 'playing'
+    
+    def generate_emotion_level(self, seed=None):
         """Generate level based on current emotion."""
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.level_seed = seed
         try:
-            generator = EnhancedLevelGenerator(self.emotion)
+            generator = EnhancedLevelGenerator(self.emotion, self.level_columns, seed)
             level_data = generator.generate_enhanced_level()
             generator.save_level_to_files(level_data, 0, self.levels_dir)
             self.load_level()
@@ -83,9 +218,17 @@ class EmotionLevelViewer:
             print(f"Error generating level: {e}")
     
     def load_emotion_sky(self):
-        """Load emotion-specific sky background."""
-        generator = EnhancedLevelGenerator(self.emotion)
-        sky_surface = generator.load_emotion_sky()
+        """Load emotion-specific sky background, from the asset pack when there is one."""
+        sky_surface = self.sky_cache.get(self.emotion)
+        if sky_surface is None:
+            pack = get_asset_pack()
+            if pack is not None and pack.has(f'sky_{self.emotion}'):
+                sky_surface = pack.get(f'sky_{self.emotion}')
+            if sky_surface is None:
+                generator = EnhancedLevelGenerator(self.emotion)
+                sky_surface = generator.load_emotion_sky()
+            if sky_surface:
+                self.sky_cache[self.emotion] = sky_surface
         
         if sky_surface:
             self.assets['sky'] = sky_surface
@@ -103,66 +246,117 @@ class EmotionLevelViewer:
             return False
     
     def load_real_assets(self):
-        """Load game assets."""
+        """Load game assets from the baked pack, or decode them in parallel behind a loading screen."""
         print("Loading game assets...")
         
-        self.assets = {}
-        
-        # Terrain tiles
-        terrain_path = '../graphics/terrain/terrain_tiles.png'
-        if os.path.exists(terrain_path):
-            self.assets['terrain'] = import_cut_graphics(terrain_path)
-            print(f"Loaded terrain tiles: {len(self.assets['terrain'])} tiles")
+        pack = get_asset_pack()
+        if pack is not None:
+            names = ['terrain', 'grass', 'coins', 'coin_gold', 'coin_silver', 'palm_small', 'palm_large', 'palm_bg', 'player_idle', 'goal',
+                     'enemy_run', 'explosion', 'dust_jump', 'dust_land', 'dust_run']
+            loaded = {name: pack.get(name) for name in names}
+            loaded['sky'] = pack.get(f'sky_{self.emotion}')
         else:
-            self.assets['terrain'] = None
+            loaded = self.decode_assets()
         
-        # Grass tiles  
-        grass_path = '../graphics/decoration/grass/grass.png'
-        if os.path.exists(grass_path):
-            self.assets['grass'] = import_cut_graphics(grass_path)
-            print(f"Loaded grass tiles: {len(self.assets['grass'])} tiles")
-        else:
-            self.assets['grass'] = None
+        self.store_loaded_assets(loaded)
+    
+    def decode_assets(self):
+        """Decode game images on a thread pool behind a loading screen."""
+        loader = AssetLoader()
+        loader.add_tileset('terrain', '../graphics/terrain/terrain_tiles.png')
+        loader.add_tileset('grass', '../graphics/decoration/grass/grass.png')
+        loader.add_tileset('coins', '../graphics/coins/coin_tiles.png')
+        loader.add_folder('coin_gold', '../graphics/coins/gold')
+        loader.add_folder('coin_silver', '../graphics/coins/silver')
+        loader.add_folder('palm_small', '../graphics/terrain/palm_small')
+        loader.add_folder('palm_large', '../graphics/terrain/palm_large')
+        loader.add_folder('palm_bg', '../graphics/terrain/palm_bg')
+        loader.add_folder('player_idle', '../graphics/character/idle')
+        loader.add_image('goal', '../graphics/character/hat.png')
+        loader.add_folder('enemy_run', '../graphics/enemy/run')
+        loader.add_folder('explosion', '../graphics/enemy/explosion', scale=EXPLOSION_SIZE)
+        for kind in PARTICLE_KINDS:
+            loader.add_folder(f'dust_{kind}', f'../graphics/character/dust_particles/{kind}')
+        loader.add_image('sky', EnhancedLevelGenerator(self.emotion).get_sky_path(),
+                         alpha=False, scale=(screen_width, screen_height))
+        
+        loaded = loader.load(on_progress=self.draw_loading_screen)
+        loader.report()
+        return loaded
+    
+    def store_loaded_assets(self, loaded):
+        """Arrange loaded assets into self.assets."""
+        self.assets = {}
         
-        # Coin tiles
-        coin_path = '../graphics/coins/coin_tiles.png'
-        if os.path.exists(coin_path):
-            self.assets['coins'] = import_cut_graphics(coin_path)
-            print(f"Loaded coin tiles: {len(self.assets['coins'])} tiles")
-        else:
-            self.assets['coins'] = None
+        for name in ('terrain', 'grass', 'coins'):
+            self.assets[name] = loaded[name]
+            if loaded[name] is not None:
+                print(f"Loaded {name} tiles: {len(loaded[name])} tiles")
         
         # Palm trees
         self.assets['palms'] = {}
-        
-        small_palm_path = '../graphics/terrain/palm_small'
-        if os.path.exists(small_palm_path):
-            self.assets['palms']['small'] = import_folder(small_palm_path)
-        
-        large_palm_path = '../graphics/terrain/palm_large'
-        if os.path.exists(large_palm_path):
-            self.assets['palms']['large'] = import_folder(large_palm_path)
-        
-        bg_palm_path = '../graphics/terrain/palm_bg'
-        if os.path.exists(bg_palm_path):
-            self.assets['palms']['bg'] = import_folder(bg_palm_path)
+        for size in ('small', 'large', 'bg'):
+            if os.path.exists(f'../graphics/terrain/palm_{size}'):
+                self.assets['palms'][size] = loaded[f'palm_{size}']
         
         # Player/Goal assets
         self.assets['player_goal'] = {}
-        
-        player_idle_path = '../graphics/character/idle'
-        if os.path.exists(player_idle_path):
-            player_frames = import_folder(player_idle_path)
-            if player_frames:
-                self.assets['player_goal']['player'] = player_frames[0]
-        
-        hat_path = '../graphics/character/hat.png'
-        if os.path.exists(hat_path):
-            self.assets['player_goal']['goal'] = pygame.image.load(hat_path).convert_alpha()
+        if loaded['player_idle']:
+            self.assets['player_goal']['player'] = loaded['player_idle'][0]
+        if loaded['goal'] is not None:
+            self.assets['player_goal']['goal'] = loaded['goal']
+        
+        # Enemies
+        self.assets['enemy'] = {'run': loaded['enemy_run'], 'explosion': loaded['explosion']}
+        
+        # Dust particles
+        self.assets['dust'] = {kind: loaded[f'dust_{kind}'] for kind in PARTICLE_KINDS}
+        
+        # Frame sequences of animated tiles, by (layer, tile id). Coin frames are
+        # smaller than a tile so they are centred once here rather than per draw.
+        animations = {
+            ('coins', '16'): [center_in_tile(frame) for frame in loaded['coin_gold'] or []],
+            ('coins', '17'): [center_in_tile(frame) for frame in loaded['coin_silver'] or []],
+            ('fg_palms', '23'): self.assets['palms'].get('small'),
+            ('fg_palms', '24'): self.assets['palms'].get('large'),
+            ('bg_palms', '25'): self.assets['palms'].get('bg')
+        }
+        self.tile_animations = {key: frames for key, frames in animations.items() if frames}
+        self.animated_tile_frames = {}
+        self.advance_tile_animations()
+        
+        # Skies for other emotions are loaded and cached when first needed
+        self.sky_cache = {}
+        if loaded['sky'] is not None:
+            self.sky_cache[self.emotion] = loaded['sky']
         
         # Load sky for current emotion
         self.load_emotion_sky()
     
+    def draw_loading_screen(self, loaded, total, name):
+        """Draw asset loading progress."""
+        surface = pygame.display.get_surface()
+        if surface is None:
+            return
+        pygame.event.pump()
+        
+        surface.fill((0, 0, 0))
+        font = pygame.font.Font("../graphics/ui/ARCADEPI.TTF", 36)
+        title_text = font.render("Loading...", True, (255, 255, 255))
+        surface.blit(title_text, title_text.get_rect(center=(screen_width // 2, screen_height // 2 - 40)))
+        
+        bar_rect = pygame.Rect(screen_width // 2 - 200, screen_height // 2, 400, 24)
+        fill_rect = bar_rect.copy()
+        fill_rect.width = int(bar_rect.width * loaded / max(1, total))
+        pygame.draw.rect(surface, (255, 215, 0), fill_rect)
+        pygame.draw.rect(surface, (255, 255, 255), bar_rect, 2)
+        
+        if name:
+            small_font = pygame.font.Font("../graphics/ui/ARCADEPI.TTF", 20)
+            name_text = small_font.render(f"{name} ({loaded}/{total})", True, (150, 150, 150))
+            surface.blit(name_text, name_text.get_rect(center=(screen_width // 2, screen_height // 2 + 50)))
+        pygame.display.flip()
+    
     def load_level(self):
         """Load level CSV data."""
         level_dir = os.path.join(self.levels_dir, str(self.level_number))
@@ -173,9 +367,16 @@ class EmotionLevelViewer:
         self.fg_palms_layout = importCsvLayout(os.path.join(level_dir, f"level_{self.level_number}_fg_palms.csv"))
         self.bg_palms_layout = importCsvLayout(os.path.join(level_dir, f"level_{self.level_number}_bg_palms.csv"))
         self.grass_layout = importCsvLayout(os.path.join(level_dir, f"level_{self.level_number}_grass.csv"))
+        self.enemies_layout = importCsvLayout(os.path.join(level_dir, f"level_{self.level_number}_enemies.csv"))
+        self.constraints_layout = importCsvLayout(os.path.join(level_dir, f"level_{self.level_number}_constraints.csv"))
         
+        self.solidity = SolidityMap(self.terrain_layout)
+        self.coin_store = CoinStore(self.coins_layout)
+        self.particles.clear()
         self.spawn_player()
+        self.spawn_enemies()
         self.load_emotion_sky()  
+        self.level_snapshot = LevelSnapshot(self)
         
         print("Level data loaded")
 
@@ -186,29 +387,46 @@ class EmotionLevelViewer:
                 if cell == '27':
                     x = col_idx * tile_size
                     y = row_idx * tile_size
-                    self.player = Player((x, y), self.emotion)  
+                    self.player = Player((x, y), self.emotion, self.particles)  
                     self.player.reset_game_state()  
                     return
         # Fallback spawn position if no spawn tile found
-        self.player = Player((tile_size, tile_size), self.emotion)  
+        self.player = Player((tile_size, tile_size), self.emotion, self.particles)  
         self.player.reset_game_state()
 
+    def restart_level(self):
+        """Reset coins, enemies and the player from the level snapshot, without touching the disk."""
+        self.coin_store.reset()
+        self.enemies.restore(self.level_snapshot.enemies)
+        self.particles.clear()
+        self.player.spawn_position = self.level_snapshot.player_spawn
+        self.player.restart()
+    
+    def spawn_enemies(self):
+        """Create the enemy system for the current level and emotion."""
+        self.enemies = EnemySystem(self.assets['enemy']['run'], self.assets['enemy']['explosion'], self.emotion)
+        self.enemies.load_layouts(self.enemies_layout, self.constraints_layout)
+    
+    def check_enemy_collisions(self):
+        """Stomp enemies landed on from above, die when touching one otherwise."""
+        if not hasattr(self, 'player') or self.player.is_dead or self.player.has_won:
+            return
+        
+        stomped, hit = self.enemies.check_player(self.player.rect, self.player.direction.y > 0)
+        if stomped:
+            self.player.bounce()
+            get_audio_manager().play_stomp()
+        elif hit:
+            self.player.die()
+    
     def check_coin_collisions(self):
-        """Check for coin collection."""
+        """Collect every coin the player's rect passed over during the last step."""
         if not hasattr(self, 'player') or self.player.is_dead or self.player.has_won:
             return
-            
-        player_tile_x = self.player.rect.centerx // tile_size
-        player_tile_y = self.player.rect.centery // tile_size
         
-        # Check if player is on a coin tile
-        if (0 <= player_tile_y < len(self.coins_layout) and 
-            0 <= player_tile_x < len(self.coins_layout[player_tile_y])):
-            
-            if self.coins_layout[player_tile_y][player_tile_x] == '16':
-                # Collect the coin
-                self.coins_layout[player_tile_y][player_tile_x] = '0'
-                self.player.collect_coin()
+        swept_from = pygame.Rect(self.player.previous_position, self.player.rect.size)
+        for _ in range(self.coin_store.collect_swept(swept_from, self.player.rect)):
+            self.player.collect_coin()
 
     def check_goal_collision(self):
         """Check if player reached the goal."""
@@ -227,11 +445,21 @@ class EmotionLevelViewer:
                 if self.player.check_win_condition():
                     print("Level completed!")
     
+    def advance_tile_animations(self):
+        """Pick the current frame of every animated tile id from the shared clock, once per frame."""
+        tick = int(self.animation_clock * self.tile_animation_fps // 1000)
+        for key, frames in self.tile_animations.items():
+            self.animated_tile_frames[key] = frames[tick % len(frames)]
+    
     def get_sprite_for_tile(self, layer_type, tile_value):
         """Get sprite for a tile."""
         if str(tile_value) == '0':
             return None
         
+        animated = self.animated_tile_frames.get((layer_type, tile_value))
+        if animated is not None:
+            return animated
+        
         try:
             tile_val = int(tile_value)
             
@@ -271,10 +499,10 @@ class EmotionLevelViewer:
     
     def draw_layer_with_real_sprites(self, surface, layout, layer_type):
         """Draw layer using real sprites."""
-        start_x = max(0, int(self.camera_x // tile_size))
-        end_x = min(LEVEL_WIDTH, int((self.camera_x + screen_width) // tile_size + 1))
-        start_y = max(0, int(self.camera_y // tile_size))
-        end_y = min(LEVEL_HEIGHT, int((self.camera_y + screen_height) // tile_size + 1))
+        start_x = max(0, int(self.view_x // tile_size))
+        end_x = min(self.level_columns, int((self.view_x + screen_width) // tile_size + 1))
+        start_y = max(0, int(self.view_y // tile_size))
+        end_y = min(LEVEL_HEIGHT, int((self.view_y + screen_height) // tile_size + 1))
         
         for row in range(start_y, end_y):
             for col in range(start_x, end_x):
@@ -283,8 +511,8 @@ class EmotionLevelViewer:
                     sprite = self.get_sprite_for_tile(layer_type, tile_value)
                     
                     if sprite:
-                        screen_x = (col * tile_size) - self.camera_x
-                        screen_y = (row * tile_size) - self.camera_y
+                        screen_x = (col * tile_size) - self.view_x
+                        screen_y = (row * tile_size) - self.view_y
                         surface.blit(sprite, (screen_x, screen_y))
     
     def get_emotion_fallback_colors(self):
@@ -359,7 +587,7 @@ class EmotionLevelViewer:
         # Instructions
         instruction_font = pygame.font.Font("../graphics/ui/ARCADEPI.TTF", 20)
         instructions = [
-            "Objective: Collect 5 coins and reach the pirate hat to win!",
+            f"Objective: Collect {COINS_NEEDED} coins and reach the pirate hat to win!",
             "Press ENTER to generate your emotional journey",
             "Examples: 'I got promoted!', 'Traffic was terrible', 'I'm nervous about tomorrow'"
         ]
@@ -402,46 +630,94 @@ class EmotionLevelViewer:
         ]
         
         # Show narration status
-        if self.narrator.is_speaking():
+        if self.is_narrating():
             controls.insert(2, "Status: Playing narration...")
-        elif hasattr(self.narrator, 'is_generating') and self.narrator.is_generating:
+        elif self._narrator is not None and self._narrator.is_generating:
             controls.insert(2, "Status: Generating speech...")
         
         for i, control in enumerate(controls):
             text = font_small.render(control, True, (255, 255, 255))
             surface.blit(text, (10, screen_height - 155 + i * 22))
+        
+        if self.show_captions:
+            self.draw_narrative_caption(surface)
     
-    def draw(self, surface):
-        """Draw the complete game scene."""
-        self.draw_background(surface)
+    def draw_narrative_caption(self, surface):
+        """Draw the (possibly still streaming) narrative as a caption."""
+        if not self.narrative:
+            return
+        
+        caption_font = pygame.font.Font("../graphics/ui/ARCADEPI.TTF", 22)
+        max_width = screen_width // 2 - 20
+        lines = []
+        line = ""
+        for word in self.narrative.split():
+            candidate = f"{line} {word}".strip()
+            if caption_font.size(candidate)[0] > max_width and line:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        if line:
+            lines.append(line)
+        
+        for i, caption_line in enumerate(lines):
+            text = caption_font.render(caption_line, True, (255, 255, 255))
+            surface.blit(text, (screen_width - max_width - 10, 10 + i * 24))
+    
+    def draw(self, surface, alpha=1.0):
+        """
+        Draw the complete game scene.
+        
+        alpha is how far the render time is between the last two simulation
+        steps; the camera and player are drawn interpolated by it.
+        """
+        profiler = get_frame_profiler()
+        self.view_x = self.previous_camera_x + (self.camera_x - self.previous_camera_x) * alpha
+        self.view_y = self.previous_camera_y + (self.camera_y - self.previous_camera_y) * alpha
+        with profiler.section('draw.background'):
+            self.draw_background(surface)
         
         if self.state == 'input':
-            self.draw_input_screen(surface)
+            with profiler.section('draw.input_screen'):
+                self.draw_input_screen(surface)
         else:  # playing state
-            self.draw_layer_with_real_sprites(surface, self.bg_palms_layout, 'bg_palms')
-            self.draw_layer_with_real_sprites(surface, self.terrain_layout, 'terrain')
-            self.draw_layer_with_real_sprites(surface, self.grass_layout, 'grass')
-            self.draw_layer_with_real_sprites(surface, self.coins_layout, 'coins')
-            self.draw_layer_with_real_sprites(surface, self.fg_palms_layout, 'fg_palms')
+            self.advance_tile_animations()
+            if self.show_bg_palms:
+                with profiler.section('draw.bg_palms'):
+                    self.draw_layer_with_real_sprites(surface, self.bg_palms_layout, 'bg_palms')
+            with profiler.section('draw.terrain'):
+                self.draw_layer_with_real_sprites(surface, self.terrain_layout, 'terrain')
+            if self.show_grass:
+                with profiler.section('draw.grass'):
+                    self.draw_layer_with_real_sprites(surface, self.grass_layout, 'grass')
+            with profiler.section('draw.coins'):
+                self.draw_layer_with_real_sprites(surface, self.coins_layout, 'coins')
+            with profiler.section('draw.enemies'):
+                self.enemies.draw(surface, self.view_x, self.view_y, alpha)
+            with profiler.section('draw.fg_palms'):
+                self.draw_layer_with_real_sprites(surface, self.fg_palms_layout, 'fg_palms')
+
+            with profiler.section('draw.particles'):
+                self.particles.draw(surface, self.view_x, self.view_y)
 
             # Player
-            if hasattr(self, "player"):
-                self.player.update(self.terrain_layout)
-                if not self.player.is_dead:
-                    player_screen_x = self.player.rect.x - self.camera_x
-                    player_screen_y = self.player.rect.y - self.camera_y
-                    surface.blit(self.player.image, (player_screen_x, player_screen_y))
+            if hasattr(self, "player") and not self.player.is_dead:
+                player_x, player_y = self.player.render_position(alpha)
+                surface.blit(self.player.image, (player_x - self.view_x, player_y - self.view_y))
 
-            self.draw_layer_with_real_sprites(surface, self.player_layout, 'player')
-            self.draw_playing_ui(surface)
+            with profiler.section('draw.goal'):
+                self.draw_layer_with_real_sprites(surface, self.player_layout, 'player')
+            with profiler.section('draw.hud'):
+                self.draw_playing_ui(surface)
             
             # Death screen
             if hasattr(self, "player") and self.player.is_dead:
-                self.player.draw_death_screen(surface, self.camera_x, self.camera_y)
+                self.player.draw_death_screen(surface, self.view_x, self.view_y)
             
             # Win screen
             if hasattr(self, "player") and self.player.has_won:
-                self.player.draw_win_screen(surface, self.camera_x, self.camera_y)
+                self.player.draw_win_screen(surface, self.view_x, self.view_y)
     
     def handle_event(self, event):
         """Handle game events."""
@@ -461,34 +737,49 @@ class EmotionLevelViewer:
                     if hasattr(self, 'player') and (self.player.is_dead or self.player.has_won):
                         if self.player.has_won:
                             # Go back to input for new experience
-                            if self.narrator.is_speaking():
-                                self.narrator.stop_speaking()
+                            self.cancel_narrative_stream()
                             audio.stop_background_music()
                             self.state = 'input'
                             print("Switched to input mode for new experience")
                         else:
-                            # Reload level to reset coins and respawn player
-                            self.load_level()
+                            # Reset coins and respawn player from the level snapshot
+                            self.restart_level()
                             audio.play_background_music(self.emotion)
 
-                            print("Level reloaded and player respawned")
+                            print("Level restarted and player respawned")
                     else:
                         # Stop current narration and go back to input
-                        if self.narrator.is_speaking():
-                            self.narrator.stop_speaking()
+                        self.cancel_narrative_stream()
                         self.state = 'input'
                         print("Switched to input mode")
                 elif event.key == pygame.K_s:
-                    # Skip/stop narration
-                    if self.narrator.is_speaking():
-                        self.narrator.stop_speaking()
-                        print("Narration stopped")
+                    # Skip/stop narration, including sentences still to come from the stream
+                    self.cancel_narrative_stream()
+                    print("Narration stopped")
     
     def update(self, dt):
-        """Update game state."""
+        """Per-frame updates that follow real time rather than the simulation."""
+        self.animation_clock += dt
         if self.state == 'input':
             self.input_box.update(dt)
-        elif self.state == 'playing':
+    
+    def step(self, keys):
+        """Advance the simulation by one fixed timestep with this step's key state."""
+        self.previous_camera_x = self.camera_x
+        self.previous_camera_y = self.camera_y
+        self.update_camera(keys)
+        
+        if self.state == 'playing':
             # Check game interactions
-            self.check_coin_collisions()
             self.check_goal_collision()
+            
+            if hasattr(self, "player"):
+                self.player.update(self.solidity, keys)
+            self.check_coin_collisions()
+            
+            with get_frame_profiler().section('particles'):
+                self.particles.update()
+            
+            with get_frame_profiler().section('enemies'):
+                self.enemies.update()
+                self.check_enemy_collisions()
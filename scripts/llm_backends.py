@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Pluggable LLM backends for the Emotion Brain.
+=============================================
+EmotionBrain talks to a backend instead of a hard-wired OpenAI client:
+
+- OpenAIBackend: OpenAI-compatible chat API over one pooled HTTP client
+- StubBackend: offline stand-in with configurable latency and error injection
+- StubServer: the stub served as a local OpenAI-compatible HTTP endpoint,
+  so the full HTTP path can be load-tested without a network
+
+Every backend shares the same retry and hedging policy.
+
+Usage:
+    python llm_backends.py serve --port 8765 --latency 0.3 --error-rate 0.05
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prompts import EMOTION_CLASSIFIER_SYSTEM_PROMPT, FALLBACK_NARRATIVES
+
+
+class LLMBackendError(Exception):
+    """Error raised by a backend, carrying the HTTP-style status code."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def get_status_code(error):
+    """HTTP status code of an API error, if it has one."""
+    return getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+
+
+def is_rate_limit_error(error):
+    """Check whether an API error means we are being rate limited."""
+    return get_status_code(error) == 429 or type(error).__name__ == 'RateLimitError'
+
+
+def is_retryable_error(error):
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying."""
+    status = get_status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in ('APITimeoutError', 'APIConnectionError', 'TimeoutError', 'ConnectionError')
+
+
+class RetryPolicy:
+    """
+    How a backend retries failed requests and hedges slow ones.
+
+    hedge_after: seconds to wait for a non-streaming request before firing a
+    duplicate and taking whichever answers first (None disables hedging).
+    """
+
+    def __init__(self, max_retries=2, base_delay=0.5, max_delay=8.0, hedge_after=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+
+    def delay_for(self, attempt):
+        """Jittered exponential backoff before retry number `attempt` (1-based)."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+
+class LLMBackend(ABC):
+    """
+    Base class for chat backends.
+
+    Subclasses implement _complete() and _stream(), or cannot be created;
+    callers use complete() and stream(), which add the retry and hedging
+    policy on top.
+    """
+
+    name = 'base'
+
+    def __init__(self, retry_policy=None):
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._hedge_pool = None
+
+    @abstractmethod
+    def _complete(self, messages, model, max_tokens, temperature):
+        """Return the full completion text of one attempt."""
+
+    @abstractmethod
+    def _stream(self, messages, model, max_tokens, temperature):
+        """Yield the completion text of one attempt as it arrives."""
+
+    def complete(self, messages, model="gpt-3.5-turbo", max_tokens=120, temperature=0.8):
+        """Return the full completion text."""
+        attempt = 0
+        while True:
+            try:
+                return self._complete_hedged(messages, model, max_tokens, temperature)
+            except Exception as e:
+                attempt += 1
+                if attempt > self.retry_policy.max_retries or not is_retryable_error(e):
+                    raise
+                time.sleep(self.retry_policy.delay_for(attempt))
+
+    def stream(self, messages, model="gpt-3.5-turbo", max_tokens=120, temperature=0.8):
+        """Yield completion text as it arrives. Retries only before the first token."""
+        attempt = 0
+        while True:
+            received = False
+            try:
+                for token in self._stream(messages, model, max_tokens, temperature):
+                    received = True
+                    yield token
+                return
+            except Exception as e:
+                attempt += 1
+                if received or attempt > self.retry_policy.max_retries or not is_retryable_error(e):
+                    raise
+                time.sleep(self.retry_policy.delay_for(attempt))
+
+    def _complete_hedged(self, messages, model, max_tokens, temperature):
+        hedge_after = self.retry_policy.hedge_after
+        if hedge_after is None:
+            return self._complete(messages, model, max_tokens, temperature)
+
+        if self._hedge_pool is None:
+            self._hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='llm-hedge')
+        args = (messages, model, max_tokens, temperature)
+        futures = {self._hedge_pool.submit(self._complete, *args)}
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            futures.add(self._hedge_pool.submit(self._complete, *args))
+
+        error = None
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+        raise error
+
+    def close(self):
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+            self._hedge_pool = None
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI (or any OpenAI-compatible server) over a single pooled HTTP client."""
+
+    name = 'openai'
+
+    def __init__(self, api_key, base_url=None, timeout=20.0, connect_timeout=5.0,
+                 max_connections=16, retry_policy=None):
+        super().__init__(retry_policy)
+        import httpx
+        from openai import OpenAI
+
+        # One keep-alive pool for every request instead of a handshake per call
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout)
+        )
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            max_retries=0,  # RetryPolicy handles retries
+            http_client=self.http_client
+        )
+
+    def _complete(self, messages, model, max_tokens, temperature):
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return response.choices[0].message.content
+
+    def _stream(self, messages, model, max_tokens, temperature):
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def close(self):
+        super().close()
+        self.http_client.close()
+
+
+class StubBackend(LLMBackend):
+    """
+    Offline stand-in for the chat API.
+
+    Classifies emotions with keywords and narrates with FALLBACK_NARRATIVES.
+    latency/jitter are seconds per request, token_delay seconds per streamed
+    token, and error_rate the chance of failing with a random error_status.
+    """
+
+    name = 'stub'
+
+    EMOTION_KEYWORDS = {
+        'joy': ('promot', 'happy', 'great', 'love', 'won', 'success', 'beautiful', 'excited', 'fun'),
+        'fear': ('nervous', 'anxious', 'worr', 'scared', 'afraid', 'interview', 'strange', 'stress'),
+        'anger': ('angry', 'traffic', 'unfair', 'hate', 'furious', 'broken', 'annoy', 'rude')
+    }
+
+    def __init__(self, latency=0.0, jitter=0.0, token_delay=0.0, error_rate=0.0,
+                 error_statuses=(429, 500, 503), seed=None, retry_policy=None):
+        super().__init__(retry_policy)
+        self.latency = latency
+        self.jitter = jitter
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def _simulate_request(self):
+        with self.lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            fail = self.random.random() < self.error_rate
+            status = self.random.choice(self.error_statuses) if fail else None
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise LLMBackendError(f"Injected stub error {status}", status_code=status)
+
+    def classify(self, text):
+        text = text.lower()
+        for emotion, keywords in self.EMOTION_KEYWORDS.items():
+            if any(keyword in text for keyword in keywords):
+                return emotion
+        return 'neutral'
+
+    def respond(self, messages):
+        """Produce the stub's answer for a chat request."""
+        system = next((m['content'] for m in messages if m['role'] == 'system'), '')
+        prompt = next((m['content'] for m in reversed(messages) if m['role'] == 'user'), '')
+        experience = re.search(r'(?:experience|EXPERIENCE): "(.*?)"', prompt, re.DOTALL)
+        user_text = experience.group(1) if experience else prompt
+
+        if system == EMOTION_CLASSIFIER_SYSTEM_PROMPT:
+            return self.classify(user_text)
+
+        tone = re.search(r'Match the (\w+) emotional tone', prompt)
+        emotion = tone.group(1) if tone and tone.group(1) in FALLBACK_NARRATIVES else self.classify(user_text)
+        return FALLBACK_NARRATIVES[emotion]
+
+    def _complete(self, messages, model, max_tokens, temperature):
+        self._simulate_request()
+        return self.respond(messages)
+
+    def _stream(self, messages, model, max_tokens, temperature):
+        self._simulate_request()
+        for token in re.findall(r'\S+\s*', self.respond(messages)):
+            if self.token_delay > 0:
+                time.sleep(self.token_delay)
+            yield token
+
+
+class StubServer:
+    """Serve a StubBackend as a local OpenAI-compatible /v1/chat/completions endpoint."""
+
+    def __init__(self, backend=None, host='127.0.0.1', port=0):
+        self.backend = backend or StubBackend()
+        # Errors are injected per request, so the server side never retries
+        self.backend.retry_policy = RetryPolicy(max_retries=0)
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _make_handler(self):
+        backend = self.backend
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self._send_json(404, {'error': {'message': 'not found'}})
+                    return
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                messages = request.get('messages', [])
+                model = request.get('model', 'stub')
+                created = int(time.time())
+
+                if not request.get('stream'):
+                    try:
+                        content = backend.complete(messages, model)
+                    except LLMBackendError as e:
+                        self._send_json(e.status_code or 500, {'error': {'message': str(e)}})
+                        return
+                    self._send_json(200, {
+                        'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': created,
+                        'model': model,
+                        'choices': [{'index': 0, 'finish_reason': 'stop',
+                                     'message': {'role': 'assistant', 'content': content}}]
+                    })
+                    return
+
+                tokens = backend.stream(messages, model)
+                try:
+                    first = next(tokens, None)
+                except LLMBackendError as e:
+                    self._send_json(e.status_code or 500, {'error': {'message': str(e)}})
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                def send_event(delta, finish_reason=None):
+                    payload = {
+                        'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk', 'created': created,
+                        'model': model,
+                        'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+                    }
+                    self._write_chunk(f"data: {json.dumps(payload)}\n\n")
+
+                if first is not None:
+                    send_event({'role': 'assistant', 'content': first})
+                for token in tokens:
+                    send_event({'content': token})
+                send_event({}, 'stop')
+                self._write_chunk("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, text):
+                data = text.encode('utf-8')
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def start(self):
+        """Serve in a background thread and return the base URL."""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"Stub LLM server listening on {self.base_url}")
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def create_backend(api_key=None):
+    """
+    Build the backend selected by the environment.
+
+    LLM_BACKEND=openai|stub picks one explicitly and LLM_BASE_URL points the
+    OpenAI backend at another OpenAI-compatible server. Without an API key
+    the stub is used so the game still starts offline.
+    """
+    kind = os.getenv('LLM_BACKEND', '').lower()
+    api_key = api_key or os.getenv('OPENAI_API_KEY')
+    base_url = os.getenv('LLM_BASE_URL') or None
+    hedge_after = os.getenv('LLM_HEDGE_AFTER')
+    retry_policy = RetryPolicy(hedge_after=float(hedge_after) if hedge_after else None)
+
+    if kind == 'stub' or (not kind and not api_key and not base_url):
+        if kind != 'stub':
+            print("OpenAI API key not found, using offline stub backend")
+        return StubBackend(
+            latency=float(os.getenv('LLM_STUB_LATENCY', 0)),
+            token_delay=float(os.getenv('LLM_STUB_TOKEN_DELAY', 0)),
+            error_rate=float(os.getenv('LLM_STUB_ERROR_RATE', 0)),
+            retry_policy=retry_policy
+        )
+
+    # Local OpenAI-compatible servers accept any key
+    return OpenAIBackend(api_key or 'local', base_url=base_url, retry_policy=retry_policy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline stub LLM as an OpenAI-compatible server.")
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds per request")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random seconds per request")
+    parser.add_argument('--token-delay', type=float, default=0.0, help="seconds per streamed token")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="chance of an injected error")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    backend = StubBackend(args.latency, args.jitter, args.token_delay, args.error_rate, seed=args.seed)
+    server = StubServer(backend, args.host, args.port)
+    print(f"Point the game at it with LLM_BASE_URL={server.base_url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 """
-Clean OpenAI-based emotion detection and narrative generation system.
+Clean LLM-based emotion detection and narrative generation system.
 """
 
-import os
-from openai import OpenAI
+import re
+from llm_backends import create_backend
 from prompts import (
     MOOD_ATMOSPHERES, 
     EMOTION_CLASSIFIER_SYSTEM_PROMPT,
@@ -13,26 +13,62 @@ from prompts import (
     FALLBACK_NARRATIVES
 )
 
+SENTENCE_END_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+
+def clean_narrative_text(text, strip=True):
+    """Remove quotes and markdown emphasis the model likes to add."""
+    text = text.replace('"', '').replace('*', '')
+    return text.strip() if strip else text
+
+
+def split_sentences(text):
+    """Split a finished narrative into sentences."""
+    return [sentence.strip() for sentence in SENTENCE_END_PATTERN.split(text) if sentence.strip()]
+
+
+class SentenceSplitter:
+    """Incrementally cut streamed text into complete sentences."""
+    
+    def __init__(self):
+        self.buffer = ''
+    
+    def feed(self, text):
+        """Add streamed text and return any sentences it completed."""
+        self.buffer += text
+        parts = SENTENCE_END_PATTERN.split(self.buffer)
+        # The last part is still being written
+        self.buffer = parts.pop()
+        return [part.strip() for part in parts if part.strip()]
+    
+    def flush(self):
+        """Return whatever is left once the stream has ended."""
+        remainder = self.buffer.strip()
+        self.buffer = ''
+        return [remainder] if remainder else []
+
+
 class EmotionBrain:
-    def __init__(self, api_key=None):
-        # Get API key from environment variable or parameter
-        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
-        
-        if not self.api_key:
-            raise ValueError(
-                "OpenAI API key not found. Please set the OPENAI_API_KEY environment variable "
-                "or pass the api_key parameter to EmotionBrain()"
-            )
+    def __init__(self, api_key=None, backend=None):
+        """
+        Use the given LLM backend, or build one from the environment.
         
-        self.client = OpenAI(api_key=self.api_key)
-        print("Emotion Brain initialized with API key from environment")
+        Without an OpenAI API key the offline stub backend is used, so the
+        game can start without a network.
+        """
+        self.backend = backend or create_backend(api_key)
+        print(f"Emotion Brain initialized with {self.backend.name} backend")
     
-    def extract_emotion(self, user_text, model="gpt-3.5-turbo"):
-        """Extract primary emotion from user's real-life experience."""
+    def extract_emotion(self, user_text, model="gpt-3.5-turbo", strict=False):
+        """
+        Extract primary emotion from user's real-life experience.
+        
+        With strict=True API errors are raised instead of falling back to neutral.
+        """
         prompt = EMOTION_EXTRACTION_PROMPT.format(user_text=user_text)
         
         try:
-            response = self.client.chat.completions.create(
+            response = self.backend.complete(
                 model=model,
                 messages=[
                     {"role": "system", "content": EMOTION_CLASSIFIER_SYSTEM_PROMPT},
@@ -42,7 +78,7 @@ class EmotionBrain:
                 temperature=0.1
             )
             
-            emotion = response.choices[0].message.content.strip().lower()
+            emotion = response.strip().lower()
             
             if emotion not in ['joy', 'fear', 'anger', 'neutral']:
                 emotion = 'neutral'
@@ -51,14 +87,16 @@ class EmotionBrain:
             return emotion
             
         except Exception as e:
+            if strict:
+                raise
             print(f"Emotion extraction error: {e}")
             return 'neutral'
     
-    def generate_narrative(self, user_text, emotion, model="gpt-3.5-turbo"):
-        """Generate an immersive narrative for the red fox character."""
+    def _build_narrative_prompt(self, user_text, emotion):
+        """Fill the narrative prompt template for the given emotion."""
         atmosphere = MOOD_ATMOSPHERES.get(emotion, MOOD_ATMOSPHERES['neutral'])
         
-        prompt = NARRATIVE_GENERATION_PROMPT.format(
+        return NARRATIVE_GENERATION_PROMPT.format(
             setting=atmosphere['setting'],
             ambience=atmosphere['ambience'],
             user_text=user_text,
@@ -68,9 +106,17 @@ class EmotionBrain:
             anger_adjectives=', '.join(MOOD_ATMOSPHERES['anger']['mood_adjectives'][:3]),
             neutral_adjectives=', '.join(MOOD_ATMOSPHERES['neutral']['mood_adjectives'][:3])
         )
+    
+    def generate_narrative(self, user_text, emotion, model="gpt-3.5-turbo", strict=False):
+        """
+        Generate an immersive narrative for the red fox character.
+        
+        With strict=True API errors are raised instead of using the fallback narrative.
+        """
+        prompt = self._build_narrative_prompt(user_text, emotion)
         
         try:
-            response = self.client.chat.completions.create(
+            response = self.backend.complete(
                 model=model,
                 messages=[
                     {"role": "system", "content": NARRATIVE_GENERATOR_SYSTEM_PROMPT},
@@ -80,27 +126,98 @@ class EmotionBrain:
                 temperature=0.8
             )
             
-            narrative = response.choices[0].message.content.strip()
-            narrative = narrative.replace('"', '').replace('*', '').strip()
+            narrative = response.strip()
+            narrative = clean_narrative_text(narrative)
             
             print(f"Generated narrative: {narrative}")
             return narrative
             
         except Exception as e:
+            if strict:
+                raise
             print(f"Narrative generation error: {e}")
             return self._get_fallback_narrative(user_text, emotion)
     
+    def stream_narrative(self, user_text, emotion, on_text=None, on_sentence=None,
+                         model="gpt-3.5-turbo"):
+        """
+        Stream the narrative token by token.
+        
+        on_text(partial_narrative) is called after every token and
+        on_sentence(sentence) as soon as each sentence is complete, so the
+        HUD and TTS can start before the full response has arrived.
+        Returns the complete narrative.
+        """
+        prompt = self._build_narrative_prompt(user_text, emotion)
+        splitter = SentenceSplitter()
+        narrative = ''
+        
+        try:
+            stream = self.backend.stream(
+                model=model,
+                messages=[
+                    {"role": "system", "content": NARRATIVE_GENERATOR_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=120,
+                temperature=0.8
+            )
+            
+            for chunk in stream:
+                token = clean_narrative_text(chunk, strip=False)
+                if not token:
+                    continue
+                
+                narrative += token
+                if on_text:
+                    on_text(narrative.lstrip())
+                for sentence in splitter.feed(token):
+                    if on_sentence:
+                        on_sentence(sentence)
+            
+            for sentence in splitter.flush():
+                if on_sentence:
+                    on_sentence(sentence)
+            
+            narrative = narrative.strip()
+            if not narrative:
+                raise ValueError("empty narrative stream")
+            
+            print(f"Generated narrative: {narrative}")
+            return narrative
+            
+        except Exception as e:
+            print(f"Narrative streaming error: {e}")
+            if narrative.strip():
+                # Keep whatever already reached the player, just finish the last sentence
+                for sentence in splitter.flush():
+                    if on_sentence:
+                        on_sentence(sentence)
+                return narrative.strip()
+            
+            narrative = self._get_fallback_narrative(user_text, emotion)
+            if on_text:
+                on_text(narrative)
+            if on_sentence:
+                for sentence in split_sentences(narrative):
+                    on_sentence(sentence)
+            return narrative
+    
     def _get_fallback_narrative(self, user_text, emotion):
         """Get fallback narrative if API fails."""
         template = FALLBACK_NARRATIVES.get(emotion, FALLBACK_NARRATIVES['neutral'])
         return template.format(user_text=user_text.lower())
     
-    def process_user_input(self, user_text, model="gpt-3.5-turbo"):
+    def process_user_input(self, user_text, model="gpt-3.5-turbo", on_text=None, on_sentence=None,
+                           strict=False):
         """Main function: Transform user experience into game data."""
         print(f"Processing: '{user_text}'")
         
-        emotion = self.extract_emotion(user_text, model)
-        narrative = self.generate_narrative(user_text, emotion, model)
+        emotion = self.extract_emotion(user_text, model, strict=strict)
+        if on_text or on_sentence:
+            narrative = self.stream_narrative(user_text, emotion, on_text, on_sentence, model)
+        else:
+            narrative = self.generate_narrative(user_text, emotion, model, strict=strict)
         
         result = {
             'emotion': emotion,
@@ -0,0 +1,100 @@
+"""
+Particle System
+===============
+Dust puffs from the player's jumps, landings and running steps.
+
+Particles live in a fixed pool of parallel numpy arrays sized once at
+startup. Emitting writes into the next slot of the ring, overwriting the
+oldest particle when the pool is full, and a step advances every
+particle with whole-array operations into preallocated buffers, so the
+frame loop never creates particle objects or grows the pool. Live
+particles are drawn with one surface.blits() call.
+"""
+
+import numpy as np
+import pygame
+from settings import screen_width, screen_height, PARTICLE_CAPACITY
+
+# Order of the kind index stored per particle
+PARTICLE_KINDS = ('jump', 'land', 'run')
+
+# Animation frames advanced per simulation step, per kind
+PARTICLE_SPEEDS = {
+    'jump': 0.5,
+    'land': 0.5,
+    'run': 0.3
+}
+
+
+class ParticleSystem:
+    def __init__(self, frames, capacity=PARTICLE_CAPACITY):
+        """frames maps each of PARTICLE_KINDS to its animation frames (may be empty)."""
+        self.frames = [frames.get(kind) or [] for kind in PARTICLE_KINDS]
+        self.frames_flipped = [[pygame.transform.flip(frame, True, False) for frame in kind_frames]
+                               for kind_frames in self.frames]
+        self.sizes = [kind_frames[0].get_size() if kind_frames else (0, 0) for kind_frames in self.frames]
+        self.kind_index = {kind: i for i, kind in enumerate(PARTICLE_KINDS)}
+        self.enabled = True
+
+        self.capacity = capacity
+        self.cursor = 0
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.frame = np.zeros(capacity, dtype=np.float32)
+        self.speed = np.zeros(capacity, dtype=np.float32)
+        self.kind = np.zeros(capacity, dtype=np.intp)
+        self.flip = np.zeros(capacity, dtype=bool)
+        self.active = np.zeros(capacity, dtype=bool)
+
+        # Frame count of each kind, and scratch buffers so update() does not allocate
+        self.kind_lengths = np.array([len(kind_frames) for kind_frames in self.frames], dtype=np.float32)
+        self.limit = np.zeros(capacity, dtype=np.float32)
+        self.scratch = np.zeros(capacity, dtype=bool)
+
+    def clear(self):
+        self.active[:] = False
+        self.cursor = 0
+
+    def emit(self, kind, x, y, flip=False):
+        """Start a kind of puff with its bottom centre at world position (x, y)."""
+        k = self.kind_index[kind]
+        if not self.enabled or not self.frames[k]:
+            return
+        width, height = self.sizes[k]
+        i = self.cursor
+        self.cursor = (i + 1) % self.capacity
+        self.x[i] = x - width / 2
+        self.y[i] = y - height
+        self.frame[i] = 0.0
+        self.speed[i] = PARTICLE_SPEEDS[kind]
+        self.kind[i] = k
+        self.flip[i] = flip
+        self.active[i] = True
+
+    def update(self):
+        """Advance every live particle by one simulation step and retire finished ones."""
+        np.add(self.frame, self.speed, out=self.frame, where=self.active)
+        np.take(self.kind_lengths, self.kind, out=self.limit)
+        np.less(self.frame, self.limit, out=self.scratch)
+        np.logical_and(self.active, self.scratch, out=self.active)
+
+    @property
+    def count(self):
+        return int(np.count_nonzero(self.active))
+
+    def draw(self, surface, view_x, view_y):
+        """Blit every live particle on screen in one batch."""
+        live = np.flatnonzero(self.active)
+        if len(live) == 0:
+            return
+        frames, flipped = self.frames, self.frames_flipped
+        blits = []
+        for kind, frame, flip, x, y in zip(self.kind[live].tolist(),
+                                           self.frame[live].astype(np.int32).tolist(),
+                                           self.flip[live].tolist(),
+                                           (self.x[live] - view_x).tolist(),
+                                           (self.y[live] - view_y).tolist()):
+            width, height = self.sizes[kind]
+            if -width < x < screen_width and -height < y < screen_height:
+                blits.append(((flipped if flip else frames)[kind][frame], (int(x), int(y))))
+        surface.blits(blits, doreturn=False)
@@ -1,12 +1,33 @@
 import pygame
 from support import import_player_folder
-from settings import tile_size, screen_height, LEVEL_HEIGHT
+from settings import tile_size, screen_height, LEVEL_HEIGHT, MAX_SUBSTEP, COINS_NEEDED
 from audio_manager import get_audio_manager
+from asset_pack import get_asset_pack
+from profiling import get_frame_profiler
+
+# Physics presets per emotion, shared with the batch kernel in batch_physics.py
+EMOTION_PHYSICS = {
+    # Joy: Light, bouncy, energetic movement
+    'joy': {'speed': 6, 'gravity': 0.4, 'jump_speed': -16, 'max_fall_speed': 8,
+            'animation_speed': 0.2, 'description': "Fast & bouncy movement"},
+    # Fear: Sluggish, heavy, cautious movement
+    'fear': {'speed': 4, 'gravity': 1.3, 'jump_speed': -20, 'max_fall_speed': 18,
+             'animation_speed': 0.1, 'description': "Sluggish & heavy movement"},
+    # Anger: Aggressive, sharp, intense movement
+    'anger': {'speed': 9, 'gravity': 1.3, 'jump_speed': -28, 'max_fall_speed': 20,
+              'animation_speed': 0.25, 'description': "Aggressive & intense movement"},
+    # Neutral: Balanced, standard movement
+    'neutral': {'speed': 5, 'gravity': .9, 'jump_speed': -20, 'max_fall_speed': 18,
+                'animation_speed': 0.15, 'description': "Balanced movement"}
+}
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self, pos, emotion='neutral'):
+    def __init__(self, pos, emotion='neutral', particles=None):
         super().__init__()
         self.emotion = emotion.lower()
+        # Dust effects are emitted into this ParticleSystem, when given
+        self.particles = particles
+        self.run_dust_timer = 0
         self.import_assets()
         self.frame_index = 0
         self.animation_speed = 0.15
@@ -19,13 +40,15 @@ class Player(pygame.sprite.Sprite):
 
         # Game state
         self.score = 0
-        self.coins_needed = 5
+        self.coins_needed = COINS_NEEDED
         self.has_won = False
         self.reached_goal = False
 
         # Set image and rect
         self.image = self.animations[self.status][self.frame_index]
         self.rect = self.image.get_rect(topleft=pos)
+        # Position before the last simulation step, used to interpolate drawing
+        self.previous_position = pygame.math.Vector2(self.rect.topleft)
         
         # Physics - set based on emotion
         self.direction = pygame.math.Vector2(0, 0)
@@ -37,48 +60,26 @@ class Player(pygame.sprite.Sprite):
 
     def set_emotion_physics(self, emotion):
         """Set physics parameters based on detected emotion."""
-        if emotion == 'joy':
-            # Joy: Light, bouncy, energetic movement
-            self.speed = 6           
-            self.gravity = 0.4       
-            self.jump_speed = -16    
-            self.max_fall_speed = 8 
-            self.animation_speed = 0.2  
-            print(f"Player tuned for JOY: Fast & bouncy movement")
-        
-        elif emotion == 'fear':
-            # Fear: Sluggish, heavy, cautious movement
-            self.speed = 4           
-            self.gravity = 1.3       
-            self.jump_speed = -20    
-            self.max_fall_speed = 18 
-            self.animation_speed = 0.1  
-            print(f"Player tuned for FEAR: Sluggish & heavy movement")
-        
-        elif emotion == 'anger':
-            # Anger: Aggressive, sharp, intense movement
-            self.speed = 9           
-            self.gravity = 1.3       
-            self.jump_speed = -28    
-            self.max_fall_speed = 20 
-            self.animation_speed = 0.25 # Very fast animation
-            print(f"Player tuned for ANGER: Aggressive & intense movement")
-        
-        else:  
-            # Neutral: Balanced, standard movement
-            self.speed = 5          
-            self.gravity = .9      
-            self.jump_speed = -20    
-            self.max_fall_speed = 18 
-            self.animation_speed = 0.15 
-            print(f"Player tuned for NEUTRAL: Balanced movement")
+        if emotion not in EMOTION_PHYSICS:
+            emotion = 'neutral'
+        physics = EMOTION_PHYSICS[emotion]
+        self.speed = physics['speed']
+        self.gravity = physics['gravity']
+        self.jump_speed = physics['jump_speed']
+        self.max_fall_speed = physics['max_fall_speed']
+        self.animation_speed = physics['animation_speed']
+        print(f"Player tuned for {emotion.upper()}: {physics['description']}")
 
     def import_assets(self):
         character_path = '../graphics/character/'
         self.animations = {'idle': [], 'run': [], 'jump': [], 'fall': []}
 
+        pack = get_asset_pack()
         for animation in self.animations.keys():
-            self.animations[animation] = import_player_folder(character_path + animation)
+            if pack is not None:
+                self.animations[animation] = pack.get(f'player/{animation}')
+            else:
+                self.animations[animation] = import_player_folder(character_path + animation)
 
     def collect_coin(self):
         """Collect a coin and update score."""
@@ -101,12 +102,13 @@ class Player(pygame.sprite.Sprite):
         self.has_won = False
         self.reached_goal = False
 
-    def input(self):
+    def input(self, keys=None):
         # Don't process input if dead or won
         if self.is_dead or self.has_won:
             return
             
-        keys = pygame.key.get_pressed()
+        if keys is None:
+            keys = pygame.key.get_pressed()
         if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
             self.direction.x = 1
             self.facing_right = True
@@ -138,6 +140,7 @@ class Player(pygame.sprite.Sprite):
         self.has_won = False
         self.reached_goal = False
         self.rect.topleft = self.spawn_position
+        self.previous_position.update(self.rect.topleft)
         self.direction = pygame.math.Vector2(0, 0)
         self.on_ground = False
         self.on_ceiling = False
@@ -145,6 +148,16 @@ class Player(pygame.sprite.Sprite):
         self.on_right = False
         print("Player respawned!")
 
+    def restart(self):
+        """Put the player back to how it started the level: spawn, physics, score and animation."""
+        self.respawn()
+        self.reset_game_state()
+        self.status = 'idle'
+        self.frame_index = 0
+        self.facing_right = True
+        self.run_dust_timer = 0
+        self.image = self.animations[self.status][self.frame_index]
+
     def draw_death_screen(self, surface, camera_x=0, camera_y=0):
         """Draw death message overlay"""
         if not self.is_dead:
@@ -239,82 +252,115 @@ class Player(pygame.sprite.Sprite):
         if self.direction.y > self.max_fall_speed:
             self.direction.y = self.max_fall_speed
 
+    def bounce(self):
+        """Small hop after landing on an enemy."""
+        self.direction.y = self.jump_speed / 2
+
     def jump(self):
         if not self.is_dead and not self.has_won:
             self.direction.y = self.jump_speed
             self.audio.play_jump()  # Play jump sound
+            if self.particles is not None:
+                self.particles.emit('jump', self.rect.centerx, self.rect.bottom)
 
-    def is_solid_tile(self, tile_value):
-        """Check if a tile is solid (can be stood on/collided with)"""
-        solid_tiles = {
-            '1', '2', '3', '4', '5', '6', '7', '8',  # Basic terrain
-            '12', '13', '14', '15'  # Floating platforms and single blocks
-        }
-        return str(tile_value) in solid_tiles
+    def emit_dust(self, was_on_ground):
+        """Landing puffs, and a small puff behind the feet every few steps while running."""
+        if self.particles is None or self.is_dead or self.has_won:
+            return
+        if self.on_ground and not was_on_ground:
+            self.particles.emit('land', self.rect.centerx, self.rect.bottom)
+        if self.on_ground and self.direction.x != 0:
+            self.run_dust_timer -= 1
+            if self.run_dust_timer <= 0:
+                self.run_dust_timer = 8
+                heel_x = self.rect.left + 10 if self.facing_right else self.rect.right - 10
+                self.particles.emit('run', heel_x, self.rect.bottom, not self.facing_right)
+        else:
+            self.run_dust_timer = 0
+
+    def solid_tiles_in(self, solidity, rect):
+        """Rects of the solid tiles overlapping rect."""
+        return [pygame.Rect(col * tile_size, row * tile_size, tile_size, tile_size)
+                for row, col in solidity.solid_cells_in(rect)]
 
-    def horizontal_movement_collision(self, terrain_layout):
-        """Handle horizontal collision detection"""
+    def horizontal_movement_collision(self, solidity):
+        """Move horizontally, stopping against the first solid tile in the way"""
         if self.is_dead or self.has_won:
             return
             
         self.on_left = False
         self.on_right = False
         
-        # Move horizontally
-        self.rect.x += self.direction.x * self.speed
+        # Whole-pixel distance, rounded the way the rect rounds it
+        target = self.rect.copy()
+        target.x += self.direction.x * self.speed
+        remaining = target.x - self.rect.x
         
-        # Check for horizontal collisions
-        for row_idx in range(len(terrain_layout)):
-            for col_idx in range(len(terrain_layout[row_idx])):
-                if self.is_solid_tile(terrain_layout[row_idx][col_idx]):
-                    tile_rect = pygame.Rect(col_idx * tile_size, row_idx * tile_size, tile_size, tile_size)
-                    
-                    if self.rect.colliderect(tile_rect):
-                        if self.direction.x > 0:  # Moving right
-                            self.rect.right = tile_rect.left
-                            self.on_right = True
-                        elif self.direction.x < 0:  # Moving left
-                            self.rect.left = tile_rect.right
-                            self.on_left = True
+        # Sweep in sub-steps no longer than MAX_SUBSTEP, so no tile can be skipped
+        while remaining:
+            step = max(-MAX_SUBSTEP, min(MAX_SUBSTEP, remaining))
+            self.rect.x += step
+            remaining -= step
+            tiles = self.solid_tiles_in(solidity, self.rect)
+            if tiles:
+                if step > 0:  # Moving right
+                    self.rect.right = min(tile.left for tile in tiles)
+                    self.on_right = True
+                else:  # Moving left
+                    self.rect.left = max(tile.right for tile in tiles)
+                    self.on_left = True
+                break
 
-    def vertical_movement_collision(self, terrain_layout):
-        """Handle vertical collision detection"""
+    def vertical_movement_collision(self, solidity):
+        """Apply gravity and move vertically, stopping on the first solid tile in the way"""
         if self.is_dead or self.has_won:
             return
             
         self.on_ground = False
         self.on_ceiling = False
         
-        # Apply gravity and move vertically
         self.apply_gravity()
-        self.rect.y += self.direction.y
+        target = self.rect.copy()
+        target.y += self.direction.y
+        remaining = target.y - self.rect.y
         
-        # Check for vertical collisions
-        for row_idx in range(len(terrain_layout)):
-            for col_idx in range(len(terrain_layout[row_idx])):
-                if self.is_solid_tile(terrain_layout[row_idx][col_idx]):
-                    tile_rect = pygame.Rect(col_idx * tile_size, row_idx * tile_size, tile_size, tile_size)
-                    
-                    if self.rect.colliderect(tile_rect):
-                        if self.direction.y > 0:  # Falling down
-                            self.rect.bottom = tile_rect.top
-                            self.direction.y = 0
-                            self.on_ground = True
-                        elif self.direction.y < 0:  # Jumping up
-                            self.rect.top = tile_rect.bottom
-                            self.direction.y = 0
-                            self.on_ceiling = True
+        while remaining:
+            step = max(-MAX_SUBSTEP, min(MAX_SUBSTEP, remaining))
+            self.rect.y += step
+            remaining -= step
+            tiles = self.solid_tiles_in(solidity, self.rect)
+            if tiles:
+                if step > 0:  # Falling down
+                    self.rect.bottom = min(tile.top for tile in tiles)
+                    self.on_ground = True
+                else:  # Jumping up
+                    self.rect.top = max(tile.bottom for tile in tiles)
+                    self.on_ceiling = True
+                self.direction.y = 0
+                break
+
+    def render_position(self, alpha):
+        """Top-left to draw at, alpha of the way from the previous step to the current one."""
+        return self.previous_position.lerp(self.rect.topleft, alpha)
 
-    def update(self, terrain_layout=None):
-        self.input()
-        self.get_status()
-        self.animate()
+    def update(self, solidity=None, keys=None):
+        """Advance the player by one fixed simulation step, colliding with the level's SolidityMap."""
+        self.previous_position.update(self.rect.topleft)
+        profiler = get_frame_profiler()
+        with profiler.section('player.input'):
+            self.input(keys)
+        with profiler.section('player.animate'):
+            self.get_status()
+            self.animate()
         
-        if terrain_layout:
-            self.horizontal_movement_collision(terrain_layout)
-            self.vertical_movement_collision(terrain_layout)
+        if solidity is not None:
+            was_on_ground = self.on_ground
+            with profiler.section('player.collision'):
+                self.horizontal_movement_collision(solidity)
+                self.vertical_movement_collision(solidity)
+            self.emit_dust(was_on_ground)
         else:
-            # If no terrain layout, just apply basic movement
+            # If no solidity map, just apply basic movement
             if not self.is_dead and not self.has_won:
                 self.rect.x += self.direction.x * self.speed
                 self.apply_gravity()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Automated Playtesting Bot
+=========================
+Plays generated levels headlessly with the level emotion's player physics
+and reports, per level, whether it could be completed, how long the route
+took, how many jumps it needed and how many near-misses it had.
+
+Routes are planned with a breadth-first search over short macro actions
+(run or stand, with or without jump, held for a few steps). Each search
+layer expands the whole frontier with every action as one BatchPhysics
+batch, and states are deduplicated on a coarse position/velocity grid.
+The bot heads for the nearest reachable coin until it has COINS_NEEDED,
+then for the goal, picking coins up and touching the goal exactly as
+EmotionLevelViewer checks them. Enemies are not simulated.
+
+A near-miss is a landing with less than a quarter of a tile under the
+player's feet.
+
+Usage:
+    python playtest_bot.py [--emotions joy fear] [--count 10] [--width 60] [--output report.json]
+    python playtest_bot.py --levels-dir generated_levels --emotion neutral
+"""
+
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import contextlib
+import json
+import sys
+import time
+import numpy as np
+import pygame
+from settings import tile_size, LEVEL_WIDTH, SIMULATION_HZ, COINS_NEEDED
+from support import importCsvLayout
+from batch_physics import BatchPhysics, PRESET_NAMES, layout_from_csv, find_spawn
+from coins import CoinStore
+
+# (move, jump) held for ACTION_STEPS simulation steps
+ACTIONS = ((1, False), (1, True), (-1, False), (-1, True), (0, True), (0, False))
+ACTION_STEPS = 6
+
+# Give up on a target after this much game time without reaching it
+MAX_SEARCH_SECONDS = 60
+
+# Landings with less support than this are near-misses
+NEAR_MISS_SUPPORT = tile_size // 4
+
+
+def state_keys(x, y, vy, on_ground):
+    """Deduplication key per state: 4 px position cells, half-unit vertical speed."""
+    return (((x // 4 + 8192) << 30) | ((y // 4 + 4096) << 16)
+            | ((np.round(vy * 2).astype(np.int64) + 256) << 1) | on_ground)
+
+
+class PlaytestBot:
+    def __init__(self, terrain, coins, player_layout, emotion):
+        self.emotion = emotion
+        self.kernel = BatchPhysics(terrain)
+        self.spawn = find_spawn(player_layout)
+        self.coins_layout = coins
+        self.coins = self.layer_grid(coins, '16')
+        self.goal = self.layer_grid(player_layout, '28')
+        self.expanded = 0
+
+    def layer_grid(self, layout, tile):
+        grid = np.zeros(self.kernel.solid.shape, dtype=bool)
+        for row_idx, row in enumerate(layout[:grid.shape[0]]):
+            for col_idx, cell in enumerate(row[:grid.shape[1]]):
+                grid[row_idx, col_idx] = cell == tile
+        return grid
+
+    def center_tiles(self, kernel):
+        """Tile under each agent's rect centre, as the viewer's coin and goal checks use."""
+        rows = (kernel.y + kernel.height // 2) // tile_size
+        columns = (kernel.x + kernel.width // 2) // tile_size
+        inside = (rows >= 0) & (rows < self.coins.shape[0]) & (columns >= 0) & (columns < self.coins.shape[1])
+        return np.clip(rows, 0, self.coins.shape[0] - 1), np.clip(columns, 0, self.coins.shape[1] - 1), inside
+
+    def touched_cells(self, kernel, grid):
+        """Agents whose rect overlaps a marked cell of grid, and the first such cell."""
+        hit = np.zeros(kernel.count, dtype=bool)
+        hit_rows = np.zeros(kernel.count, dtype=np.int64)
+        hit_columns = np.zeros(kernel.count, dtype=np.int64)
+        for k in range(kernel.span_rows):
+            rows = kernel.y // tile_size + k
+            for j in range(kernel.span_columns):
+                columns = kernel.x // tile_size + j
+                inside = ((rows >= 0) & (rows < grid.shape[0]) & (columns >= 0) & (columns < grid.shape[1])
+                          & (rows * tile_size < kernel.y + kernel.height)
+                          & (columns * tile_size < kernel.x + kernel.width))
+                marked = ~hit & inside & grid[np.clip(rows, 0, grid.shape[0] - 1),
+                                              np.clip(columns, 0, grid.shape[1] - 1)]
+                hit_rows = np.where(marked, rows, hit_rows)
+                hit_columns = np.where(marked, columns, hit_columns)
+                hit |= marked
+        return hit, hit_rows, hit_columns
+
+    def reached_targets(self, kernel, targets, goal):
+        """Coins are touched by any overlap, the goal by the rect centre, as in the viewer."""
+        if goal:
+            rows, columns, inside = self.center_tiles(kernel)
+            return inside & targets[rows, columns], rows, columns
+        return self.touched_cells(kernel, targets)
+
+    def search(self, start, targets, goal=False):
+        """
+        Shortest macro-action route from start to any target tile.
+
+        Returns (actions, final steps of the last action, end state, tile reached)
+        or None if no target is reachable in MAX_SEARCH_SECONDS.
+        """
+        kernel = self.kernel
+        frontier = tuple(np.array([value]) for value in start)
+        visited = set(state_keys(*frontier).tolist())
+        layers = []  # (parent index, action index) per expanded state
+        max_layers = MAX_SEARCH_SECONDS * SIMULATION_HZ // ACTION_STEPS
+
+        for _ in range(max_layers):
+            size = len(frontier[0])
+            if size == 0:
+                return None
+            self.expanded += size * len(ACTIONS)
+            parents = np.tile(np.arange(size), len(ACTIONS))
+            action_index = np.repeat(np.arange(len(ACTIONS)), size)
+            moves = np.array([move for move, _ in ACTIONS])[action_index]
+            jumps = np.array([jump for _, jump in ACTIONS])[action_index]
+            kernel.load(*(np.tile(values, len(ACTIONS)) for values in frontier), self.emotion)
+
+            for step in range(ACTION_STEPS):
+                kernel.step(moves, jumps)
+                hit, rows, columns = self.reached_targets(kernel, targets, goal)
+                reached = np.flatnonzero(hit & ~kernel.dead)
+                if len(reached):
+                    agent = reached[0]
+                    actions = [action_index[agent]]
+                    parent = parents[agent]
+                    for layer_parents, layer_actions in reversed(layers):
+                        actions.append(layer_actions[parent])
+                        parent = layer_parents[parent]
+                    end = (kernel.x[agent], kernel.y[agent], kernel.vy[agent], kernel.on_ground[agent])
+                    return actions[::-1], step + 1, end, (rows[agent], columns[agent])
+
+            alive = ~kernel.dead
+            keys = state_keys(kernel.x, kernel.y, kernel.vy, kernel.on_ground)
+            # Keep the first agent of each new state
+            _, first = np.unique(keys, return_index=True)
+            fresh = np.zeros(len(keys), dtype=bool)
+            fresh[first] = True
+            fresh &= alive
+            candidates = np.flatnonzero(fresh)
+            new = [i for i, key in zip(candidates.tolist(), keys[candidates].tolist()) if key not in visited]
+            visited.update(keys[new].tolist())
+            new = np.array(new, dtype=np.int64)
+
+            layers.append((parents[new], action_index[new]))
+            frontier = (kernel.x[new], kernel.y[new], kernel.vy[new], kernel.on_ground[new])
+        return None
+
+    def play(self):
+        """Plan a full route and score it."""
+        start_time = time.perf_counter()
+        self.expanded = 0
+        state = (self.spawn[0], self.spawn[1], 0.0, False)
+        coins = self.coins.copy()
+        route = []  # (move, jump, steps)
+        collected = 0
+
+        while True:
+            want_goal = collected >= COINS_NEEDED
+            if not want_goal and not coins.any():
+                break
+            found = self.search(state, self.goal if want_goal else coins, want_goal)
+            if found is None:
+                break
+            actions, last_steps, state, (row, column) = found
+            route += [(*ACTIONS[action], ACTION_STEPS) for action in actions[:-1]]
+            route.append((*ACTIONS[actions[-1]], last_steps))
+            if want_goal:
+                break
+            coins[row, column] = False
+            collected += 1
+
+        result = self.score_route(route)
+        result.update({
+            'coins_available': int(self.coins.sum()),
+            'states_expanded': self.expanded,
+            'plan_ms': round((time.perf_counter() - start_time) * 1000, 1)
+        })
+        return result
+
+    def score_route(self, route):
+        """
+        Replay a route with one agent, counting its steps, jumps and near-misses.
+
+        Coins passed on the way are picked up too, and the level is completed
+        once the goal is touched holding COINS_NEEDED coins, as in the game.
+        """
+        kernel = self.kernel
+        kernel.load([self.spawn[0]], [self.spawn[1]], [0.0], [False], self.emotion)
+        coin_store = CoinStore([list(row) for row in self.coins_layout])
+        steps = jumps = near_misses = 0
+        completed = False
+        for move, jump, count in route:
+            for _ in range(count):
+                was_on_ground = bool(kernel.on_ground[0])
+                jumps += was_on_ground and jump
+                # The viewer checks the goal before the step and coins after it
+                rows, columns, inside = self.center_tiles(kernel)
+                if inside[0] and self.goal[rows[0], columns[0]] and coin_store.collected >= COINS_NEEDED:
+                    completed = True
+                    break
+                swept_from = pygame.Rect(int(kernel.x[0]), int(kernel.y[0]), kernel.width, kernel.height)
+                kernel.step(np.array([move]), np.array([jump]))
+                steps += 1
+                if kernel.on_ground[0] and not was_on_ground and self.support(kernel) < NEAR_MISS_SUPPORT:
+                    near_misses += 1
+                # Same horizontal-then-vertical sweep as the viewer's pickup
+                coin_store.collect_swept(swept_from, pygame.Rect(int(kernel.x[0]), int(kernel.y[0]),
+                                                                  kernel.width, kernel.height))
+            if completed:
+                break
+        else:
+            # Touching the goal on the last step counts from the next check
+            rows, columns, inside = self.center_tiles(kernel)
+            completed = bool(inside[0] and self.goal[rows[0], columns[0]]
+                             and coin_store.collected >= COINS_NEEDED)
+        return {'completed': completed, 'coins': coin_store.collected, 'time_s': round(steps / SIMULATION_HZ, 2),
+                'steps': steps, 'jumps': jumps, 'near_misses': near_misses}
+
+    def support(self, kernel):
+        """Pixels of the first agent's feet resting on solid tiles."""
+        x, row = int(kernel.x[0]), int(kernel.y[0] + kernel.height) // tile_size
+        supported = 0
+        for column in range(x // tile_size, (x + kernel.width - 1) // tile_size + 1):
+            if kernel.tile_solid(np.array(row), np.array(column)):
+                supported += min(x + kernel.width, (column + 1) * tile_size) - max(x, column * tile_size)
+        return supported
+
+
+def generated_levels(emotions, count, width, seed):
+    """(name, emotion, terrain, coins, player layouts) for freshly generated levels."""
+    from level_generator import EnhancedLevelGenerator
+    for emotion in emotions:
+        for level_seed in range(seed, seed + count):
+            with contextlib.redirect_stdout(None):
+                level = EnhancedLevelGenerator(emotion, width=width, seed=level_seed).generate_enhanced_level()
+            yield (f"{emotion}/{level_seed}", emotion, layout_from_csv(level['terrain']),
+                   layout_from_csv(level['coins']), layout_from_csv(level['player']))
+
+
+def saved_levels(levels_dir, emotion):
+    """The same for every numbered level directory under levels_dir."""
+    for name in sorted(os.listdir(levels_dir), key=lambda name: (len(name), name)):
+        level_dir = os.path.join(levels_dir, name)
+        if not (name.isdigit() and os.path.isdir(level_dir)):
+            continue
+        layers = [importCsvLayout(os.path.join(level_dir, f"level_{name}_{layer}.csv"))
+                  for layer in ('terrain', 'coins', 'player')]
+        yield (level_dir, emotion, *layers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Playtest generated levels headlessly.")
+    parser.add_argument('--emotions', nargs='+', default=list(PRESET_NAMES), choices=PRESET_NAMES)
+    parser.add_argument('--count', type=int, default=10, help="levels generated per emotion")
+    parser.add_argument('--width', type=int, default=LEVEL_WIDTH, help="level width in tiles")
+    parser.add_argument('--seed', type=int, default=1, help="seed of the first generated level")
+    parser.add_argument('--levels-dir', help="score saved level directories instead of generating levels")
+    parser.add_argument('--emotion', default='neutral', choices=PRESET_NAMES,
+                        help="physics used for --levels-dir levels")
+    parser.add_argument('--output', help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.levels_dir:
+        levels = saved_levels(args.levels_dir, args.emotion)
+    else:
+        levels = generated_levels(args.emotions, args.count, args.width, args.seed)
+
+    results = []
+    start = time.perf_counter()
+    print(f"{'level':<24}{'done':>6}{'coins':>7}{'time':>8}{'jumps':>7}{'near':>6}{'plan':>9}")
+    for name, emotion, terrain, coins, player_layout in levels:
+        result = {'level': name, 'emotion': emotion}
+        result.update(PlaytestBot(terrain, coins, player_layout, emotion).play())
+        results.append(result)
+        print(f"{name:<24}{'yes' if result['completed'] else 'NO':>6}{result['coins']:>7}"
+              f"{result['time_s']:>7.1f}s{result['jumps']:>7}{result['near_misses']:>6}"
+              f"{result['plan_ms']:>7.0f}ms")
+        sys.stdout.flush()
+
+    print(f"\n{'emotion':<10}{'levels':>8}{'completed':>11}{'mean time':>11}{'mean jumps':>12}{'near/level':>12}")
+    summary = {}
+    for emotion in sorted({result['emotion'] for result in results}):
+        scored = [result for result in results if result['emotion'] == emotion]
+        done = [result for result in scored if result['completed']]
+        summary[emotion] = {
+            'levels': len(scored),
+            'completion_rate': round(len(done) / len(scored), 3),
+            'mean_time_s': round(sum(result['time_s'] for result in done) / len(done), 2) if done else None,
+            'mean_jumps': round(sum(result['jumps'] for result in done) / len(done), 1) if done else None,
+            'near_misses_per_level': round(sum(result['near_misses'] for result in scored) / len(scored), 2)
+        }
+        row = summary[emotion]
+        print(f"{emotion:<10}{row['levels']:>8}{row['completion_rate']:>11.0%}"
+              f"{row['mean_time_s'] if done else '-':>10}s{row['mean_jumps'] if done else '-':>12}"
+              f"{row['near_misses_per_level']:>12}")
+    print(f"\nScored {len(results)} levels in {time.perf_counter() - start:.1f} s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump({'summary': summary, 'levels': results}, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Lightweight timing helpers for the game.
+"""
+
+import csv
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class StartupTimer:
+    """
+    Records how long each subsystem takes to start.
+
+    measure() blocks can nest; nested entries are shown indented under their
+    parent. Each thread keeps its own nesting, so background warm-up can be
+    timed alongside the main thread.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.entries = []  # (name, depth, milliseconds, thread name)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @contextmanager
+    def measure(self, name):
+        depth = getattr(self.local, 'depth', 0)
+        self.local.depth = depth + 1
+        with self.lock:
+            index = len(self.entries)
+            self.entries.append((name, depth, None, threading.current_thread().name))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.local.depth = depth
+            with self.lock:
+                self.entries[index] = (name, depth, elapsed, self.entries[index][3])
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def report(self, title):
+        """Print the timings recorded so far."""
+        with self.lock:
+            entries = list(self.entries)
+        print(f"\n{title} after {self.elapsed_ms():.0f} ms")
+        print("-" * 45)
+        for name, depth, elapsed, thread_name in entries:
+            label = "  " * depth + name
+            if thread_name != 'MainThread':
+                label += f" [{thread_name}]"
+            duration = f"{elapsed:8.1f} ms" if elapsed is not None else " running"
+            print(f"{label:<34}{duration}")
+        print("-" * 45)
+
+
+startup_timer = StartupTimer()
+
+
+def get_startup_timer() -> StartupTimer:
+    """Get the global startup timer."""
+    return startup_timer
+
+
+class NullSection:
+    """Context manager that does nothing, used while frame profiling is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class ProfileSection:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+NULL_SECTION = NullSection()
+
+
+class FrameProfiler:
+    """
+    Per-frame phase timings kept in a fixed-size ring buffer.
+
+    Phases are timed with `with profiler.section(name):` between
+    begin_frame() and end_frame(). Nested phases are included in their
+    parent's time. While disabled, section() returns a shared no-op context
+    manager, so the instrumentation costs one attribute check per phase.
+    """
+
+    def __init__(self, capacity=600, dump_dir='../cache/profiles'):
+        self.capacity = capacity
+        self.dump_dir = dump_dir
+        self.enabled = False
+        self.frames = [None] * capacity  # ring buffer of {phase: ms}
+        self.frame_count = 0
+        self.phases = []  # phase names in first-seen order
+        self.current = None
+        self.frame_start = 0.0
+        self.font = None
+        self.panel = None
+        self.panel_frame = 0
+        self.panel_refresh = 15
+
+    def toggle(self):
+        """Turn recording and the overlay on or off."""
+        self.enabled = not self.enabled
+        self.current = None
+        self.panel = None
+        print(f"Frame profiler {'on' if self.enabled else 'off'}")
+
+    def begin_frame(self):
+        if self.enabled:
+            self.current = {}
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if self.current is None:
+            return
+        self.current['frame'] = (time.perf_counter() - self.frame_start) * 1000
+        self.frames[self.frame_count % self.capacity] = self.current
+        self.frame_count += 1
+        self.current = None
+
+    def section(self, name):
+        if self.current is None:
+            return NULL_SECTION
+        if name not in self.current and name not in self.phases:
+            self.phases.append(name)
+        return ProfileSection(self, name)
+
+    def add(self, name, milliseconds):
+        if self.current is not None:
+            self.current[name] = self.current.get(name, 0.0) + milliseconds
+
+    def recent_frames(self, count=None):
+        """Recorded frames, oldest first, optionally only the last `count`."""
+        stored = min(self.frame_count, self.capacity)
+        if count is not None:
+            stored = min(stored, count)
+        return [self.frames[index % self.capacity]
+                for index in range(self.frame_count - stored, self.frame_count)]
+
+    def summary(self, count=60):
+        """(phase, mean ms, max ms) over the last `count` frames."""
+        frames = self.recent_frames(count)
+        if not frames:
+            return []
+        rows = []
+        for name in ['frame'] + self.phases:
+            values = [frame.get(name, 0.0) for frame in frames]
+            rows.append((name, sum(values) / len(values), max(values)))
+        return rows
+
+    def dump_csv(self, path=None):
+        """Write the ring buffer to a CSV file and return its path."""
+        if path is None:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            path = os.path.join(self.dump_dir, time.strftime('frames_%Y%m%d_%H%M%S.csv'))
+        frames = self.recent_frames()
+        first_frame = self.frame_count - len(frames)
+        columns = ['frame'] + self.phases
+        with open(path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['frame_index'] + [f'{name}_ms' for name in columns])
+            for offset, frame in enumerate(frames):
+                writer.writerow([first_frame + offset] + [f"{frame.get(name, 0.0):.3f}" for name in columns])
+        print(f"Wrote {len(frames)} frame timings to {path}")
+        return path
+
+    def draw_overlay(self, surface):
+        """Draw recent phase timings in the top-right corner."""
+        if not self.enabled:
+            return
+        # Rendering text is not free, so the panel is rebuilt a few times a second
+        if self.panel is None or self.frame_count - self.panel_frame >= self.panel_refresh:
+            self.panel = self.render_panel()
+            self.panel_frame = self.frame_count
+        surface.blit(self.panel, (surface.get_width() - self.panel.get_width() - 10, 10))
+
+    def render_panel(self):
+        import pygame
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+
+        rows = [('phase', 'avg', 'max')]
+        rows += [(name, f"{average:.2f}", f"{peak:.2f}") for name, average, peak in self.summary()]
+        name_width = max(self.font.size(name)[0] for name, _, _ in rows)
+        number_width = self.font.size("000.00")[0]
+        line_height = self.font.get_linesize()
+        width = name_width + number_width * 2 + 32
+        panel = pygame.Surface((width, line_height * len(rows) + 12))
+        panel.set_alpha(190)
+        panel.fill((0, 0, 0))
+
+        for i, row in enumerate(rows):
+            color = (255, 215, 0) if i == 0 else (255, 255, 255)
+            y = 6 + i * line_height
+            panel.blit(self.font.render(row[0], True, color), (8, y))
+            for column, text in enumerate(row[1:], start=1):
+                rendered = self.font.render(text, True, color)
+                right = 8 + name_width + 8 + column * (number_width + 8)
+                panel.blit(rendered, (right - rendered.get_width(), y))
+        return panel
+
+
+frame_profiler = FrameProfiler()
+
+
+def get_frame_profiler() -> FrameProfiler:
+    """Get the global frame profiler."""
+    return frame_profiler
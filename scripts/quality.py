@@ -0,0 +1,137 @@
+"""
+Adaptive Quality
+================
+Keeps the frame time inside its budget on slow machines by turning
+optional drawing down while frames run long, and back up once there is
+headroom again.
+
+The governor averages the work time of the last QUALITY_WINDOW frames
+(the time spent before clock.tick sleeps). When the average goes over
+the budget it drops one quality level; when it has stayed well under
+the budget for QUALITY_RESTORE_FRAMES frames it restores one level.
+After every change the window starts over, so each decision is made on
+frames drawn at the current level, and a restore that immediately runs
+over budget again doubles the wait before the next one, so quality does
+not flip back and forth around the budget. Every change is printed when
+it happens and listed again by report().
+
+Only drawing is affected, never the simulation, so recorded inputs
+replay the same at any quality level.
+"""
+
+import time
+from settings import (TILE_ANIMATION_FPS, FRAME_BUDGET_MS, QUALITY_WINDOW, QUALITY_RESTORE_FRAMES,
+                      QUALITY_HEADROOM)
+
+# Viewer settings at full quality
+FULL_QUALITY = {
+    'show_bg_palms': True,
+    'tile_animation_fps': TILE_ANIMATION_FPS,
+    'particles': True,
+    'show_grass': True,
+    'show_captions': True
+}
+
+# Each level keeps the changes of the levels before it, cheapest to lose first
+QUALITY_LEVELS = [
+    ('full', {}),
+    ('no background palms', {'show_bg_palms': False}),
+    ('slower tile animation', {'tile_animation_fps': TILE_ANIMATION_FPS // 2}),
+    ('no particles', {'particles': False}),
+    ('no grass', {'show_grass': False}),
+    ('no captions', {'show_captions': False})
+]
+
+
+def quality_settings(level):
+    """Viewer settings for a quality level."""
+    settings = dict(FULL_QUALITY)
+    for _, changes in QUALITY_LEVELS[1:level + 1]:
+        settings.update(changes)
+    return settings
+
+
+def apply_quality(viewer, level):
+    """Set the viewer's optional drawing for a quality level."""
+    settings = quality_settings(level)
+    viewer.show_bg_palms = settings['show_bg_palms']
+    viewer.show_grass = settings['show_grass']
+    viewer.show_captions = settings['show_captions']
+    viewer.tile_animation_fps = settings['tile_animation_fps']
+    viewer.particles.enabled = settings['particles']
+    if not settings['particles']:
+        viewer.particles.clear()
+
+
+class QualityGovernor:
+    def __init__(self, viewer, budget_ms=FRAME_BUDGET_MS, window=QUALITY_WINDOW,
+                 restore_frames=QUALITY_RESTORE_FRAMES, headroom=QUALITY_HEADROOM):
+        self.viewer = viewer
+        self.budget_ms = budget_ms
+        self.restore_frames = restore_frames
+        self.restore_wait = restore_frames
+        self.last_direction = None
+        self.headroom = headroom
+        self.level = 0
+        self.started = time.perf_counter()
+        self.changes = []  # (seconds since start, level, average ms that caused it)
+
+        # Ring buffer of recent frame times with a running sum
+        self.window = window
+        self.times = [0.0] * window
+        self.cursor = 0
+        self.count = 0
+        self.total = 0.0
+        self.frames_under = 0
+        apply_quality(viewer, self.level)
+
+    @property
+    def average_ms(self):
+        return self.total / self.count if self.count else 0.0
+
+    def add_frame(self, frame_ms):
+        """Record one frame's work time and change quality if the average calls for it."""
+        if self.count < self.window:
+            self.count += 1
+        else:
+            self.total -= self.times[self.cursor]
+        self.times[self.cursor] = frame_ms
+        self.total += frame_ms
+        self.cursor = (self.cursor + 1) % self.window
+        if self.count < self.window:
+            return
+
+        average = self.average_ms
+        if average > self.budget_ms and self.level < len(QUALITY_LEVELS) - 1:
+            self.set_level(self.level + 1, average)
+        elif average < self.budget_ms * self.headroom and self.level > 0:
+            self.frames_under += 1
+            if self.frames_under >= self.restore_wait:
+                self.set_level(self.level - 1, average)
+        else:
+            self.frames_under = 0
+
+    def set_level(self, level, average):
+        direction = "down" if level > self.level else "up"
+        if direction == "down" and self.last_direction == "up":
+            # The last restore did not fit the budget, try the next one later
+            self.restore_wait = min(self.restore_wait * 2, self.restore_frames * 8)
+        self.last_direction = direction
+        self.level = level
+        apply_quality(self.viewer, level)
+        self.changes.append((time.perf_counter() - self.started, level, average))
+        print(f"Quality {direction} to level {level} ({QUALITY_LEVELS[level][0]}): "
+              f"average frame {average:.1f} ms, budget {self.budget_ms:.1f} ms")
+        # Judge the new level on its own frames only
+        self.count = 0
+        self.total = 0.0
+        self.frames_under = 0
+
+    def report(self):
+        """Print every quality change made this session."""
+        print(f"\nQuality changes ({len(self.changes)}), ending at level {self.level} "
+              f"({QUALITY_LEVELS[self.level][0]})")
+        print("-" * 45)
+        for seconds, level, average in self.changes:
+            print(f"{seconds:8.1f} s  level {level} {QUALITY_LEVELS[level][0]:<22}{average:6.1f} ms")
+        print("-" * 45)
@@ -10,10 +10,38 @@ screen_width = 1200
 # Player settings
 player_sprite_size = (64, 64)
 
+# Enemy stomp explosion frames are scaled down to this size
+EXPLOSION_SIZE = (100, 100)
+
+# Frames per second of animated coin and palm tiles, all driven by one shared clock
+TILE_ANIMATION_FPS = 8
+
+# Most dust particles alive at once, the oldest is replaced when the pool is full
+PARTICLE_CAPACITY = 64
+
 # Game settings
 dogCount = 4  # Number of dogs needed to win
+COINS_NEEDED = 5  # Coins to hold when reaching the goal to win
 FPS = 60
 
+# Player physics is tuned per step, so the simulation always runs at this rate
+SIMULATION_HZ = 60
+MAX_SIMULATION_STEPS = 5  # per rendered frame, before the game slows down instead
+
+# Longest single collision sub-step in pixels. Below the tile and player sizes,
+# so a fast move can never pass through a tile between two checks.
+MAX_SUBSTEP = tile_size // 2
+
+# Adaptive quality: optional drawing is turned down while the rolling average
+# frame work time is over budget, and back up after a stretch well under it
+FRAME_BUDGET_MS = 1000 / FPS
+QUALITY_WINDOW = 60  # frames averaged for each decision
+QUALITY_RESTORE_FRAMES = 180  # frames under the headroom before a level is restored
+QUALITY_HEADROOM = 0.6  # fraction of the budget the average must stay under to restore
+
+# Audio device settings, used for the single mixer initialization
+MIXER_SETTINGS = {'frequency': 22050, 'size': -16, 'channels': 2, 'buffer': 512}
+
 # Level dimensions
 LEVEL_WIDTH = 60   # tiles
 LEVEL_HEIGHT = 11  # tiles
@@ -36,5 +64,7 @@ TILE_TYPES = {
     16: 'dog_coin',
     17: 'cat_coin',
     27: 'player_spawn',
-    28: 'goal'
+    28: 'goal',
+    29: 'enemy',
+    30: 'enemy_constraint'
 }
\ No newline at end of file
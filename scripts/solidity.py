@@ -0,0 +1,97 @@
+"""
+Solidity Map
+============
+Which tiles of a level are solid, packed into one int bitmask per row
+(bit c of row r is set when tile (r, c) is solid).
+
+The map is built once when a level is loaded or generated, and is the
+one place that decides what is solid: player collision, the batch
+physics kernel and the generator's placement checks all query it
+instead of comparing tile values themselves. A point query is a shift
+and a mask, and a rectangle query is one mask per row it spans, so
+checking a whole area costs about the same as checking one tile.
+Tiles outside the level are never solid.
+"""
+
+import numpy as np
+from settings import tile_size
+
+# Terrain tiles that can be stood on/collided with
+SOLID_TILES = {
+    '1', '2', '3', '4', '5', '6', '7', '8',  # Basic terrain
+    '12', '13', '14', '15'  # Floating platforms and single blocks
+}
+
+
+def is_solid_value(tile_value):
+    """Whether a terrain tile value, from a CSV layout or the generator's grid, is solid."""
+    return str(tile_value) in SOLID_TILES
+
+
+class SolidityMap:
+    def __init__(self, terrain_layout):
+        self.rows = len(terrain_layout)
+        self.columns = max((len(row) for row in terrain_layout), default=0)
+        self.bits = [0] * self.rows
+        for row_idx, row in enumerate(terrain_layout):
+            for col_idx, cell in enumerate(row):
+                if is_solid_value(cell):
+                    self.bits[row_idx] |= 1 << col_idx
+
+    def set_solid(self, row, col, solid=True):
+        """Mark one tile solid or empty, for layouts that change while being built."""
+        if solid:
+            self.bits[row] |= 1 << col
+        else:
+            self.bits[row] &= ~(1 << col)
+
+    def is_solid(self, row, col):
+        if 0 <= row < self.rows and col >= 0:
+            return bool(self.bits[row] >> col & 1)
+        return False
+
+    def any_solid(self, first_row, first_col, last_row, last_col):
+        """Whether any tile in the inclusive range of rows and columns is solid."""
+        first_row = max(0, first_row)
+        last_row = min(self.rows - 1, last_row)
+        first_col = max(0, first_col)
+        if last_col < first_col:
+            return False
+        mask = ((1 << (last_col - first_col + 1)) - 1) << first_col
+        for row in range(first_row, last_row + 1):
+            if self.bits[row] & mask:
+                return True
+        return False
+
+    def is_surface(self, row, col):
+        """Empty tile with a solid tile right below it, where things can stand."""
+        return not self.is_solid(row, col) and self.is_solid(row + 1, col)
+
+    def first_solid_in_row(self, row):
+        """Leftmost solid column of a row, or None when the row has none."""
+        bits = self.bits[row] if 0 <= row < self.rows else 0
+        if not bits:
+            return None
+        return (bits & -bits).bit_length() - 1
+
+    def cell_range(self, rect):
+        """(first_row, first_col, last_row, last_col) of the tiles a pixel rect overlaps."""
+        return (rect.top // tile_size, rect.left // tile_size,
+                (rect.bottom - 1) // tile_size, (rect.right - 1) // tile_size)
+
+    def solid_cells_in(self, rect):
+        """(row, col) of every solid tile a pixel rect overlaps."""
+        first_row, first_col, last_row, last_col = self.cell_range(rect)
+        if not self.any_solid(first_row, first_col, last_row, last_col):
+            return []
+        return [(row, col)
+                for row in range(max(0, first_row), min(self.rows - 1, last_row) + 1)
+                for col in range(max(0, first_col), last_col + 1)
+                if self.bits[row] >> col & 1]
+
+    def to_array(self):
+        """The map as a (rows, columns) numpy bool array."""
+        grid = np.zeros((self.rows, self.columns), dtype=bool)
+        for row, bits in enumerate(self.bits):
+            grid[row] = [bool(bits >> col & 1) for col in range(self.columns)]
+        return grid
@@ -4,38 +4,50 @@ from csv import reader
 from settings import tile_size, player_sprite_size
 import random
 
+def cut_graphics(surface):
+    """Cut a tileset surface into tile_size tiles; works off the main thread before convert."""
+    tile_num_x = int(surface.get_size()[0] / tile_size)
+    tile_num_y = int(surface.get_size()[1] / tile_size)
+
+    cut_tiles = []
+    for row in range(tile_num_y):
+        for col in range(tile_num_x):
+            x = col * tile_size
+            y = row * tile_size
+            new_surf = pygame.Surface((tile_size, tile_size), flags=pygame.SRCALPHA)
+            new_surf.blit(surface, (0, 0), pygame.Rect(x, y, tile_size, tile_size))
+            cut_tiles.append(new_surf)
+
+    return cut_tiles
+
+def center_in_tile(surface):
+    """Copy a surface smaller than a tile onto the centre of a transparent tile_size tile."""
+    tile = pygame.Surface((tile_size, tile_size), flags=pygame.SRCALPHA)
+    tile.blit(surface, surface.get_rect(center=(tile_size // 2, tile_size // 2)))
+    return tile
+
 def import_cut_graphics(path):
     """Cut graphics from tileset."""
     try:
         surface = pygame.image.load(path).convert_alpha()
-        tile_num_x = int(surface.get_size()[0] / tile_size)
-        tile_num_y = int(surface.get_size()[1] / tile_size)
-
-        cut_tiles = []
-        for row in range(tile_num_y):
-            for col in range(tile_num_x):
-                x = col * tile_size
-                y = row * tile_size
-                new_surf = pygame.Surface((tile_size, tile_size), flags=pygame.SRCALPHA)
-                new_surf.blit(surface, (0, 0), pygame.Rect(x, y, tile_size, tile_size))
-                cut_tiles.append(new_surf)
-
-        return cut_tiles
+        return cut_graphics(surface)
     except Exception as e:
         print(f"Error loading graphics from {path}: {e}")
         return None
 
+def folder_image_paths(path):
+    """Paths of the .png files in a folder, sorted by name so animation frames stay in order."""
+    image_paths = []
+    for _, __, image_files in os.walk(path):
+        for image in sorted(image_files):
+            if image.endswith('.png'):
+                image_paths.append(path + '/' + image)
+    return image_paths
+
 def import_folder(path):
     """Import all images from a folder."""
-    surface_list = []
     try:
-        for _, __, image_files in os.walk(path):
-            for image in image_files:
-                if image.endswith('.png'):
-                    full_path = path + '/' + image
-                    image_surf = pygame.image.load(full_path).convert_alpha()
-                    surface_list.append(image_surf)
-        return surface_list
+        return [pygame.image.load(full_path).convert_alpha() for full_path in folder_image_paths(path)]
     except Exception as e:
         print(f"Error loading folder {path}: {e}")
         return []
@@ -0,0 +1,28 @@
+"""
+Shared setup for the tests: the game modules are imported by bare name
+and load assets by paths relative to scripts/, so tests run from there
+with SDL's dummy video and audio drivers.
+"""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+sys.path.insert(0, SCRIPTS_DIR)
+os.chdir(SCRIPTS_DIR)
+
+import pygame
+import pytest
+from settings import screen_width, screen_height, MIXER_SETTINGS
+
+
+@pytest.fixture(scope='session')
+def display():
+    pygame.mixer.pre_init(**MIXER_SETTINGS)
+    pygame.init()
+    screen = pygame.display.set_mode((screen_width, screen_height))
+    yield screen
+    pygame.quit()
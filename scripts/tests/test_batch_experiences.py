@@ -0,0 +1,40 @@
+import json
+from batch_experiences import BatchExperienceProcessor
+
+
+class FlakyBrain:
+    """Fails every experience listed in failing, answers the rest."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    def process_user_input(self, text, model, strict=False):
+        if text in self.failing:
+            raise RuntimeError("backend unavailable")
+        return {'emotion': 'joy', 'narrative': f"Story of {text}"}
+
+
+def read_results(path):
+    with open(path, encoding='utf-8') as output_file:
+        return [json.loads(line) for line in output_file]
+
+
+def test_resume_retries_failures_and_keeps_one_line_per_id(tmp_path):
+    input_path = tmp_path / 'input.jsonl'
+    output_path = tmp_path / 'output.jsonl'
+    input_path.write_text(''.join(json.dumps({'id': name, 'text': name}) + '\n' for name in 'abc'))
+
+    first = BatchExperienceProcessor(FlakyBrain(failing={'b'}), max_concurrency=2, max_retries=0)
+    report = first.run(str(input_path), str(output_path))
+    assert (report['processed'], report['failed']) == (2, 1)
+    # An interrupted write leaves a partial last line behind
+    with open(output_path, 'a', encoding='utf-8') as output_file:
+        output_file.write('{"id": "c", "sta')
+
+    second = BatchExperienceProcessor(FlakyBrain(), max_concurrency=2, max_retries=0)
+    report = second.run(str(input_path), str(output_path))
+    assert (report['processed'], report['failed']) == (1, 0)
+
+    results = read_results(output_path)
+    assert sorted(result['id'] for result in results) == ['a', 'b', 'c']
+    assert all(result['status'] == 'ok' for result in results)
@@ -0,0 +1,30 @@
+import pygame
+import pytest
+import asset_pack
+from level_viewer import EmotionLevelViewer
+
+
+@pytest.fixture
+def fresh_pack(display, tmp_path, monkeypatch):
+    """A pack baked from the current images, installed as the game's asset pack."""
+    path = str(tmp_path / 'assets.pack')
+    asset_pack.bake(path)
+    pack = asset_pack.AssetPack(path)
+    monkeypatch.setattr(asset_pack, 'asset_pack', pack)
+    monkeypatch.setattr(asset_pack, 'asset_pack_checked', True)
+    yield pack
+    pack.close()
+
+
+def test_emotion_switches_take_the_sky_from_the_pack(fresh_pack, tmp_path, monkeypatch):
+    viewer = EmotionLevelViewer(level_number=0, levels_dir=str(tmp_path / 'levels'))
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError(f"pygame.image.load{args} called with a fresh asset pack")
+
+    monkeypatch.setattr(pygame.image, 'load', no_decode)
+    for emotion in ('joy', 'fear', 'anger', 'neutral'):
+        viewer.emotion = emotion
+        viewer.generate_emotion_level(seed=1)
+        assert viewer.assets['sky'] is viewer.sky_cache[emotion]
+        assert viewer.assets['sky'].get_size() == pygame.display.get_surface().get_size()
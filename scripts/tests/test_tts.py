@@ -0,0 +1,40 @@
+import asyncio
+import io
+import wave
+import pygame
+import pytest
+from tts import NarrationPlayer
+
+
+def wav_bytes(seconds=0.5, rate=22050):
+    """A silent mono WAV segment; Sound decodes it from memory like the MP3 segments."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(b'\0\0' * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def effective_gain(channel):
+    return channel.get_sound().get_volume() * channel.get_volume()
+
+
+@pytest.fixture
+def player(display):
+    channel = pygame.mixer.Channel(1)
+    yield NarrationPlayer(channel)
+    channel.stop()
+
+
+def test_volume_is_applied_once(player):
+    player.set_volume(0.5)
+    asyncio.run(player.play(wav_bytes()))
+    assert effective_gain(player.channel) == pytest.approx(0.5, abs=0.01)
+
+
+def test_volume_change_applies_to_the_playing_segment(player):
+    asyncio.run(player.play(wav_bytes()))
+    player.set_volume(0.25)
+    assert effective_gain(player.channel) == pytest.approx(0.25, abs=0.01)
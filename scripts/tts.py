@@ -4,89 +4,473 @@ Edge-TTS narrator - High quality Microsoft voices for game narratives.
 
 import edge_tts
 import asyncio
+import hashlib
+import heapq
+import io
+import itertools
+import json
 import pygame
-import tempfile
 import os
 import threading
+import time
+from collections import OrderedDict
+from audio_manager import get_audio_manager
 
-class EdgeTTSNarrator:
-    def __init__(self):
-        """Initialize Edge TTS narrator with emotion-specific voices."""
-        pygame.mixer.init()
+# Lower numbers are spoken first
+PRIORITY_HIGH = 0
+PRIORITY_NARRATION = 1
+PRIORITY_LOW = 2
+
+
+class NarrationAudioCache:
+    """
+    On-disk cache of synthesized narration keyed by (voice, text, TTS settings).
+    
+    Least recently used files are evicted once the cache exceeds max_bytes.
+    Only touched from the TTS worker thread.
+    """
+    
+    def __init__(self, cache_dir='../cache/tts', max_bytes=64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> size, oldest first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
         
-        self.emotion_voices = {
-            'joy': 'en-US-AvaMultilingualNeural',
-            'fear': 'en-US-BrianMultilingualNeural',
-            'anger': 'en-US-AndrewMultilingualNeural',
-            'neutral': 'en-IN-PrabhatNeural'
-        }
+        os.makedirs(cache_dir, exist_ok=True)
+        cached_files = []
+        for filename in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, filename)
+            if filename.endswith('.part'):
+                os.unlink(path)  # Left over from an interrupted synthesis
+            elif filename.endswith('.mp3'):
+                cached_files.append((os.path.getmtime(path), filename[:-4], os.path.getsize(path)))
+        for _, key, size in sorted(cached_files):
+            self.entries[key] = size
+            self.total_bytes += size
+        self.evict()
+    
+    def key(self, voice, text, settings):
+        payload = json.dumps([voice, text, sorted(settings.items())])
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + '.mp3')
+    
+    def temp_path_for(self, key):
+        return self.path_for(key) + '.part'
+    
+    def contains(self, key):
+        return key in self.entries
+    
+    def get(self, key):
+        """Cached audio bytes, or None on a miss."""
+        path = self.path_for(key)
+        if key in self.entries:
+            try:
+                with open(path, 'rb') as audio_file:
+                    data = audio_file.read()
+                os.utime(path)  # Keeps LRU order across runs
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return data
+            except OSError:
+                self.total_bytes -= self.entries.pop(key)
+        self.misses += 1
+        return None
+    
+    def store(self, key, data):
+        """Write freshly synthesized audio into the cache."""
+        temp_path = self.temp_path_for(key)
+        with open(temp_path, 'wb') as audio_file:
+            audio_file.write(data)
+        os.replace(temp_path, self.path_for(key))
+        self.total_bytes += len(data) - self.entries.pop(key, 0)
+        self.entries[key] = len(data)
+        self.evict()
+    
+    def evict(self):
+        # Always keep the newest entry, it is probably about to be played
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.unlink(self.path_for(key))
+            except OSError:
+                pass
+
+
+# MPEG audio Layer III header tables
+MP3_BITRATES = {
+    'mpeg1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    'mpeg2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+}
+MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def parse_mp3_frame(data, pos):
+    """
+    Parse the Layer III frame header at pos.
+    
+    Returns (frame_length, main_data_begin) or None if pos is not a frame start.
+    main_data_begin == 0 means the frame does not borrow bytes from earlier frames.
+    """
+    if pos + 6 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    version = (data[pos + 1] >> 3) & 0x3
+    layer = (data[pos + 1] >> 1) & 0x3
+    has_crc = not (data[pos + 1] & 0x1)
+    bitrate_index = data[pos + 2] >> 4
+    sample_rate_index = (data[pos + 2] >> 2) & 0x3
+    padding = (data[pos + 2] >> 1) & 0x1
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    
+    mpeg1 = version == 3
+    bitrate = MP3_BITRATES['mpeg1' if mpeg1 else 'mpeg2'][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][sample_rate_index]
+    frame_length = (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+    
+    side_info = pos + 4 + (2 if has_crc else 0)
+    if side_info + 2 > len(data):
+        return None
+    if mpeg1:
+        main_data_begin = (data[side_info] << 1) | (data[side_info + 1] >> 7)
+    else:
+        main_data_begin = data[side_info]
+    return frame_length, main_data_begin
+
+
+class Mp3SegmentSplitter:
+    """
+    Cut a streaming MP3 into independently decodable segments.
+    
+    Segments end on frame boundaries, preferably before a frame that does not
+    use the bit reservoir, so each one can be decoded on its own as soon as
+    it is complete. The first segment is kept short to start speaking early.
+    """
+    
+    def __init__(self, first_segment_bytes=2048, segment_bytes=12288):
+        self.buffer = bytearray()
+        self.frames_end = 0  # End of the complete frames parsed so far
+        self.target_bytes = first_segment_bytes
+        self.segment_bytes = segment_bytes
+    
+    def feed(self, data):
+        """Add streamed bytes and return any segments that are ready."""
+        self.buffer += data
+        segments = []
+        pos = self.frames_end
+        while True:
+            frame = parse_mp3_frame(self.buffer, pos)
+            if frame is None:
+                if pos + 6 > len(self.buffer):
+                    break
+                # Not a frame start (tag or junk), the decoder resyncs past it
+                pos += 1
+                continue
+            
+            frame_length, main_data_begin = frame
+            if pos + frame_length > len(self.buffer):
+                break
+            
+            can_cut = main_data_begin == 0 or pos >= self.target_bytes * 2
+            if pos >= self.target_bytes and can_cut:
+                segments.append(bytes(self.buffer[:pos]))
+                del self.buffer[:pos]
+                pos = 0
+                self.target_bytes = self.segment_bytes
+            pos += frame_length
+            self.frames_end = pos
+        return segments
+    
+    def flush(self):
+        """Return the rest of the stream once it has ended."""
+        remainder = bytes(self.buffer)
+        self.buffer.clear()
+        self.frames_end = 0
+        return [remainder] if remainder else []
+
+
+class NarrationPlayer:
+    """
+    Plays decoded narration segments back to back on the narration channel.
+    
+    The channel holds one playing and one queued Sound. Playback progress is
+    tracked from each Sound's length, so waiting never polls the mixer.
+    Volume is set on the channel only, never on the Sounds, so a change
+    applies to what is already playing and queued, and is not applied twice.
+    """
+    
+    def __init__(self, channel):
+        self.channel = channel
+        self.volume = 1.0
+        self.channel.set_volume(self.volume)
+        self.playing_until = 0.0  # When the currently playing Sound ends
+        self.queued_until = 0.0  # When everything handed to the channel ends
+    
+    def is_busy(self):
+        return self.channel.get_busy() or time.monotonic() < self.queued_until
+    
+    async def play(self, mp3_bytes):
+        """Decode an MP3 segment in memory and play it after what is already queued."""
+        try:
+            sound = pygame.mixer.Sound(file=io.BytesIO(mp3_bytes))
+        except pygame.error as e:
+            print(f"Skipping undecodable narration segment: {e}")
+            return
         
-        self.is_generating = False
-        self.generation_thread = None
+        now = time.monotonic()
+        if now >= self.queued_until or not self.channel.get_busy():
+            self.channel.play(sound)
+            self.playing_until = self.queued_until = now + sound.get_length()
+            return
         
-        print("Edge TTS narrator initialized")
-    
-    def speak_narrative(self, text, emotion='neutral'):
-        """Generate and play speech using Edge TTS (non-blocking)."""
-        if self.is_generating:
-            self.stop_speaking()
+        if self.queued_until > self.playing_until:
+            # Queue slot is taken, wait for the current Sound to finish
+            await asyncio.sleep(max(0.0, self.playing_until - time.monotonic()))
+            self.playing_until = self.queued_until
         
-        voice = self.emotion_voices.get(emotion, self.emotion_voices['neutral'])
-        print(f"Generating speech with {voice}...")
+        if self.channel.get_busy():
+            self.channel.queue(sound)
+            self.queued_until = self.playing_until + sound.get_length()
+        else:
+            self.channel.play(sound)
+            self.playing_until = self.queued_until = time.monotonic() + sound.get_length()
+    
+    async def wait_until_done(self):
+        await asyncio.sleep(max(0.0, self.queued_until - time.monotonic()))
+    
+    def stop(self):
+        self.channel.stop()
+        self.playing_until = self.queued_until = 0.0
+    
+    def set_volume(self, volume):
+        self.volume = volume
+        self.channel.set_volume(volume)
+
+
+class TTSJob:
+    def __init__(self, text, voice, priority, generation):
+        self.text = text
+        self.voice = voice
+        self.priority = priority
+        self.generation = generation
+        self.key = (generation, voice, text)
+
+
+class TTSWorker:
+    """
+    One long-lived thread that owns an event loop and a priority job queue.
+    
+    Jobs are spoken one at a time. cancel_all() drops everything queued and
+    cancels the job in flight, so a new narration never overlaps an old one.
+    Identical jobs that are already queued are not queued twice.
+    Audio is synthesized through the cache, and prefetch() fills the cache
+    in the background without holding up playback.
+    """
+    
+    def __init__(self, cache, player, tts_settings):
+        self.cache = cache
+        self.player = player
+        self.tts_settings = tts_settings
+        self.loop = asyncio.new_event_loop()
+        self.jobs = []  # heap of (priority, sequence, job)
+        self.queued_keys = set()
+        self.sequence = itertools.count()
+        self.job_available = asyncio.Event()
+        self.current_job = None
+        self.current_task = None
+        self.prefetching = {}  # cache key -> task
+        self.prefetch_slots = asyncio.Semaphore(2)
+        # Bumped by cancel_all so stale jobs are skipped
+        self.generation = 0
         
-        # Start generation in background thread
-        self.generation_thread = threading.Thread(
-            target=self._run_async_generation,
-            args=(text, voice)
-        )
-        self.generation_thread.daemon = True
-        self.generation_thread.start()
-    
-    def _run_async_generation(self, text, voice):
-        """Run async generation in thread."""
+        self.thread = threading.Thread(target=self._run, name='tts-worker', daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.create_task(self._process_jobs())
+        self.loop.run_forever()
+    
+    def submit(self, text, voice, priority=PRIORITY_NARRATION):
+        """Queue text to be spoken (thread-safe)."""
+        job = TTSJob(text, voice, priority, self.generation)
+        self.loop.call_soon_threadsafe(self._enqueue, job)
+    
+    def prefetch(self, text, voice):
+        """Synthesize text into the cache without playing it (thread-safe)."""
+        self.loop.call_soon_threadsafe(self._start_prefetch, text, voice)
+    
+    def cancel_all(self):
+        """Drop queued jobs and cancel the one in flight (thread-safe)."""
+        self.generation += 1
+        self.loop.call_soon_threadsafe(self._cancel_pending)
+    
+    def is_busy(self):
+        return self.current_job is not None or bool(self.jobs) or self.player.is_busy()
+    
+    def _enqueue(self, job):
+        if job.generation != self.generation or job.key in self.queued_keys:
+            return
+        self.queued_keys.add(job.key)
+        heapq.heappush(self.jobs, (job.priority, next(self.sequence), job))
+        self.job_available.set()
+    
+    def _start_prefetch(self, text, voice):
+        key = self.cache.key(voice, text, self.tts_settings)
+        if self.cache.contains(key) or key in self.prefetching:
+            return
+        self.prefetching[key] = self.loop.create_task(self._prefetch(text, voice, key))
+    
+    async def _prefetch(self, text, voice, key):
         try:
-            self.is_generating = True
-            asyncio.run(self._generate_and_play(text, voice))
+            async with self.prefetch_slots:
+                return await self._synthesize_to_cache(text, voice, key)
         except Exception as e:
-            print(f"Error in TTS generation: {e}")
+            print(f"Error pre-synthesizing speech: {e}")
+            return None
         finally:
-            self.is_generating = False
+            self.prefetching.pop(key, None)
     
-    async def _generate_and_play(self, text, voice):
-        """Generate speech and play it."""
-        try:
-            communicate = edge_tts.Communicate(text=text, voice=voice)
+    async def _stream_audio(self, text, voice):
+        """Yield MP3 bytes from edge-tts as they arrive."""
+        communicate = edge_tts.Communicate(text=text, voice=voice, **self.tts_settings)
+        async for chunk in communicate.stream():
+            if chunk['type'] == 'audio':
+                yield chunk['data']
+    
+    async def _synthesize_to_cache(self, text, voice, key):
+        audio = bytearray()
+        async for data in self._stream_audio(text, voice):
+            audio += data
+        self.cache.store(key, bytes(audio))
+        return bytes(audio)
+    
+    def _cancel_pending(self):
+        self.jobs.clear()
+        self.queued_keys.clear()
+        if self.current_task and not self.current_task.done():
+            self.current_task.cancel()
+    
+    async def _process_jobs(self):
+        while True:
+            if not self.jobs:
+                self.job_available.clear()
+                await self.job_available.wait()
+                continue
             
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-                temp_filename = temp_file.name
+            _, _, job = heapq.heappop(self.jobs)
+            self.queued_keys.discard(job.key)
+            if job.generation != self.generation:
+                continue
             
-            await communicate.save(temp_filename)
+            self.current_job = job
+            self.current_task = self.loop.create_task(self._generate_and_play(job))
+            try:
+                await self.current_task
+            except asyncio.CancelledError:
+                print("Narration cancelled")
+            finally:
+                self.current_job = None
+                self.current_task = None
+            
+            if not self.jobs:
+                print("Finished speaking")
+    
+    async def _generate_and_play(self, job):
+        """Play cached audio, or stream synthesis straight into the player."""
+        try:
+            key = self.cache.key(job.voice, job.text, self.tts_settings)
+            audio = self.cache.get(key)
             
-            # Play audio (this will happen in the background thread)
-            pygame.mixer.music.load(temp_filename)
-            pygame.mixer.music.play()
+            pending = self.prefetching.get(key)
+            if audio is None and pending:
+                # Shielded so cancelling playback does not throw away the prefetch
+                audio = await asyncio.shield(pending)
             
-            # Wait for completion in background
-            while pygame.mixer.music.get_busy():
-                pygame.time.wait(100)
+            if audio is not None:
+                if job.generation == self.generation:
+                    await self.player.play(audio)
+            else:
+                splitter = Mp3SegmentSplitter()
+                streamed = bytearray()
+                async for data in self._stream_audio(job.text, job.voice):
+                    streamed += data
+                    for segment in splitter.feed(data):
+                        if job.generation != self.generation:
+                            return
+                        await self.player.play(segment)
+                for segment in splitter.flush():
+                    await self.player.play(segment)
+                self.cache.store(key, bytes(streamed))
             
-            os.unlink(temp_filename)
-            print("Finished speaking")
+            await self.player.wait_until_done()
             
+        except asyncio.CancelledError:
+            self.player.stop()
+            raise
         except Exception as e:
             print(f"Error generating speech: {e}")
+
+
+class EdgeTTSNarrator:
+    def __init__(self):
+        """Initialize Edge TTS narrator with emotion-specific voices."""
+        self.emotion_voices = {
+            'joy': 'en-US-AvaMultilingualNeural',
+            'fear': 'en-US-BrianMultilingualNeural',
+            'anger': 'en-US-AndrewMultilingualNeural',
+            'neutral': 'en-IN-PrabhatNeural'
+        }
+        
+        # Part of the cache key, so changing them never replays stale audio
+        self.tts_settings = {'rate': '+0%', 'volume': '+0%', 'pitch': '+0Hz'}
+        
+        self.voice = self.emotion_voices['neutral']
+        self.cache = NarrationAudioCache()
+        self.player = NarrationPlayer(get_audio_manager().voices.channel('narration'))
+        self.worker = TTSWorker(self.cache, self.player, self.tts_settings)
+        
+        print("Edge TTS narrator initialized")
+    
+    @property
+    def is_generating(self):
+        return self.worker.is_busy()
+    
+    def speak_narrative(self, text, emotion='neutral', priority=PRIORITY_NARRATION):
+        """Generate and play speech using Edge TTS (non-blocking)."""
+        self.begin_narration(emotion)
+        self.queue_sentence(text, priority)
+    
+    def begin_narration(self, emotion='neutral'):
+        """Start a narration whose sentences will arrive one at a time."""
+        self.stop_speaking()
+        self.voice = self.emotion_voices.get(emotion, self.emotion_voices['neutral'])
+        print(f"Generating speech with {self.voice}...")
+    
+    def queue_sentence(self, text, priority=PRIORITY_NARRATION):
+        """Queue a finished sentence so it is spoken as soon as possible."""
+        if text.strip():
+            self.worker.submit(text.strip(), self.voice, priority)
+    
+    def presynthesize(self, emotion, sentences):
+        """Fill the audio cache for sentences in the emotion's voice, in the background."""
+        voice = self.emotion_voices.get(emotion, self.emotion_voices['neutral'])
+        for sentence in sentences:
+            if sentence.strip():
+                self.worker.prefetch(sentence.strip(), voice)
     
     def is_speaking(self):
         """Check if currently speaking or generating."""
-        return pygame.mixer.music.get_busy() or self.is_generating
+        return self.player.is_busy() or self.is_generating
     
     def stop_speaking(self):
-        """Stop current narration and generation."""
-        pygame.mixer.music.stop()
-        self.is_generating = False
-        if self.generation_thread and self.generation_thread.is_alive():
-            # Thread will finish naturally
-            pass
+        """Stop current narration and cancel any synthesis in flight."""
+        self.worker.cancel_all()
+        self.player.stop()
     
     def set_volume(self, volume):
-        pygame.mixer.music.set_volume(volume)
\ No newline at end of file
+        self.player.set_volume(volume)